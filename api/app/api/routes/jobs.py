@@ -7,14 +7,35 @@ import mimetypes
 import zipfile
 from pathlib import Path
 
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import FileResponse, RedirectResponse, Response, StreamingResponse
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from ... import artifact_store, precompress
 from ...config import settings
-from ...models import Artifact, HouseSpec as HouseSpecRow, Job, Session as SessionRow, User
-from ...schemas import ArtifactsOut, ArtifactOut, JobCreateIn, JobOut, JobRegenerateIn
+from ...models import (
+    Artifact,
+    HouseSpec as HouseSpecRow,
+    Job,
+    PlanGraph as PlanGraphRow,
+    Session as SessionRow,
+    UsageEvent,
+    User,
+)
+from ...plan import memo as plan_memo, render_cache
+from ...plan.render import THEMES, render_plan_svg, render_plan_svg_compact
+from ...providers.base import EXTERIOR_VIEWS
+from ...schemas import (
+    ArtifactsOut,
+    ArtifactOut,
+    JobCreateIn,
+    JobOut,
+    JobRegenerateIn,
+    JobUsageOut,
+    PlanGraph as PlanGraphSchema,
+    UsageEventOut,
+)
 from ..deps import get_current_user, get_db
 
 
@@ -31,6 +52,11 @@ def _json_obj(raw: str | None) -> dict:
     return val if isinstance(val, dict) else {}
 
 
+def _artifact_filename(art: Artifact) -> str:
+    # Stored blobs are named by checksum; rows written before the artifact store keep their own name.
+    return _json_obj(art.meta_json).get("filename") or Path(art.path).name
+
+
 def _json_arr(raw: str | None) -> list:
     if not raw:
         return []
@@ -49,6 +75,7 @@ def _job_out(job: Job) -> JobOut:
         bedrooms=job.bedrooms,
         bathrooms=job.bathrooms,
         style=job.style,
+        exterior_views=_json_arr(job.exterior_views_json),
         status=job.status,
         stage=job.stage,
         error=job.error,
@@ -82,10 +109,37 @@ def _request_hash(session_id: str, payload: JobCreateIn) -> str:
         "want_exterior_image": bool(payload.want_exterior_image),
         "priority": payload.priority,
     }
+    if payload.exterior_views:
+        # Only part of the hash when set, so existing single-image requests keep their hashes.
+        normalized["exterior_views"] = payload.exterior_views
     data = json.dumps(normalized, sort_keys=True, separators=(",", ":"))
     return hashlib.sha256(data.encode("utf-8")).hexdigest()
 
 
+def _validated_exterior_views(views: list[str]) -> list[str]:
+    unknown = [v for v in views if v not in EXTERIOR_VIEWS]
+    if unknown:
+        raise HTTPException(
+            status_code=422,
+            detail={
+                "code": "unknown_exterior_view",
+                "message": f"Unknown exterior view(s): {', '.join(unknown)}",
+                "retryable": False,
+            },
+        )
+    deduped = list(dict.fromkeys(views))
+    if len(deduped) > settings.max_images_per_job:
+        raise HTTPException(
+            status_code=422,
+            detail={
+                "code": "too_many_exterior_views",
+                "message": f"At most {settings.max_images_per_job} exterior views per job",
+                "retryable": False,
+            },
+        )
+    return deduped
+
+
 def _retryable_from_code(code: str | None) -> bool:
     return code in {"provider_transient"}
 
@@ -122,6 +176,7 @@ def create_job(
     if not sess or sess.user_id != user.id:
         raise HTTPException(status_code=404, detail="Session not found")
 
+    payload.exterior_views = _validated_exterior_views(payload.exterior_views)
     req_hash = _request_hash(session_id, payload)
     existing: Job | None = None
     if payload.idempotency_key:
@@ -158,6 +213,7 @@ def create_job(
         bathrooms=payload.bathrooms,
         style=payload.style,
         want_exterior_image=1 if payload.want_exterior_image else 0,
+        exterior_views_json=json.dumps(payload.exterior_views),
         idempotency_key=payload.idempotency_key,
         request_hash=req_hash,
         priority=payload.priority,
@@ -181,6 +237,9 @@ def regenerate_job(
     next_want_exterior = (
         payload.want_exterior_image if payload.want_exterior_image is not None else bool(job.want_exterior_image)
     )
+    next_views = _validated_exterior_views(
+        payload.exterior_views if payload.exterior_views is not None else _json_arr(job.exterior_views_json)
+    )
     reuse_spec = bool(payload.reuse_spec) if payload.reuse_spec is not None else False
 
     if reuse_spec:
@@ -201,6 +260,7 @@ def regenerate_job(
         bathrooms=next_bathrooms,
         style=next_style,
         want_exterior_image=next_want_exterior,
+        exterior_views=next_views,
         priority=job.priority,
     )
     req_hash = _request_hash(job.session_id, create_payload)
@@ -218,6 +278,7 @@ def regenerate_job(
         bathrooms=next_bathrooms,
         style=next_style,
         want_exterior_image=1 if next_want_exterior else 0,
+        exterior_views_json=json.dumps(next_views),
         request_hash=req_hash,
         priority=job.priority,
         status="queued",
@@ -243,7 +304,7 @@ def export_job(job_id: str, db: Session = Depends(get_db), user: User = Depends(
 
     missing: list[str] = []
     for a in rows:
-        if not Path(a.path).exists():
+        if not artifact_store.exists(a.path):
             missing.append(a.path)
     if missing:
         raise HTTPException(
@@ -263,13 +324,16 @@ def export_job(job_id: str, db: Session = Depends(get_db), user: User = Depends(
     manifest_items = []
     with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as z:
         for a in rows:
-            p = Path(a.path)
-            z.write(p, arcname=p.name)
+            name = _artifact_filename(a)
+            backend, key = artifact_store.resolve(a.path)
+            with z.open(name, "w") as out:
+                for chunk in backend.iter_bytes(key):
+                    out.write(chunk)
             manifest_items.append(
                 {
                     "id": a.id,
                     "type": a.type,
-                    "filename": p.name,
+                    "filename": name,
                     "mime": a.mime_type,
                     "checksum_sha256": a.checksum_sha256,
                     "size_bytes": a.size_bytes,
@@ -297,38 +361,202 @@ def get_job(job_id: str, db: Session = Depends(get_db), user: User = Depends(get
     return _job_out(job)
 
 
+@router.get("/{job_id}/usage", response_model=JobUsageOut)
+def job_usage(job_id: str, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+    _assert_job_owner(db, user, job_id)
+    rows = db.query(UsageEvent).filter(UsageEvent.job_id == job_id).order_by(UsageEvent.created_at.asc()).all()
+    items = [
+        UsageEventOut(
+            id=e.id,
+            event_type=e.event_type,
+            provider_model=e.provider_model,
+            input_tokens=e.input_tokens,
+            output_tokens=e.output_tokens,
+            image_tokens=e.image_tokens,
+            latency_ms=e.latency_ms,
+            cost_microusd=e.cost_microusd,
+            created_at=e.created_at,
+        )
+        for e in rows
+    ]
+    return JobUsageOut(
+        job_id=job_id,
+        cost_microusd_total=sum(e.cost_microusd or 0 for e in rows),
+        latency_ms_total=sum(e.latency_ms or 0 for e in rows),
+        items=items,
+    )
+
+
 @router.get("/{job_id}/artifacts", response_model=ArtifactsOut)
 def list_artifacts(job_id: str, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
     _assert_job_owner(db, user, job_id)
     rows = db.query(Artifact).filter(Artifact.job_id == job_id).order_by(Artifact.created_at.asc()).all()
-    items = [
-        ArtifactOut(
-            id=a.id,
-            type=a.type,
-            mime_type=a.mime_type,
-            checksum_sha256=a.checksum_sha256,
-            size_bytes=a.size_bytes,
-            url=f"/api/v1/jobs/{job_id}/artifacts/{a.id}/download",
-            created_at=a.created_at,
+    items = []
+    for a in rows:
+        meta = _json_obj(a.meta_json)
+        items.append(
+            ArtifactOut(
+                id=a.id,
+                type=a.type,
+                mime_type=a.mime_type,
+                checksum_sha256=a.checksum_sha256,
+                size_bytes=a.size_bytes,
+                url=f"/api/v1/jobs/{job_id}/artifacts/{a.id}/download",
+                created_at=a.created_at,
+                width=meta.get("width"),
+                height=meta.get("height"),
+                encodings=meta.get("encodings") or {},
+                view=meta.get("view"),
+            )
         )
-        for a in rows
-    ]
-    return ArtifactsOut(job_id=job_id, items=items)
+    thumbnails = sorted((i for i in items if i.type == "plan_thumbnail"), key=lambda i: i.size_bytes or 0)
+    return ArtifactsOut(job_id=job_id, items=items, thumbnails=thumbnails)
+
+
+@router.get("/{job_id}/plan.svg")
+def render_plan(
+    job_id: str,
+    request: Request,
+    px_per_ft: float = 12.0,
+    theme: str = "light",
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """The job's stored plan rendered at any scale and theme, from an LRU of renders."""
+    _assert_job_owner(db, user, job_id)
+    if theme not in THEMES:
+        raise HTTPException(
+            status_code=422,
+            detail={
+                "code": "invalid_theme",
+                "message": f"Unknown theme {theme!r}",
+                "details": {"themes": sorted(THEMES)},
+                "retryable": False,
+            },
+        )
+    canonical_hash = db.execute(select(PlanGraphRow.canonical_hash).where(PlanGraphRow.job_id == job_id)).scalar()
+    if canonical_hash is None:
+        raise HTTPException(
+            status_code=409,
+            detail={"code": "plan_not_ready", "message": "The job has no plan yet", "retryable": True},
+        )
+    scale = render_cache.normalize_scale(px_per_ft)
+    renderer = plan_memo.svg_renderer()
+    key = render_cache.render_key(canonical_hash, scale, theme, renderer)
+    # Same key, same bytes: the ETag needs no body hash, and a revalidation never renders.
+    headers = {
+        "ETag": f'"{canonical_hash[:24]}-{scale:g}-{theme}-{renderer}"',
+        "Cache-Control": f"private, max-age={settings.plan_render_max_age_seconds}",
+    }
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+
+    def _render() -> bytes:
+        json_text = db.execute(select(PlanGraphRow.json_text).where(PlanGraphRow.job_id == job_id)).scalar_one()
+        plan = PlanGraphSchema.model_validate_json(json_text)
+        draw = render_plan_svg_compact if renderer == "compact" else render_plan_svg
+        return draw(plan, px_per_ft=scale, theme=theme).encode("utf-8")
+
+    body, cached = render_cache.cache.get_or_render(key, _render)
+    headers["X-Render-Cache"] = "hit" if cached else "miss"
+    return Response(content=body, media_type="image/svg+xml", headers=headers)
+
+
+@router.get("/{job_id}/exterior/{view}")
+def exterior_image(
+    job_id: str,
+    view: str,
+    request: Request,
+    width: int | None = None,
+    redirect: bool = True,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """
+    The smallest stored rendition of an exterior view that is at least `width` px wide: a
+    downscaled variant (WebP when the client accepts it, else JPEG) or the full-size original.
+    """
+    _assert_job_owner(db, user, job_id)
+    rows = (
+        db.query(Artifact)
+        .filter(Artifact.job_id == job_id, Artifact.type.in_(("exterior_image", "exterior_image_variant")))
+        .all()
+    )
+    originals = [a for a in rows if a.type == "exterior_image" and _json_obj(a.meta_json).get("view") == view]
+    if not originals:
+        raise HTTPException(status_code=404, detail="Exterior image not found")
+    chosen = originals[-1]
+    if width is not None:
+        fmt = "webp" if "image/webp" in request.headers.get("accept", "") else "jpeg"
+        fits = [
+            (meta["width"], a)
+            for a in rows
+            if a.type == "exterior_image_variant"
+            and (meta := _json_obj(a.meta_json)).get("view") == view
+            and meta.get("format") == fmt
+            and meta.get("width", 0) >= width
+        ]
+        if fits:
+            chosen = min(fits, key=lambda f: f[0])[1]
+    return _serve_artifact(chosen, headers={"Vary": "Accept"}, redirect=redirect)
+
+
+def _serve_artifact(
+    art: Artifact, *, headers: dict[str, str], encoding: str | None = None, redirect: bool = True
+) -> Response:
+    """
+    The artifact's bytes (or its precompressed `encoding` sibling): a redirect to a short-lived
+    presigned URL when the backend offers one, else a file or a stream through the API.
+    """
+    backend, key = artifact_store.resolve(art.path)
+    local = backend.local_path(key)
+    encoded = precompress.variant_path(local, encoding) if local is not None and encoding else None
+    if encoding and (encoded is None or encoded.exists()):  # a lost local sibling falls back to identity
+        key += precompress.SUFFIXES[encoding]
+        local = encoded
+        headers = {**headers, "Content-Encoding": encoding}
+    filename = _artifact_filename(art)
+    media_type = art.mime_type or (mimetypes.guess_type(filename)[0] or "application/octet-stream")
+    if redirect and settings.artifact_presigned_downloads:
+        url = backend.presigned_url(
+            key, expires_s=settings.artifact_presigned_ttl_seconds, filename=filename, content_type=media_type
+        )
+        if url is not None:
+            # The URL expires; caching the redirect would outlive it.
+            return RedirectResponse(url, status_code=307, headers={**headers, "Cache-Control": "no-store"})
+    if local is not None:
+        if not local.exists():
+            raise HTTPException(
+                status_code=404,
+                detail={"code": "artifact_missing", "message": "Artifact missing on disk", "retryable": False},
+            )
+        return FileResponse(local, media_type=media_type, filename=filename, headers=headers)
+    size = backend.size(key)
+    if size is None:
+        raise HTTPException(
+            status_code=404,
+            detail={"code": "artifact_missing", "message": "Artifact missing from storage", "retryable": False},
+        )
+    headers = {**headers, "Content-Length": str(size), "Content-Disposition": f'attachment; filename="{filename}"'}
+    return StreamingResponse(backend.iter_bytes(key), media_type=media_type, headers=headers)
 
 
 @router.get("/{job_id}/artifacts/{artifact_id}/download")
 def download_artifact(
-    job_id: str, artifact_id: str, db: Session = Depends(get_db), user: User = Depends(get_current_user)
+    job_id: str,
+    artifact_id: str,
+    request: Request,
+    redirect: bool = True,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
 ):
     _assert_job_owner(db, user, job_id)
     art = db.get(Artifact, artifact_id)
     if not art or art.job_id != job_id:
         raise HTTPException(status_code=404, detail="Artifact not found")
-    path = Path(art.path)
-    if not path.exists():
-        raise HTTPException(
-            status_code=404,
-            detail={"code": "artifact_missing", "message": "Artifact missing on disk", "retryable": False},
-        )
-    media_type = art.mime_type or (mimetypes.guess_type(str(path))[0] or "application/octet-stream")
-    return FileResponse(path, media_type=media_type, filename=path.name)
+    encodings = _json_obj(art.meta_json).get("encodings") or {}
+    if not encodings:
+        return _serve_artifact(art, headers={}, redirect=redirect)
+    # Precompressed siblings written with the artifact: pick one, never compress here.
+    encoding = precompress.negotiate(request.headers.get("accept-encoding"), encodings)
+    return _serve_artifact(art, headers={"Vary": "Accept-Encoding"}, encoding=encoding, redirect=redirect)
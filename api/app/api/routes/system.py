@@ -2,19 +2,25 @@ from __future__ import annotations
 
 import datetime as dt
 import json
+import os
 import shutil
 from pathlib import Path
 from urllib.parse import urlsplit
 
 import redis
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
+from ... import faults, telemetry
 from ...config import settings
 from ...db import get_engine
-from ...models import Job
-from ..deps import get_db
+from ...jobs import similarity
+from ...models import Job, User
+from ...plan import memo as plan_memo, render_cache
+from ...providers import health as provider_health
+from ...schemas import FaultConfigIn
+from ..deps import get_current_user, get_db
 
 
 router = APIRouter(prefix="/system", tags=["system"])
@@ -44,6 +50,21 @@ def _heartbeat_age_seconds(heartbeat: dict) -> int | None:
     return max(0, int((dt.datetime.now(dt.UTC) - stamp).total_seconds()))
 
 
+def _worker_stats(heartbeat: dict) -> dict:
+    """
+    The worker's published stats (see worker._stats_snapshot), or {} when there is nothing to
+    merge: no fresh heartbeat, or the worker runs in this process and the local singletons
+    already hold its numbers.
+    """
+    stats = heartbeat.get("stats")
+    if not isinstance(stats, dict) or stats.get("pid") == os.getpid():
+        return {}
+    age = _heartbeat_age_seconds(heartbeat)
+    if age is None or age > settings.worker_heartbeat_ttl_seconds:
+        return {}
+    return stats
+
+
 def _redis_status() -> dict:
     if not settings.redis_url:
         return {"status": "not_configured"}
@@ -74,6 +95,8 @@ def system_health(db: Session = Depends(get_db)):
         database_error = str(exc)[:200]
 
     heartbeat = _read_worker_heartbeat()
+    worker_stats = _worker_stats(heartbeat)
+    heartbeat.pop("stats", None)
     heartbeat_age = _heartbeat_age_seconds(heartbeat)
     worker_stale = heartbeat_age is None or heartbeat_age > settings.worker_heartbeat_ttl_seconds
     redis_status = _redis_status()
@@ -110,4 +133,77 @@ def system_health(db: Session = Depends(get_db)):
             "heartbeat_ttl_seconds": settings.worker_heartbeat_ttl_seconds,
         },
         "redis": redis_status,
+        "provider_health": provider_health.merge_snapshots(
+            provider_health.tracker.snapshot(), worker_stats.get("provider_health") or {}
+        ),
     }
+
+
+@router.get("/telemetry")
+def system_telemetry():
+    # Provider calls, prompt dedupe and plan builds happen in the worker; the render cache is the API's own.
+    worker = _worker_stats(_read_worker_heartbeat())
+    return {
+        "window_seconds": settings.telemetry_window_seconds,
+        "max_samples": settings.telemetry_max_samples,
+        "price_table": telemetry.price_table(),
+        "worker_stats": "merged" if worker else "local",
+        "providers": telemetry.merge_snapshots(telemetry.registry.snapshot(), worker.get("providers") or []),
+        "prompt_index": telemetry.merge_stats(similarity.index.stats(), worker.get("prompt_index") or {}),
+        "plan_memo": telemetry.merge_stats(plan_memo.memo.stats(), worker.get("plan_memo") or {}),
+        "plan_render_cache": render_cache.cache.stats(),
+    }
+
+
+def _require_fault_injection() -> None:
+    if not settings.fault_injection_enabled:
+        raise HTTPException(
+            status_code=409,
+            detail={
+                "code": "fault_injection_disabled",
+                "message": "Set FAULT_INJECTION_ENABLED=true to configure fault injection",
+                "retryable": False,
+            },
+        )
+
+
+def _fault_operator(user: User = Depends(get_current_user)) -> User:
+    # Rules apply to every job in every process, so only listed operators may see or change them.
+    operators = {e.strip().lower() for e in settings.fault_injection_operator_emails.split(",") if e.strip()}
+    if user.email.lower() not in operators:
+        raise HTTPException(
+            status_code=403,
+            detail={
+                "code": "fault_operator_required",
+                "message": "Fault injection is limited to FAULT_INJECTION_OPERATOR_EMAILS",
+                "retryable": False,
+            },
+        )
+    return user
+
+
+@router.get("/faults")
+def get_faults(user: User = Depends(_fault_operator)):
+    return faults.injector.snapshot()
+
+
+@router.put("/faults")
+def put_faults(payload: FaultConfigIn, user: User = Depends(_fault_operator)):
+    _require_fault_injection()
+    try:
+        rules = [faults.FaultRule.from_dict(r.model_dump()) for r in payload.rules]
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=422,
+            detail={"code": "invalid_fault_rule", "message": str(exc), "retryable": False},
+        ) from exc
+    # Published to var/, so the worker process picks the rules up as well.
+    faults.injector.publish(rules, seed=payload.seed)
+    return faults.injector.snapshot()
+
+
+@router.delete("/faults")
+def delete_faults(user: User = Depends(_fault_operator)):
+    _require_fault_injection()
+    faults.injector.publish([])
+    return faults.injector.snapshot()
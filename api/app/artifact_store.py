@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import hashlib
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from . import precompress
+from .config import settings
+from .storage.base import StorageBackend
+from .storage.local import LocalBackend
+from .storage.s3 import S3Backend
+
+_READ_CHUNK = 64 * 1024
+
+
+@dataclass(frozen=True)
+class StoredBlob:
+    uri: str  # recorded as Artifact.path; resolve() turns it back into (backend, key)
+    checksum_sha256: str
+    size_bytes: int
+    deduplicated: bool  # identical bytes were already stored; nothing new was written
+    encodings: dict[str, int] = field(default_factory=dict)  # precompressed siblings: {encoding: size}
+
+
+def root() -> Path:
+    return settings.var_dir / "blobs"
+
+
+def blob_key(checksum: str) -> str:
+    """
+    ab/cd/abcd... for depth 2: 65k leaf directories (or prefixes) keep each one small at millions
+    of blobs, where one directory per job under var/artifacts grows without bound.
+    """
+    depth = max(0, settings.artifact_store_fanout_depth)
+    return "/".join([*(checksum[2 * i : 2 * i + 2] for i in range(depth)), checksum])
+
+
+def blob_path(checksum: str) -> Path:
+    """Where the local backend keeps a blob."""
+    return root() / blob_key(checksum)
+
+
+def _s3_backend(*, bucket: str | None = None, prefix: str | None = None) -> S3Backend:
+    region = settings.artifact_s3_region
+    return S3Backend(
+        endpoint_url=settings.artifact_s3_endpoint_url or f"https://s3.{region}.amazonaws.com",
+        presign_endpoint_url=settings.artifact_s3_presign_endpoint_url or None,
+        bucket=bucket or settings.artifact_s3_bucket,
+        region=region,
+        access_key_id=settings.artifact_s3_access_key_id or "",
+        secret_access_key=settings.artifact_s3_secret_access_key or "",
+        prefix=settings.artifact_s3_prefix if prefix is None else prefix,
+        multipart_threshold_bytes=settings.artifact_s3_multipart_threshold_bytes,
+        part_size_bytes=settings.artifact_s3_part_size_bytes,
+        upload_concurrency=settings.artifact_s3_upload_concurrency,
+    )
+
+
+def get_backend() -> StorageBackend:
+    """The backend new artifacts are written to."""
+    if settings.artifact_storage_backend.strip().lower() == "s3":
+        return _s3_backend()
+    return LocalBackend(root())
+
+
+def resolve(stored: str) -> tuple[StorageBackend, str]:
+    """(backend, key) for an Artifact.path, whichever backend was configured when it was written."""
+    if stored.startswith("s3://"):
+        bucket, _, key = stored.removeprefix("s3://").partition("/")
+        return _s3_backend(bucket=bucket, prefix=""), key
+    return LocalBackend(root()), stored  # an absolute path: LocalBackend keys it as-is
+
+
+def _existing_encodings(backend: StorageBackend, key: str, mime: str) -> dict[str, int]:
+    if not settings.artifact_precompress_enabled or mime not in precompress.COMPRESSIBLE_MIMES:
+        return {}
+    sizes = {enc: backend.size(key + suffix) for enc, suffix in precompress.SUFFIXES.items()}
+    return {enc: size for enc, size in sizes.items() if size is not None}
+
+
+def _staging_dir() -> Path:
+    d = root() / "tmp"
+    d.mkdir(parents=True, exist_ok=True)
+    return d
+
+
+def store_file(
+    src: Path,
+    *,
+    mime: str,
+    checksum: str | None = None,
+    size: int | None = None,
+    keep_source: bool = False,
+) -> StoredBlob:
+    """
+    Stores a written file under its content address. Producers that hashed while writing
+    (streamed SVGs and images, transcoded variants) pass checksum and size, so the file is never
+    read back for them. The file is consumed (moved or uploaded, then removed) unless keep_source.
+    """
+    if checksum is None or size is None:
+        h = hashlib.sha256()
+        size = 0
+        with src.open("rb") as f:
+            while chunk := f.read(_READ_CHUNK):
+                h.update(chunk)
+                size += len(chunk)
+        checksum = h.hexdigest()
+    backend = get_backend()
+    key = blob_key(checksum)
+    if backend.size(key) is not None:
+        if not keep_source:
+            src.unlink(missing_ok=True)
+        return StoredBlob(backend.uri(key), checksum, size, True, _existing_encodings(backend, key, mime))
+    # Siblings first: once the blob itself exists, dedupe trusts its siblings to exist too.
+    encodings = precompress.write_variants(src, mime)
+    for enc in encodings:
+        backend.put_file(
+            key + precompress.SUFFIXES[enc],
+            precompress.variant_path(src, enc),
+            content_type=mime,
+            content_encoding=enc,
+        )
+    backend.put_file(key, src, content_type=mime, keep_source=keep_source)
+    return StoredBlob(backend.uri(key), checksum, size, False, encodings)
+
+
+class BlobWriter:
+    """File-like sink that hashes while it writes; commit() stores the bytes at their content address."""
+
+    def __init__(self, *, mime: str) -> None:
+        self.mime = mime
+        self._tmp = _staging_dir() / f"{uuid.uuid4().hex}.part"
+        self._f = self._tmp.open("wb")
+        self._hash = hashlib.sha256()
+        self._size = 0
+
+    def write(self, data: bytes) -> int:
+        self._hash.update(data)
+        self._size += len(data)
+        return self._f.write(data)
+
+    def commit(self) -> StoredBlob:
+        self._f.close()
+        return store_file(self._tmp, mime=self.mime, checksum=self._hash.hexdigest(), size=self._size)
+
+    def abort(self) -> None:
+        self._f.close()
+        self._tmp.unlink(missing_ok=True)
+
+    def __enter__(self) -> BlobWriter:
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            self.abort()
+
+
+def store_bytes(data: bytes, *, mime: str, checksum: str | None = None) -> StoredBlob:
+    checksum = checksum or hashlib.sha256(data).hexdigest()
+    backend = get_backend()
+    key = blob_key(checksum)
+    if backend.size(key) is not None:
+        return StoredBlob(backend.uri(key), checksum, len(data), True, _existing_encodings(backend, key, mime))
+    with BlobWriter(mime=mime) as w:
+        w.write(data)
+        return w.commit()
+
+
+def exists(stored: str) -> bool:
+    backend, key = resolve(stored)
+    return backend.size(key) is not None
@@ -29,10 +29,113 @@ class Settings(BaseSettings):
     gemini_text_model: str = "gemini-2.5-flash"
     gemini_image_model_preview: str = "gemini-3-pro-image-preview"
     gemini_image_model_final: str = "gemini-3-pro-image-preview"
+    gemini_spec_cache_enabled: bool = False  # reference the static spec prefix via cachedContents
+    gemini_spec_cache_ttl_seconds: int = 60 * 60
+    # Smallest prefix (tokens) the provider accepts in cachedContents: 1024 on 2.5 Flash, 4096 on 2.5 Pro
+    gemini_spec_cache_min_tokens: int = 1024
+    spec_streaming_enabled: bool = False
+    spec_stream_max_rooms: int = 64
+
+    # Spec model routing by request complexity, User.plan_tier and live per-model telemetry
+    spec_routing_enabled: bool = False
+    spec_routing_models_json: str = (
+        '[{"model": "gemini-2.5-flash-lite", "max_complexity": 5},'
+        ' {"model": "gemini-2.5-flash", "max_complexity": 10},'
+        ' {"model": "gemini-2.5-pro", "max_complexity": null}]'
+    )
+    spec_routing_tier_policy_json: str = (
+        '{"free": ["gemini-2.5-flash-lite", "gemini-2.5-flash"],'
+        ' "pro": ["gemini-2.5-flash-lite", "gemini-2.5-flash", "gemini-2.5-pro"]}'
+    )
+    spec_routing_min_samples: int = 5
+    spec_routing_max_error_rate: float = 0.3
+    spec_routing_max_p90_ms: int = 20_000
+
+    # Degraded mode: serve specs from local style templates while the live provider is unhealthy
+    degraded_mode_enabled: bool = False
+    degraded_window_seconds: int = 300
+    degraded_min_samples: int = 10
+    degraded_error_rate: float = 0.5
+    degraded_latency_p90_ms: int = 30_000
+    degraded_cooldown_seconds: int = 60
+
+    # Near-duplicate prompt reuse (per user + bedrooms/bathrooms/style)
+    prompt_dedupe_enabled: bool = False
+    prompt_dedupe_threshold: float = 0.85  # Jaccard similarity of normalized prompt tokens
+    prompt_index_max_entries: int = 50_000
+    prompt_index_warm_limit: int = 200
+
+    # Telemetry: USD per million tokens by model (input_per_mtok|output_per_mtok|image_per_mtok)
+    provider_price_table_json: str = (
+        '{"gemini-2.5-flash-lite": {"input_per_mtok": 0.10, "output_per_mtok": 0.40},'
+        ' "gemini-2.5-flash": {"input_per_mtok": 0.30, "output_per_mtok": 2.50},'
+        ' "gemini-2.5-pro": {"input_per_mtok": 1.25, "output_per_mtok": 10.00},'
+        ' "gemini-3-pro-image-preview": {"input_per_mtok": 2.00, "output_per_mtok": 120.00}}'
+    )
+    telemetry_window_seconds: int = 60 * 60
+    telemetry_max_samples: int = 2048
+
+    # Plan layout: packed (area-driven, every room placed) | legacy (fixed 52x34 outline)
+    plan_layout_strategy: str = "packed"
+    # Candidate search (packed only): score N seeded layouts in a process pool, keep the best
+    plan_candidates: int = 1
+    plan_candidate_budget_ms: int = 250
+    plan_candidate_workers: int = 2
+    # Geometric validation: below this coverage of the outline, or above this relative area drift, a plan is "warn"
+    plan_min_coverage: float = 0.9
+    plan_max_area_error: float = 0.1
+    # Plan builds (layout + validation + SVG) memoized by canonical spec hash; 0 disables
+    plan_memo_max_entries: int = 512
+    # reuse_spec regenerations with an edited spec re-slice only the changed zone of the parent plan,
+    # unless more than this share of the parent's rooms changed
+    plan_incremental_enabled: bool = False
+    plan_incremental_max_change: float = 0.34
+    # plan.svg renderer: legacy (inline attributes, built in memory) | compact (CSS classes, <use> door glyphs,
+    # streamed to the artifact file)
+    plan_svg_renderer: str = "legacy"
+    # On-demand renders (GET /jobs/{id}/plan.svg?px_per_ft=&theme=) cached by (canonical_hash, scale, theme)
+    plan_render_cache_max_entries: int = 256
+    plan_render_cache_max_bytes: int = 64 * 1024 * 1024
+    plan_render_max_age_seconds: int = 60 * 60
+    # Raster previews of plan.svg for list views (plan_thumbnail artifacts); width 0 disables.
+    # webp is written only when Pillow is installed.
+    plan_thumbnail_width: int = 320
+    plan_thumbnail_formats: str = "png,webp"
+    plan_thumbnail_webp_quality: int = 80
+    # Text artifacts (plan.svg, spec.json) get gzip/brotli siblings at write time; downloads serve them
+    # by Accept-Encoding. br needs the brotli package.
+    artifact_precompress_enabled: bool = True
+    artifact_precompress_min_bytes: int = 256
+    # Artifacts are stored once per content hash under <backend>/<ab>/<cd>/<sha256>
+    artifact_store_fanout_depth: int = 2
+    # "local" (var/blobs on a disk shared by API and worker) or "s3" (any S3-compatible endpoint)
+    artifact_storage_backend: str = "local"
+    artifact_s3_endpoint_url: str | None = None  # unset: https://s3.<region>.amazonaws.com
+    artifact_s3_presign_endpoint_url: str | None = None  # host clients use, if it differs from the API's
+    artifact_s3_bucket: str = "drafted-artifacts"
+    artifact_s3_region: str = "us-east-1"
+    artifact_s3_access_key_id: str | None = None
+    artifact_s3_secret_access_key: str | None = None
+    artifact_s3_prefix: str = "blobs"
+    artifact_s3_multipart_threshold_bytes: int = 8 * 1024 * 1024
+    artifact_s3_part_size_bytes: int = 8 * 1024 * 1024
+    artifact_s3_upload_concurrency: int = 4
+    # Downloads redirect to a presigned URL when the backend supports it (?redirect=false opts out)
+    artifact_presigned_downloads: bool = True
+    artifact_presigned_ttl_seconds: int = 300
 
     # Budget guards (basic)
     max_jobs_per_user_per_day: int = 50
     max_images_per_job: int = 2
+    image_concurrency_per_job: int = 2
+    image_concurrency_global: int = 4
+    # Downscaled exterior image variants (exterior_image_variant artifacts) for responsive clients;
+    # empty widths disables. Transcoded in a process pool shared by all jobs; needs Pillow.
+    image_variant_widths: str = "480,960,1600"
+    image_variant_formats: str = "webp,jpeg"
+    image_variant_quality: int = 80
+    image_transcode_workers: int = 1
+    image_transcode_timeout_seconds: float = 60.0
     job_max_retries: int = 2
     idempotency_window_seconds: int = 60 * 60 * 24
     transient_stub_enabled: bool = False
@@ -40,6 +143,12 @@ class Settings(BaseSettings):
     transient_stub_fail_every_n: int = 0
     transient_stub_http_code: int = 503
     transient_stub_scope: str = "spec"  # spec|image|both
+    # Fault injection at named points (provider.spec|provider.image|artifact.write|db.commit); see app/faults.py
+    fault_injection_enabled: bool = False
+    fault_injection_rules_json: str = "[]"
+    fault_injection_seed: int = 0
+    # Comma-separated emails of users allowed to view and change the rules at runtime; empty: nobody
+    fault_injection_operator_emails: str = ""
     run_inprocess_worker: bool = True
     worker_poll_interval_seconds: float = 1.0
     worker_heartbeat_ttl_seconds: int = 120
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
-from sqlalchemy import Engine, create_engine, text
+from sqlalchemy import Engine, create_engine, event, text
 from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
 
+from . import faults
 from .config import settings
 
 
@@ -17,6 +18,10 @@ def _connect_args_for(url: str) -> dict:
     return {}
 
 
+def _inject_commit_fault(_session: Session) -> None:
+    faults.injector.inject("db.commit")
+
+
 _engine: Engine | None = None
 _sessionmaker: sessionmaker | None = None
 
@@ -27,6 +32,7 @@ def get_engine() -> Engine:
         url = settings.resolved_database_url()
         _engine = create_engine(url, connect_args=_connect_args_for(url))
         _sessionmaker = sessionmaker(bind=_engine, autoflush=False, autocommit=False)
+        event.listen(_sessionmaker, "before_commit", _inject_commit_fault)
     return _engine
 
 
@@ -65,6 +71,7 @@ def init_db() -> None:
                 {
                     "parent_job_id": "VARCHAR(36)",
                     "want_exterior_image": "INTEGER NOT NULL DEFAULT 1",
+                    "exterior_views_json": "TEXT NOT NULL DEFAULT '[]'",
                     "idempotency_key": "VARCHAR(80)",
                     "request_hash": "VARCHAR(64)",
                     "priority": "VARCHAR(16) NOT NULL DEFAULT 'normal'",
@@ -0,0 +1,294 @@
+from __future__ import annotations
+
+import errno
+import fnmatch
+import json
+import os
+import random
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from threading import Lock
+from typing import Iterable, Iterator
+
+import httpx
+
+from .config import settings
+
+# Named injection points. Rules match them with shell-style globs, e.g. "provider.*".
+POINTS = ("provider.spec", "provider.image", "artifact.write", "db.commit")
+
+
+@dataclass
+class LatencyDistribution:
+    """Latency in milliseconds: fixed:<ms> | uniform:<lo>:<hi> | normal:<mean>:<sd> | lognormal:<mu>:<sigma>."""
+
+    kind: str = "fixed"
+    params: tuple[float, ...] = (0.0,)
+
+    @classmethod
+    def parse(cls, raw: str) -> "LatencyDistribution":
+        kind, *rest = raw.strip().split(":")
+        kind = kind.lower()
+        params = tuple(float(p) for p in rest)
+        arity = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2}
+        if kind not in arity or len(params) != arity[kind]:
+            raise ValueError(f"Invalid latency distribution: {raw!r}")
+        return cls(kind=kind, params=params)
+
+    def sample_ms(self, rng: random.Random) -> float:
+        if self.kind == "uniform":
+            return rng.uniform(*self.params)
+        if self.kind == "normal":
+            return max(0.0, rng.gauss(*self.params))
+        if self.kind == "lognormal":
+            return rng.lognormvariate(*self.params)
+        return self.params[0]
+
+
+def _parse_error(raw: str) -> str:
+    kind = raw.strip().lower()
+    if kind in {"timeout", "io"}:
+        return kind
+    if kind.startswith("http:") and kind[5:].isdigit():
+        return kind
+    raise ValueError(f"Invalid fault error: {raw!r} (timeout | io | http:<status>)")
+
+
+@dataclass
+class FaultRule:
+    """
+    One injection rule. When it fires it sleeps for a `latency` sample (a stall), then raises
+    `error` if set. A rule with `drip_bytes_per_s` instead throttles response bodies streamed
+    at the point.
+    """
+
+    point: str
+    latency: LatencyDistribution | None = None
+    error: str | None = None
+    drip_bytes_per_s: int | None = None
+    probability: float = 1.0
+    every_n: int | None = None  # fire on every Nth matching call only
+    max_hits: int | None = None
+    calls: int = 0
+    hits: int = 0
+
+    @classmethod
+    def from_dict(cls, raw: dict) -> "FaultRule":
+        if not isinstance(raw.get("point"), str) or not raw["point"]:
+            raise ValueError("Fault rule needs a point")
+        latency = raw.get("latency")
+        error = raw.get("error")
+        drip = raw.get("drip_bytes_per_s")
+        return cls(
+            point=raw["point"],
+            latency=LatencyDistribution.parse(latency) if latency else None,
+            error=_parse_error(error) if error else None,
+            drip_bytes_per_s=max(1, int(drip)) if drip else None,
+            probability=min(1.0, max(0.0, float(raw.get("probability", 1.0)))),
+            every_n=int(raw["every_n"]) if raw.get("every_n") else None,
+            max_hits=int(raw["max_hits"]) if raw.get("max_hits") else None,
+        )
+
+    def as_dict(self) -> dict:
+        return {
+            "point": self.point,
+            "latency": ":".join([self.latency.kind, *(f"{p:g}" for p in self.latency.params)]) if self.latency else None,
+            "error": self.error,
+            "drip_bytes_per_s": self.drip_bytes_per_s,
+            "probability": self.probability,
+            "every_n": self.every_n,
+            "max_hits": self.max_hits,
+            "calls": self.calls,
+            "hits": self.hits,
+        }
+
+    def _fires(self, rng: random.Random) -> bool:
+        self.calls += 1
+        if self.max_hits is not None and self.hits >= self.max_hits:
+            return False
+        if self.every_n and self.calls % self.every_n != 0:
+            return False
+        if self.probability < 1.0 and rng.random() >= self.probability:
+            return False
+        self.hits += 1
+        return True
+
+
+def _raise(point: str, error: str) -> None:
+    if error == "timeout":
+        raise httpx.ReadTimeout(f"Injected timeout at {point}")
+    if error == "io":
+        raise OSError(errno.EIO, f"Injected I/O error at {point}")
+    status = int(error.split(":", 1)[1])
+    request = httpx.Request("POST", f"https://fault-injection.local/{point}")
+    raise httpx.HTTPStatusError(
+        f"Injected HTTP {status} at {point}", request=request, response=httpx.Response(status, request=request)
+    )
+
+
+def parse_rules(raw: str) -> list[FaultRule]:
+    val = json.loads(raw or "[]")
+    if not isinstance(val, list):
+        raise ValueError("Fault rules must be a JSON list")
+    return [FaultRule.from_dict(item) for item in val]
+
+
+def shared_rules_path() -> Path:
+    return settings.var_dir / "fault_rules.json"
+
+
+def _read_shared(path: Path) -> dict | None:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or not isinstance(data.get("version"), int):
+        return None
+    return data
+
+
+class FaultInjector:
+    """
+    Process-wide fault rules. Loaded from settings on first use and replaceable at runtime:
+    `publish` writes them to a versioned file under var/ (like the worker heartbeat) and every
+    process (API and worker) switches to them once it sees a new version there. Sampling uses one
+    seeded RNG per process, so a run with the same seed and call order injects the same faults;
+    call and hit counters are per process.
+    """
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._rules: list[FaultRule] | None = None
+        self._rng = random.Random(0)
+        self.seed = 0
+        self.version: int | None = None  # shared rules version in effect, None for settings/local rules
+        # (inode, mtime_ns, size) of the shared file last checked; every publish replaces the inode.
+        self._seen: tuple[int, int, int] | None = None
+
+    def _stat_shared(self) -> tuple[int, int, int] | None:
+        try:
+            st = shared_rules_path().stat()
+        except OSError:
+            return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    def _sync_shared(self) -> None:
+        # One stat per call; the file is only parsed when it changed.
+        stamp = self._stat_shared()
+        if stamp is None or stamp == self._seen:
+            return
+        self._seen = stamp
+        data = _read_shared(shared_rules_path())
+        if data is None or data["version"] == self.version:
+            return
+        try:
+            rules = [FaultRule.from_dict(r) for r in data.get("rules") or []]
+        except (TypeError, ValueError):
+            return
+        self._apply(rules, int(data.get("seed") or 0))
+        self.version = data["version"]
+
+    def _apply(self, rules: list[FaultRule], seed: int) -> None:
+        self.seed = seed
+        self._rng = random.Random(seed)
+        self._rules = list(rules)
+
+    def _ensure_loaded(self) -> list[FaultRule]:
+        if self._rules is None:
+            self._apply(parse_rules(settings.fault_injection_rules_json), settings.fault_injection_seed)
+        self._sync_shared()
+        assert self._rules is not None
+        return self._rules
+
+    def configure(self, rules: list[FaultRule], *, seed: int | None = None) -> None:
+        """Replaces the rules in this process only (until the shared file changes)."""
+        with self._lock:
+            self._apply(rules, settings.fault_injection_seed if seed is None else seed)
+            self._seen = self._stat_shared()
+            data = _read_shared(shared_rules_path()) if self._seen else None
+            self.version = data["version"] if data else None
+
+    def publish(self, rules: list[FaultRule], *, seed: int | None = None) -> int:
+        """Replaces the rules in every process: writes the next version of the shared file. Returns it."""
+        seed = settings.fault_injection_seed if seed is None else seed
+        path = shared_rules_path()
+        with self._lock:
+            current = _read_shared(path)
+            version = (current["version"] if current else 0) + 1
+            payload = {
+                "version": version,
+                "seed": seed,
+                "rules": [{k: v for k, v in r.as_dict().items() if k not in {"calls", "hits"}} for r in rules],
+            }
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(payload), encoding="utf-8")
+            tmp.replace(path)
+            self._apply(rules, seed)
+            self.version = version
+            self._seen = self._stat_shared()
+        return version
+
+    def reset(self) -> None:
+        """Drops runtime rules; the next call reloads them from settings (and the shared file)."""
+        with self._lock:
+            self._rules = None
+            self.version = None
+            self._seen = None
+
+    def _fired(self, point: str, *, drip: bool) -> list[FaultRule]:
+        # Slow-drip rules only apply to body streams, stall/error rules only to the call itself.
+        with self._lock:
+            return [
+                r
+                for r in self._ensure_loaded()
+                if fnmatch.fnmatchcase(point, r.point)
+                and (r.drip_bytes_per_s is not None) == drip
+                and r._fires(self._rng)
+            ]
+
+    def inject(self, point: str) -> None:
+        """Applies stalls and errors of the rules firing at `point`; a no-op when disabled."""
+        if not settings.fault_injection_enabled:
+            return
+        fired = self._fired(point, drip=False)
+        delay_ms = 0.0
+        error = None
+        for rule in fired:
+            if rule.latency is not None:
+                with self._lock:
+                    delay_ms += rule.latency.sample_ms(self._rng)
+            error = error or rule.error
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000.0)
+        if error:
+            _raise(point, error)
+
+    def drip(self, point: str, chunks: Iterable[str]) -> Iterator[str]:
+        """Passes streamed text through, throttled to the slowest firing slow-drip rule."""
+        if not settings.fault_injection_enabled:
+            yield from chunks
+            return
+        rates = [r.drip_bytes_per_s for r in self._fired(point, drip=True)]
+        if not rates:
+            yield from chunks
+            return
+        rate = min(rates)
+        for chunk in chunks:
+            time.sleep(len(chunk) / rate)
+            yield chunk
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            rules = self._ensure_loaded() if settings.fault_injection_enabled else (self._rules or [])
+            return {
+                "enabled": settings.fault_injection_enabled,
+                "version": self.version,
+                "seed": self.seed,
+                "points": list(POINTS),
+                "rules": [r.as_dict() for r in rules],
+            }
+
+
+injector = FaultInjector()
@@ -0,0 +1,401 @@
+"""
+Offline bulk recompute of stored plans and plan SVGs after layout/render changes.
+
+    python -m app.jobs.recompute_plans --workers 4 --chunk-size 200 --max-per-second 50
+
+Succeeded jobs are streamed in job-id order in chunks, laid out again across a process pool and
+written back with one bulk upsert per chunk, in the same transaction as the jobs' plan warnings and
+validation reports. Each job is laid out the way the worker would with the current settings,
+including the multi-candidate search (every candidate, inline in the pool process, with no time
+budget). Jobs whose plan was an incremental re-slice of their parent's plan are skipped: that layout
+depends on the parent, not on the spec alone. A changed SVG (and its thumbnails) goes to a new blob
+in the content-addressed artifact store that the job's artifact is repointed to, so readers never
+see a half written file. Progress is checkpointed after every chunk; rerunning resumes after the
+last chunk.
+"""
+
+from __future__ import annotations
+
+import argparse
+import concurrent.futures as cf
+import datetime as dt
+import hashlib
+import json
+import os
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+
+from .. import artifact_store
+from ..config import settings
+from ..db import SessionLocal, init_db
+from ..models import Artifact, HouseSpec as HouseSpecRow, Job, PlanGraph as PlanGraphRow
+from ..plan.candidates import choose_layout, pool_context
+from ..plan.memo import PX_PER_FT, finish_build, svg_renderer
+from ..plan.render import render_plan_svg_compact
+from ..plan.thumbnail import Thumbnail, parse_formats, render_thumbnails
+from ..schemas import HouseSpec
+
+
+@dataclass
+class RecomputeOptions:
+    chunk_size: int = 200
+    workers: int = 2  # 0 recomputes inline, without a pool
+    max_per_second: float = 0.0  # 0 means unthrottled
+    limit: int | None = None  # stop after this many jobs (this run)
+    restart: bool = False
+    dry_run: bool = False
+    checkpoint: Path | None = None
+
+
+@dataclass
+class RecomputeStats:
+    scanned: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    failed: int = 0
+    skipped: int = 0  # incremental plans, left as they are
+    last_job_id: str = ""
+    errors: dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class _Result:
+    job_id: str
+    plan_json: str | None = None
+    canonical_hash: str | None = None
+    validation_result: str | None = None
+    validation_summary: dict | None = None
+    validation_issues: list[str] = field(default_factory=list)
+    plan_warnings: list[str] = field(default_factory=list)
+    candidate_report: dict | None = None
+    svg: str | None = None
+    thumbnails: list[Thumbnail] = field(default_factory=list)
+    error: str | None = None
+
+
+def _checkpoint_path(options: RecomputeOptions) -> Path:
+    return options.checkpoint or settings.var_dir / "recompute" / "plans_checkpoint.json"
+
+
+def _layout_key() -> str:
+    # A checkpoint only resumes a run made with the same layout settings.
+    return f"{settings.plan_layout_strategy.strip().lower()}:{settings.plan_candidates}:{PX_PER_FT:g}:{svg_renderer()}"
+
+
+def _load_checkpoint(path: Path) -> str:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return ""
+    if data.get("layout_key") != _layout_key():
+        return ""
+    return str(data.get("last_job_id") or "")
+
+
+def _save_checkpoint(path: Path, stats: RecomputeStats) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    payload = {"layout_key": _layout_key(), "updated_at": dt.datetime.now(dt.UTC).isoformat(), **asdict(stats)}
+    payload.pop("errors")
+    tmp.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    tmp.replace(path)
+
+
+def _init_pool_process(config: dict) -> None:
+    # Spawned processes load settings from the environment; adopt the parent's instead.
+    for name, value in config.items():
+        setattr(settings, name, value)
+    # Pool processes yield the CPU to the live worker and API.
+    if hasattr(os, "nice"):
+        try:
+            os.nice(10)
+        except OSError:
+            pass
+
+
+def _recompute_one(item: tuple[str, str]) -> _Result:
+    job_id, spec_json = item
+    try:
+        spec = HouseSpec.model_validate_json(spec_json)
+        # Candidate search inline: a pool inside each pool process would oversubscribe the CPU.
+        arrays, report = choose_layout(spec, inline=True)
+        build = finish_build(spec, arrays, candidate_report=report)
+        thumbs = []
+        if settings.plan_thumbnail_width > 0:
+            thumbs = render_thumbnails(
+                build.arrays,
+                width=settings.plan_thumbnail_width,
+                formats=parse_formats(settings.plan_thumbnail_formats),
+                px_per_ft=PX_PER_FT,
+                webp_quality=settings.plan_thumbnail_webp_quality,
+            )
+    except Exception as exc:
+        return _Result(job_id=job_id, error=f"{type(exc).__name__}: {exc}")
+    return _Result(
+        job_id=job_id,
+        plan_json=build.plan_json,
+        canonical_hash=build.canonical_hash,
+        validation_result=build.validation.result,
+        validation_summary=build.validation.summary(),
+        validation_issues=build.validation.issues,
+        plan_warnings=build.plan.warnings,
+        candidate_report=report,
+        svg=build.svg if build.svg is not None else render_plan_svg_compact(build.arrays, px_per_ft=PX_PER_FT),
+        thumbnails=thumbs,
+    )
+
+
+def _next_chunk(db: Session, after: str, size: int) -> list[tuple[str, str, bool]]:
+    """(job_id, spec json, incremental) for the next succeeded jobs after `after`."""
+    rows = db.execute(
+        select(HouseSpecRow.job_id, HouseSpecRow.json_text, Job.provider_meta_json)
+        .join(Job, Job.id == HouseSpecRow.job_id)
+        .where(Job.status == "succeeded", HouseSpecRow.job_id > after)
+        .order_by(HouseSpecRow.job_id)
+        .limit(size)
+    ).all()
+    return [(r[0], r[1], _is_incremental(r[2])) for r in rows]
+
+
+def _is_incremental(provider_meta_json: str | None) -> bool:
+    try:
+        meta = json.loads(provider_meta_json or "{}")
+    except ValueError:
+        return False
+    report = meta.get("plan_incremental") if isinstance(meta, dict) else None
+    return isinstance(report, dict) and report.get("mode") == "incremental"
+
+
+def _json_or(raw: str | None, default):
+    try:
+        val = json.loads(raw or "null")
+    except ValueError:
+        return default
+    return val if isinstance(val, type(default)) else default
+
+
+def _job_fields(job: tuple[str, str | None, str | None], old_plan_json: str | None, r: _Result) -> dict:
+    """
+    warnings_json and provider_meta_json for a recomputed job: the old plan's warnings (its layout
+    warnings and failed-validation issues, as the worker recorded them) are swapped for the new
+    plan's, and the plan validation/candidate reports are replaced. Other warnings are kept.
+    """
+    job_id, warnings_json, meta_json = job
+    old = set(_json_or(old_plan_json, {}).get("warnings") or [])
+    kept = [w for w in _json_or(warnings_json, []) if not str(w).startswith("plan_validation: ") and w not in old]
+    fresh = [f"plan_validation: {issue}" for issue in r.validation_issues] if r.validation_result == "fail" else []
+    meta = _json_or(meta_json, {})
+    meta["plan_validation"] = r.validation_summary
+    if r.candidate_report is not None:
+        meta["plan_candidates"] = r.candidate_report
+    else:
+        meta.pop("plan_candidates", None)
+    return {
+        "id": job_id,
+        "warnings_json": json.dumps(kept + fresh + r.plan_warnings),
+        "provider_meta_json": json.dumps(meta),
+    }
+
+
+def _upsert_plans(db: Session, rows: list[dict]) -> None:
+    if not rows:
+        return
+    dialect = db.get_bind().dialect.name
+    if dialect in {"sqlite", "postgresql"}:
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as upsert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as upsert
+        stmt = upsert(PlanGraphRow)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[PlanGraphRow.job_id],
+            set_={
+                "json_text": stmt.excluded.json_text,
+                "canonical_hash": stmt.excluded.canonical_hash,
+                "validation_result": stmt.excluded.validation_result,
+            },
+        )
+        db.execute(stmt, rows)
+        return
+    for row in rows:
+        db.merge(PlanGraphRow(**row))
+
+
+def _apply_chunk(db: Session, results: list[_Result], stats: RecomputeStats, *, dry_run: bool) -> None:
+    ok = [r for r in results if r.error is None]
+    for r in results:
+        if r.error is not None:
+            stats.failed += 1
+            stats.errors[r.job_id] = r.error
+    job_ids = [r.job_id for r in ok]
+    stored = {
+        row[0]: (row[1], row[2])
+        for row in db.execute(
+            select(PlanGraphRow.job_id, PlanGraphRow.canonical_hash, PlanGraphRow.json_text).where(
+                PlanGraphRow.job_id.in_(job_ids)
+            )
+        ).all()
+    }
+    jobs = {
+        row[0]: tuple(row)
+        for row in db.execute(
+            select(Job.id, Job.warnings_json, Job.provider_meta_json).where(Job.id.in_(job_ids))
+        ).all()
+    }
+    # Clients show a job's first artifact of a kind, so that is the row to repoint (newest first, oldest wins).
+    arts: dict[tuple[str, str, str], Artifact] = {
+        (a.job_id, a.type, a.mime_type): a
+        for a in db.execute(
+            select(Artifact)
+            .where(Artifact.job_id.in_(job_ids), Artifact.type.in_(["plan_svg", "plan_thumbnail"]))
+            .order_by(Artifact.created_at.desc())
+        ).scalars()
+    }
+
+    plan_rows: list[dict] = []
+    job_updates: list[dict] = []
+    art_updates: list[dict] = []
+    art_inserts: list[dict] = []
+    now = dt.datetime.now(dt.UTC)
+    for r in ok:
+        svg_bytes = r.svg.encode("utf-8")
+        svg_sha = hashlib.sha256(svg_bytes).hexdigest()
+        art = arts.get((r.job_id, "plan_svg", "image/svg+xml"))
+        old_hash, old_plan_json = stored.get(r.job_id, (None, None))
+        if old_hash == r.canonical_hash and art is not None and art.checksum_sha256 == svg_sha:
+            stats.unchanged += 1
+            continue
+        stats.updated += 1
+        if dry_run:
+            continue
+        # The job's warnings and validation report describe the plan, so they change with it.
+        job_updates.append(_job_fields(jobs[r.job_id], old_plan_json, r))
+        plan_rows.append(
+            {
+                "id": str(uuid.uuid4()),
+                "job_id": r.job_id,
+                "json_text": r.plan_json,
+                "canonical_hash": r.canonical_hash,
+                "validation_result": r.validation_result,
+                "created_at": now,
+            }
+        )
+        files = [("plan_svg", "image/svg+xml", "svg", svg_bytes, {"px_per_ft": PX_PER_FT, "renderer": svg_renderer()})]
+        files += [
+            ("plan_thumbnail", t.mime_type, t.format, t.data, {"format": t.format, "width": t.width, "height": t.height})
+            for t in r.thumbnails
+        ]
+        for typ, mime, ext, data, meta in files:
+            # Content-addressed, so a recompute never overwrites bytes another row still points at.
+            blob = artifact_store.store_bytes(data, mime=mime, checksum=svg_sha if data is svg_bytes else None)
+            meta = {**meta, "filename": f"{'plan' if typ == 'plan_svg' else 'plan-thumb'}.{ext}"}
+            if blob.encodings:
+                meta["encodings"] = blob.encodings
+            fields = {
+                "path": blob.uri,
+                "checksum_sha256": blob.checksum_sha256,
+                "size_bytes": blob.size_bytes,
+                "meta_json": json.dumps({**meta, "recomputed_at": now.isoformat()}),
+            }
+            prev = arts.get((r.job_id, typ, mime))
+            if prev is not None:
+                art_updates.append({"id": prev.id, **fields})
+            else:
+                art_inserts.append(
+                    {"id": str(uuid.uuid4()), "job_id": r.job_id, "type": typ, "mime_type": mime, "created_at": now, **fields}
+                )
+
+    _upsert_plans(db, plan_rows)
+    if job_updates:
+        db.execute(update(Job), job_updates)
+    if art_updates:
+        db.execute(update(Artifact), art_updates)
+    if art_inserts:
+        db.execute(insert(Artifact), art_inserts)
+
+
+def recompute_plans(options: RecomputeOptions) -> RecomputeStats:
+    """Runs (or resumes) a recompute pass; returns what it did in this run."""
+    checkpoint = _checkpoint_path(options)
+    stats = RecomputeStats(last_job_id="" if options.restart else _load_checkpoint(checkpoint))
+    pool = (
+        cf.ProcessPoolExecutor(
+            max_workers=options.workers,
+            mp_context=pool_context(),
+            initializer=_init_pool_process,
+            initargs=(settings.model_dump(),),
+        )
+        if options.workers > 0
+        else None
+    )
+    try:
+        while options.limit is None or stats.scanned < options.limit:
+            size = options.chunk_size
+            if options.limit is not None:
+                size = min(size, options.limit - stats.scanned)
+            t0 = time.monotonic()
+            with SessionLocal() as db:
+                chunk = _next_chunk(db, stats.last_job_id, size)
+                if not chunk:
+                    break
+                todo = [(job_id, spec_json) for job_id, spec_json, incremental in chunk if not incremental]
+                stats.skipped += len(chunk) - len(todo)
+                if pool is None:
+                    results = [_recompute_one(item) for item in todo]
+                else:
+                    results = list(pool.map(_recompute_one, todo, chunksize=max(1, len(todo) // (options.workers * 4))))
+                _apply_chunk(db, results, stats, dry_run=options.dry_run)
+                if not options.dry_run:
+                    db.commit()
+            stats.scanned += len(chunk)
+            stats.last_job_id = chunk[-1][0]
+            if not options.dry_run:
+                _save_checkpoint(checkpoint, stats)
+            if options.max_per_second > 0:
+                time.sleep(max(0.0, len(chunk) / options.max_per_second - (time.monotonic() - t0)))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return stats
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(
+        description="Recompute stored plans and plan SVGs for succeeded jobs.",
+        epilog=(
+            "Plans are laid out as the worker would with the current settings; with PLAN_CANDIDATES > 1 every "
+            "candidate is scored (inline, no time budget). Jobs whose plan was built incrementally from "
+            "their parent's plan are skipped and counted as 'skipped'."
+        ),
+    )
+    ap.add_argument("--chunk-size", type=int, default=200)
+    ap.add_argument("--workers", type=int, default=2, help="pool processes; 0 runs inline")
+    ap.add_argument("--max-per-second", type=float, default=0.0, help="jobs per second; 0 = unthrottled")
+    ap.add_argument("--limit", type=int, default=None, help="stop after this many jobs")
+    ap.add_argument("--restart", action="store_true", help="ignore the checkpoint and start from the first job")
+    ap.add_argument("--dry-run", action="store_true", help="count changes without writing anything")
+    ap.add_argument("--checkpoint", type=Path, default=None)
+    args = ap.parse_args()
+
+    init_db()
+    stats = recompute_plans(
+        RecomputeOptions(
+            chunk_size=max(1, args.chunk_size),
+            workers=max(0, args.workers),
+            max_per_second=max(0.0, args.max_per_second),
+            limit=args.limit,
+            restart=args.restart,
+            dry_run=args.dry_run,
+            checkpoint=args.checkpoint,
+        )
+    )
+    print(json.dumps(asdict(stats), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import hashlib
+import random
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+
+from ..config import settings
+from ..telemetry import RollingHistogram
+
+# Scope: (tenant/user id, bedrooms, bathrooms, style). Specs are only ever shared within a scope.
+Scope = tuple[str, int, int, str]
+
+_NUM_PERM = 64
+_BANDS = 16
+_ROWS = _NUM_PERM // _BANDS
+_MERSENNE = (1 << 61) - 1
+_rng = random.Random(0x5EED)
+_PERMS = [(_rng.randrange(1, _MERSENNE), _rng.randrange(0, _MERSENNE)) for _ in range(_NUM_PERM)]
+
+_TOKEN = re.compile(r"[a-z]+|\d+")
+_STOPWORDS = {"a", "an", "and", "the", "with", "of", "for", "in", "w", "to", "style", "home", "house", "plan"}
+_SYNONYMS = {
+    "br": "bed",
+    "bd": "bed",
+    "bdr": "bed",
+    "beds": "bed",
+    "bedroom": "bed",
+    "bedrooms": "bed",
+    "ba": "bath",
+    "bth": "bath",
+    "baths": "bath",
+    "bathroom": "bath",
+    "bathrooms": "bath",
+    "big": "large",
+    "huge": "large",
+    "spacious": "large",
+    "oversized": "large",
+    "small": "compact",
+    "tiny": "compact",
+    "midcentury": "mid",
+    "century": "mid",
+}
+
+LOOKUP_BUCKETS_US = (10, 25, 50, 100, 250, 500, 1000, 5000)
+
+
+def prompt_tokens(prompt: str) -> frozenset[str]:
+    """Normalized token shingles: case-folded, synonyms collapsed, stopwords dropped, order ignored."""
+    out = set()
+    for tok in _TOKEN.findall(prompt.lower()):
+        tok = _SYNONYMS.get(tok, tok)
+        if tok not in _STOPWORDS:
+            out.add(tok)
+    return frozenset(out)
+
+
+def _token_hash(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def minhash(tokens: frozenset[str]) -> tuple[int, ...]:
+    hashes = [_token_hash(t) for t in tokens] or [0]
+    return tuple(min((a * h + b) % _MERSENNE for h in hashes) for a, b in _PERMS)
+
+
+def jaccard(a: frozenset[str], b: frozenset[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+@dataclass
+class PromptMatch:
+    job_id: str
+    similarity: float
+
+
+@dataclass
+class _Entry:
+    scope: Scope
+    job_id: str
+    tokens: frozenset[str]
+    band_keys: tuple[tuple[int, tuple[int, ...]], ...]
+
+
+class PromptIndex:
+    """
+    Bounded in-memory MinHash/LSH index over past prompts.
+
+    Candidates come from LSH band collisions within the same scope and are verified with exact
+    Jaccard similarity on the token sets. Least recently used entries are evicted past `max_entries`.
+    """
+
+    def __init__(self, *, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._lock = Lock()
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._bands: dict[Scope, dict[tuple[int, tuple[int, ...]], set[str]]] = {}
+        self._warmed: OrderedDict[Scope, None] = OrderedDict()
+        self._lookup_us = RollingHistogram(
+            LOOKUP_BUCKETS_US, window_s=float(settings.telemetry_window_seconds), max_samples=1024
+        )
+        self.lookups = 0
+        self.hits = 0
+        self.evictions = 0
+
+    def is_warm(self, scope: Scope) -> bool:
+        with self._lock:
+            return scope in self._warmed
+
+    def mark_warm(self, scope: Scope) -> None:
+        with self._lock:
+            self._warmed[scope] = None
+            self._warmed.move_to_end(scope)
+            while len(self._warmed) > self.max_entries:
+                self._warmed.popitem(last=False)
+
+    def add(self, scope: Scope, job_id: str, prompt: str) -> None:
+        tokens = prompt_tokens(prompt)
+        sig = minhash(tokens)
+        band_keys = tuple((i, sig[i * _ROWS : (i + 1) * _ROWS]) for i in range(_BANDS))
+        with self._lock:
+            if job_id in self._entries:
+                self._entries.move_to_end(job_id)
+                return
+            self._entries[job_id] = _Entry(scope=scope, job_id=job_id, tokens=tokens, band_keys=band_keys)
+            buckets = self._bands.setdefault(scope, {})
+            for key in band_keys:
+                buckets.setdefault(key, set()).add(job_id)
+            while len(self._entries) > self.max_entries:
+                self._evict_oldest()
+
+    def _evict_oldest(self) -> None:
+        _, entry = self._entries.popitem(last=False)
+        buckets = self._bands.get(entry.scope, {})
+        for key in entry.band_keys:
+            ids = buckets.get(key)
+            if ids is not None:
+                ids.discard(entry.job_id)
+                if not ids:
+                    del buckets[key]
+        if not buckets:
+            self._bands.pop(entry.scope, None)
+        self.evictions += 1
+
+    def lookup(self, scope: Scope, prompt: str, *, threshold: float) -> PromptMatch | None:
+        t0 = time.perf_counter()
+        tokens = prompt_tokens(prompt)
+        sig = minhash(tokens)
+        best: PromptMatch | None = None
+        with self._lock:
+            self.lookups += 1
+            buckets = self._bands.get(scope, {})
+            candidates: set[str] = set()
+            for i in range(_BANDS):
+                candidates |= buckets.get((i, sig[i * _ROWS : (i + 1) * _ROWS]), set())
+            for job_id in candidates:
+                entry = self._entries[job_id]
+                score = jaccard(tokens, entry.tokens)
+                if score >= threshold and (best is None or score > best.similarity):
+                    best = PromptMatch(job_id=job_id, similarity=score)
+            if best is not None:
+                self.hits += 1
+                self._entries.move_to_end(best.job_id)
+            self._lookup_us.add((time.perf_counter() - t0) * 1_000_000)
+        return best
+
+    def discard(self, job_id: str) -> None:
+        with self._lock:
+            if job_id not in self._entries:
+                return
+            self._entries.move_to_end(job_id, last=False)
+            self._evict_oldest()
+            self.evictions -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "scopes": len(self._bands),
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "evictions": self.evictions,
+                "lookup_us": self._lookup_us.snapshot(),
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bands.clear()
+            self._warmed.clear()
+            self.lookups = self.hits = self.evictions = 0
+
+
+index = PromptIndex(max_entries=settings.prompt_index_max_entries)
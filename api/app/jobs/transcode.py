@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import atexit
+import concurrent.futures as cf
+import hashlib
+from dataclasses import dataclass
+from pathlib import Path
+from threading import Lock
+
+from ..config import settings
+from ..plan.candidates import pool_context
+
+try:  # transcoding needs Pillow; without it only the original image is stored
+    from PIL import Image
+except ImportError:  # pragma: no cover - depends on the environment
+    Image = None
+
+_FORMATS = {"webp": ("WEBP", "image/webp", "webp"), "jpeg": ("JPEG", "image/jpeg", "jpg")}
+
+
+@dataclass(frozen=True)
+class ImageVariant:
+    path: Path
+    mime_type: str
+    format: str
+    width: int
+    height: int
+    checksum_sha256: str
+    size_bytes: int
+
+
+def available() -> bool:
+    return Image is not None
+
+
+def parse_widths(raw: str) -> list[int]:
+    return sorted({int(p) for p in raw.split(",") if p.strip().isdigit() and int(p) > 0}, reverse=True)
+
+
+def parse_formats(raw: str) -> list[str]:
+    return [f for f in dict.fromkeys(p.strip().lower() for p in raw.split(",")) if f in _FORMATS]
+
+
+def transcode_image(src: Path, *, widths: list[int], formats: list[str], quality: int = 80) -> list[ImageVariant]:
+    """
+    Downscaled variants of `src` next to it (exterior-960w.webp, ...), widest first. Widths at or
+    above the original are skipped: the original is the largest size. Each width is resized from the
+    previous one rather than the full image, which keeps a multi-MB source from being resampled
+    once per width.
+    """
+    if Image is None:
+        return []
+    out: list[ImageVariant] = []
+    with Image.open(src) as img:
+        widest = max(widths, default=img.width)
+        # JPEG sources decode straight at a reduced scale (no-op for PNG/WebP).
+        img.draft("RGB", (widest, max(1, round(img.height * widest / img.width))))
+        current = img.convert("RGB")
+    for width in sorted(widths, reverse=True):
+        if width >= current.width:
+            continue
+        height = max(1, round(current.height * width / current.width))
+        current = current.resize((width, height), Image.LANCZOS, reducing_gap=3.0)
+        for fmt in formats:
+            pil_format, mime, ext = _FORMATS[fmt]
+            dest = src.with_name(f"{src.stem}-{width}w.{ext}")
+            tmp = dest.with_name(dest.name + ".tmp")
+            if fmt == "webp":
+                current.save(tmp, pil_format, quality=quality, method=4)
+            else:
+                current.save(tmp, pil_format, quality=quality, optimize=True, progressive=True)
+            data = tmp.read_bytes()
+            tmp.replace(dest)
+            out.append(
+                ImageVariant(
+                    path=dest,
+                    mime_type=mime,
+                    format=fmt,
+                    width=width,
+                    height=height,
+                    checksum_sha256=hashlib.sha256(data).hexdigest(),
+                    size_bytes=len(data),
+                )
+            )
+    return out
+
+
+_pool_lock = Lock()
+_pool: cf.ProcessPoolExecutor | None = None
+
+
+def _get_pool() -> cf.ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = cf.ProcessPoolExecutor(
+                max_workers=max(1, settings.image_transcode_workers), mp_context=pool_context()
+            )
+        return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+atexit.register(shutdown_pool)
+
+
+def submit(src: Path) -> cf.Future[list[ImageVariant]] | None:
+    """
+    Queues `src` on the shared transcode pool with the configured widths and formats. None when
+    variants are disabled or Pillow is missing. The pool is process-wide and sized by
+    `image_transcode_workers`, so concurrent jobs queue behind it instead of oversubscribing CPUs.
+    """
+    widths = parse_widths(settings.image_variant_widths)
+    formats = parse_formats(settings.image_variant_formats)
+    if not available() or not widths or not formats:
+        return None
+    return _get_pool().submit(
+        transcode_image, src, widths=widths, formats=formats, quality=settings.image_variant_quality
+    )
@@ -1,16 +1,20 @@
 from __future__ import annotations
 
 import datetime as dt
-import hashlib
 import json
+import os
+import shutil
 import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from pathlib import Path
+from typing import Iterator
 
 import httpx
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from .. import artifact_store, faults, telemetry
 from ..config import settings
 from ..db import SessionLocal
 from ..models import (
@@ -20,12 +24,23 @@ from ..models import (
     PlanGraph as PlanGraphRow,
     Session as SessionRow,
     UsageEvent,
+    User,
+)
+from . import similarity, transcode
+from ..plan import candidates, incremental, memo, render, thumbnail
+from ..plan.arrays import PlanArrays
+from ..providers import health, routing
+from ..providers.base import (
+    DEFAULT_EXTERIOR_VIEW,
+    EXTERIOR_VIEWS,
+    Provider,
+    ProviderImageFile,
+    ProviderSpecResult,
 )
-from ..plan.geometry import generate_plan_graph
-from ..plan.render import render_plan_svg
 from ..providers.gemini import GeminiProvider
 from ..providers.mock import MockProvider
-from ..schemas import HouseSpec as HouseSpecSchema
+from ..providers.templates import adjust_room_counts, build_template_spec
+from ..schemas import HouseSpec as HouseSpecSchema, HouseSpecRoom, PlanGraph as PlanGraphSchema
 
 
 def _provider():
@@ -35,6 +50,7 @@ def _provider():
 
 
 def _job_art_dir(job_id: str) -> Path:
+    # Scratch for streamed files (images, compact SVGs) until they move into the artifact store.
     d = settings.var_dir / "artifacts" / job_id
     d.mkdir(parents=True, exist_ok=True)
     return d
@@ -48,6 +64,21 @@ def _now() -> dt.datetime:
     return dt.datetime.now(dt.UTC)
 
 
+def _stats_snapshot() -> dict:
+    """
+    This process's in-memory provider telemetry, prompt index, plan memo and breaker state. The
+    API runs in another process (unless the worker is in-process), so it reads these from the
+    heartbeat and merges them into /system/telemetry and /system/health.
+    """
+    return {
+        "pid": os.getpid(),
+        "providers": telemetry.registry.snapshot(),
+        "prompt_index": similarity.index.stats(),
+        "plan_memo": memo.memo.stats(),
+        "provider_health": health.tracker.snapshot(),
+    }
+
+
 def _write_worker_heartbeat(
     *,
     state: str,
@@ -65,6 +96,7 @@ def _write_worker_heartbeat(
         payload["retry_count"] = retry_count
     if error:
         payload["error"] = error
+    payload["stats"] = _stats_snapshot()
 
     p = _heartbeat_path()
     tmp = p.with_suffix(".tmp")
@@ -139,28 +171,190 @@ def _validate_spec(job: Job, spec: HouseSpecSchema) -> None:
             raise ValueError(f"Room {r.name} has non-positive area")
 
 
-def _artifact_meta(path: Path) -> tuple[str, int]:
-    b = path.read_bytes()
-    return hashlib.sha256(b).hexdigest(), len(b)
+def _validate_partial_room(room: HouseSpecRoom, seen_ids: set[str]) -> None:
+    # Checks that can be made on a single streamed room; the full spec is still validated at the end.
+    if room.area_ft2 <= 0:
+        raise ValueError(f"Room {room.name} has non-positive area")
+    if room.id in seen_ids:
+        raise ValueError(f"Spec repeats room id {room.id}")
+    if len(seen_ids) >= settings.spec_stream_max_rooms:
+        raise ValueError(f"Spec exceeds {settings.spec_stream_max_rooms} rooms")
 
 
-def _add_artifact(db: Session, *, job_id: str, typ: str, path: Path, mime: str, meta: dict) -> None:
-    if not path.exists():
-        raise RuntimeError(f"artifact_missing:{path}")
-    checksum, size = _artifact_meta(path)
-    db.add(
-        Artifact(
-            job_id=job_id,
-            type=typ,
-            path=str(path),
-            mime_type=mime,
-            checksum_sha256=checksum,
-            size_bytes=size,
-            meta_json=json.dumps(meta),
+def _set_provider_meta_field(job: Job, key: str, value: object) -> None:
+    cur = _json_obj(job.provider_meta_json)
+    cur[key] = value
+    job.provider_meta_json = json.dumps(cur)
+
+
+def _set_spec_progress(job: Job, rooms_received: int) -> None:
+    _set_provider_meta_field(
+        job, "spec_progress", {"rooms_received": rooms_received, "updated_at": _now().isoformat()}
+    )
+    job.updated_at = _now()
+
+
+def _generate_spec(db: Session, job: Job, provider, model: str | None = None) -> ProviderSpecResult:
+    # Only a routed GeminiProvider accepts a model override; other providers keep their signature.
+    extra = {"model": model} if model else {}
+    try:
+        return _call_spec_provider(db, job, provider, extra)
+    except Exception:
+        if model:
+            telemetry.registry.record_error(model=model, event_type="house_spec")
+        raise
+
+
+def _call_spec_provider(db: Session, job: Job, provider, extra: dict) -> ProviderSpecResult:
+    faults.injector.inject("provider.spec")
+    if not settings.spec_streaming_enabled or not isinstance(provider, Provider):
+        return provider.generate_house_spec(
+            prompt=job.prompt, bedrooms=job.bedrooms, bathrooms=job.bathrooms, style=job.style, **extra
         )
+
+    seen_ids: set[str] = set()
+
+    def _on_room(room: HouseSpecRoom) -> None:
+        _validate_partial_room(room, seen_ids)
+        seen_ids.add(room.id)
+        _set_spec_progress(job, len(seen_ids))
+        db.commit()
+
+    return provider.stream_house_spec(
+        prompt=job.prompt,
+        bedrooms=job.bedrooms,
+        bathrooms=job.bathrooms,
+        style=job.style,
+        on_room=_on_room,
+        **extra,
     )
 
 
+def _route_spec_model(db: Session, job: Job, provider, user_id: str | None) -> str | None:
+    if not settings.spec_routing_enabled or not isinstance(provider, GeminiProvider):
+        return None
+    user = db.get(User, user_id) if user_id else None
+    decision = routing.route_spec_model(
+        prompt=job.prompt,
+        bedrooms=job.bedrooms,
+        bathrooms=job.bathrooms,
+        plan_tier=user.plan_tier if user else None,
+    )
+    _set_provider_meta_field(job, "routing", decision.as_meta())
+    return decision.model
+
+
+def _generate_spec_tracked(
+    db: Session, job: Job, provider, model: str | None = None
+) -> ProviderSpecResult | str:
+    """
+    Live spec call with provider health tracking. Returns the degraded-mode reason instead of a
+    result when the provider is (or just became) unhealthy, so the job can be served locally.
+    """
+    if not settings.degraded_mode_enabled or isinstance(provider, MockProvider):
+        return _generate_spec(db, job, provider, model)
+    reason = health.tracker.check()
+    if reason is not None:
+        return reason
+    t0 = time.perf_counter()
+    try:
+        result = _generate_spec(db, job, provider, model)
+    except Exception as e:
+        code, _ = _classify_failure(e)
+        if code != "provider_transient":
+            raise
+        health.tracker.record(ok=False, latency_ms=int((time.perf_counter() - t0) * 1000))
+        reason = health.tracker.check()
+        if reason is None:
+            raise
+        return reason
+    health.tracker.record(ok=True, latency_ms=result.meta.latency_ms)
+    return result
+
+
+def _degraded_spec(job: Job, reason: str) -> HouseSpecSchema:
+    _append_provider_meta(
+        job,
+        {"provider": "local_template", "model": "template", "request_id": None, "degraded": True},
+    )
+    _set_provider_meta_field(
+        job, "degraded_mode", {"reason": reason, "upgrade_pending": True, "at": _now().isoformat()}
+    )
+    return build_template_spec(
+        prompt=job.prompt,
+        bedrooms=job.bedrooms,
+        bathrooms=job.bathrooms,
+        style=job.style,
+        notes=["Degraded mode: generated from a local style template while the provider was unhealthy."],
+    )
+
+
+def _add_artifact(
+    db: Session,
+    *,
+    job_id: str,
+    typ: str,
+    mime: str,
+    meta: dict,
+    path: Path | None = None,
+    data: bytes | None = None,
+    filename: str | None = None,
+    checksum: str | None = None,
+    size: int | None = None,
+    keep_source: bool = False,
+) -> Artifact:
+    """
+    Stores the artifact's bytes in the content-addressed store and records the row. Pass `data`
+    for in-memory bytes, or `path` for a scratch file (moved into the store unless keep_source)
+    with the checksum and size its producer computed while writing it. Identical bytes share a blob.
+    """
+    faults.injector.inject("artifact.write")
+    if data is not None:
+        blob = artifact_store.store_bytes(data, mime=mime)
+    else:
+        if path is None or not path.exists():
+            raise RuntimeError(f"artifact_missing:{path}")
+        blob = artifact_store.store_file(path, mime=mime, checksum=checksum, size=size, keep_source=keep_source)
+    meta = {**meta, "filename": filename or path.name}
+    if blob.encodings:
+        # Precompressed siblings so downloads never compress per request.
+        meta["encodings"] = blob.encodings
+    art = Artifact(
+        job_id=job_id,
+        type=typ,
+        path=blob.uri,
+        mime_type=mime,
+        checksum_sha256=blob.checksum_sha256,
+        size_bytes=blob.size_bytes,
+        meta_json=json.dumps(meta),
+    )
+    db.add(art)
+    return art
+
+
+def _add_plan_thumbnails(db: Session, job_id: str, arrays: PlanArrays) -> None:
+    """plan_thumbnail artifacts (one per configured format) so list views need not fetch plan.svg."""
+    if settings.plan_thumbnail_width <= 0:
+        return
+    thumbs = thumbnail.render_thumbnails(
+        arrays,
+        width=settings.plan_thumbnail_width,
+        formats=thumbnail.parse_formats(settings.plan_thumbnail_formats),
+        px_per_ft=memo.PX_PER_FT,
+        webp_quality=settings.plan_thumbnail_webp_quality,
+    )
+    for thumb in thumbs:
+        _add_artifact(
+            db,
+            job_id=job_id,
+            typ="plan_thumbnail",
+            data=thumb.data,
+            filename=f"plan-thumb.{thumb.format}",
+            mime=thumb.mime_type,
+            meta={"format": thumb.format, "width": thumb.width, "height": thumb.height},
+        )
+
+
 def _log_usage(
     db: Session,
     *,
@@ -170,6 +364,22 @@ def _log_usage(
     meta: dict,
     retryable: bool = False,
 ) -> None:
+    cost = telemetry.cost_microusd(
+        meta.get("model"),
+        input_tokens=meta.get("input_tokens"),
+        output_tokens=meta.get("output_tokens"),
+        image_tokens=meta.get("image_tokens"),
+    )
+    tokens = meta.get("total_tokens")
+    if tokens is None and (meta.get("input_tokens") is not None or meta.get("output_tokens") is not None):
+        tokens = (meta.get("input_tokens") or 0) + (meta.get("output_tokens") or 0)
+    telemetry.registry.record(
+        model=meta.get("model"),
+        event_type=event_type,
+        latency_ms=meta.get("latency_ms"),
+        tokens=tokens,
+        cost_microusd=cost,
+    )
     db.add(
         UsageEvent(
             user_id=user_id,
@@ -180,6 +390,7 @@ def _log_usage(
             output_tokens=meta.get("output_tokens"),
             image_tokens=meta.get("image_tokens"),
             latency_ms=meta.get("latency_ms"),
+            cost_microusd=cost,
             provider_request_id=meta.get("request_id"),
             retryable=1 if retryable else 0,
             meta_json=json.dumps(meta),
@@ -187,6 +398,103 @@ def _log_usage(
     )
 
 
+def _write_exterior_image(
+    provider, *, prompt: str, style: str, art_dir: Path, view: str
+) -> ProviderImageFile | None:
+    stem = "exterior" if view == DEFAULT_EXTERIOR_VIEW else f"exterior_{view}"
+    part_path = art_dir / f"{stem}.part"
+    faults.injector.inject("provider.image")
+    if isinstance(provider, Provider):
+        img = provider.write_exterior_image(prompt=prompt, style=style, dest=part_path, view=view)
+    else:
+        # Duck-typed providers only implement maybe_generate_exterior_image; reuse the buffered default.
+        img = Provider.write_exterior_image(provider, prompt=prompt, style=style, dest=part_path, view=view)
+    if img is None:
+        return None
+    ext = "png" if img.mime_type.endswith("png") else "jpg"
+    img.path = img.path.replace(art_dir / f"{stem}.{ext}")
+    return img
+
+
+_image_slots_lock = threading.Lock()
+_image_slots: tuple[int, threading.BoundedSemaphore] | None = None
+
+
+def _global_image_slots() -> threading.BoundedSemaphore:
+    """Process-wide cap on in-flight image calls, shared by every job this worker process runs."""
+    global _image_slots
+    limit = max(1, settings.image_concurrency_global)
+    with _image_slots_lock:
+        if _image_slots is None or _image_slots[0] != limit:
+            _image_slots = (limit, threading.BoundedSemaphore(limit))
+        return _image_slots[1]
+
+
+def _exterior_views(job: Job) -> list[str]:
+    if not job.want_exterior_image:
+        return []
+    views = [v for v in _json_arr(job.exterior_views_json) if v in EXTERIOR_VIEWS]
+    return (views or [DEFAULT_EXTERIOR_VIEW])[: max(1, settings.max_images_per_job)]
+
+
+def _generate_exterior_images(
+    provider, job: Job, art_dir: Path, views: list[str]
+) -> Iterator[tuple[str, ProviderImageFile | None | Exception]]:
+    """Runs the per-view image calls concurrently and yields each outcome as soon as it completes."""
+    slots = _global_image_slots()
+    # Read ORM attributes here; the pool threads must not touch the session.
+    prompt, style = job.prompt, job.style
+
+    def _one(view: str) -> ProviderImageFile | None:
+        with slots:
+            return _write_exterior_image(provider, prompt=prompt, style=style, art_dir=art_dir, view=view)
+
+    workers = min(len(views), max(1, settings.image_concurrency_per_job))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="exterior-image") as pool:
+        futures = {pool.submit(_one, view): view for view in views}
+        for fut in as_completed(futures):
+            try:
+                yield futures[fut], fut.result()
+            except Exception as e:
+                yield futures[fut], e
+
+
+def _add_image_variants(db: Session, job: Job, transcoding: list[tuple[str, Future]]) -> list[str]:
+    """
+    Records the downscaled variants of each exterior image and returns warnings for the views whose
+    transcode failed or timed out. That only costs the view its variants (the original is already
+    stored), never the job.
+    """
+    if not transcoding:
+        if transcode.parse_widths(settings.image_variant_widths) and not transcode.available():
+            _set_provider_meta_field(job, "image_variants", {"skipped": "pillow_not_installed"})
+        return []
+    deadline = time.monotonic() + settings.image_transcode_timeout_seconds
+    produced = 0
+    failed: dict[str, str] = {}
+    for view, fut in transcoding:
+        try:
+            variants = fut.result(timeout=max(0.0, deadline - time.monotonic()))
+        except Exception as e:
+            fut.cancel()
+            failed[view] = type(e).__name__
+            continue
+        for v in variants:
+            _add_artifact(
+                db,
+                job_id=job.id,
+                typ="exterior_image_variant",
+                path=v.path,
+                mime=v.mime_type,
+                meta={"view": view, "format": v.format, "width": v.width, "height": v.height},
+                checksum=v.checksum_sha256,
+                size=v.size_bytes,
+            )
+            produced += 1
+    _set_provider_meta_field(job, "image_variants", {"produced": produced, "failed": failed})
+    return [f"exterior image '{view}' variants failed ({reason}); the original was kept." for view, reason in failed.items()]
+
+
 def _reuse_parent_spec_if_requested(db: Session, job: Job) -> HouseSpecSchema | None:
     meta = _json_obj(job.provider_meta_json)
     if not meta.get("reuse_spec"):
@@ -197,7 +505,86 @@ def _reuse_parent_spec_if_requested(db: Session, job: Job) -> HouseSpecSchema |
     if not parent:
         return None
     raw = json.loads(parent.json_text)
-    return HouseSpecSchema.model_validate(raw)
+    spec = HouseSpecSchema.model_validate(raw)
+    parent_job = db.get(Job, job.parent_job_id)
+    if parent_job is not None and (parent_job.bedrooms, parent_job.bathrooms) != (job.bedrooms, job.bathrooms):
+        # Regenerated with new counts: edit the reused spec rather than failing validation on it.
+        spec = adjust_room_counts(
+            spec,
+            bedrooms_delta=job.bedrooms - parent_job.bedrooms,
+            bathrooms_delta=job.bathrooms - parent_job.bathrooms,
+        )
+    return spec
+
+
+def _incremental_plan(db: Session, job: Job, spec: HouseSpecSchema) -> memo.PlanBuild | None:
+    """Re-slices the parent's plan for an edited reuse_spec spec; None means use the full layout."""
+    if not settings.plan_incremental_enabled or not job.parent_job_id:
+        return None
+    if not _json_obj(job.provider_meta_json).get("reuse_spec"):
+        return None
+    parent_spec = db.execute(select(HouseSpecRow).where(HouseSpecRow.job_id == job.parent_job_id)).scalars().first()
+    parent_plan = db.execute(select(PlanGraphRow).where(PlanGraphRow.job_id == job.parent_job_id)).scalars().first()
+    if parent_spec is None or parent_plan is None:
+        return None
+    arrays, report = incremental.relayout(
+        HouseSpecSchema.model_validate_json(parent_spec.json_text),
+        PlanArrays.from_graph(PlanGraphSchema.model_validate_json(parent_plan.json_text)),
+        spec,
+    )
+    build = memo.finish_build(spec, arrays) if arrays is not None else None
+    if build is not None and build.validation.result == "fail":
+        report.update({"mode": "full", "reason": "validation_failed"})
+        build = None
+    _set_provider_meta_field(job, "plan_incremental", report)
+    return build
+
+
+def _prompt_scope(job: Job, user_id: str) -> similarity.Scope:
+    return (user_id, job.bedrooms, job.bathrooms, job.style)
+
+
+def _warm_prompt_index(db: Session, scope: similarity.Scope) -> None:
+    # First lookup in a scope loads its recent successful prompts from the DB.
+    if similarity.index.is_warm(scope):
+        return
+    user_id, bedrooms, bathrooms, style = scope
+    rows = db.execute(
+        select(Job.id, Job.prompt)
+        .join(SessionRow, Job.session_id == SessionRow.id)
+        .join(HouseSpecRow, HouseSpecRow.job_id == Job.id)
+        .where(
+            SessionRow.user_id == user_id,
+            Job.bedrooms == bedrooms,
+            Job.bathrooms == bathrooms,
+            Job.style == style,
+            Job.status == "succeeded",
+        )
+        .order_by(Job.created_at.desc())
+        .limit(settings.prompt_index_warm_limit)
+    ).all()
+    for job_id, prompt in reversed(rows):
+        similarity.index.add(scope, job_id, prompt)
+    similarity.index.mark_warm(scope)
+
+
+def _reuse_similar_spec(
+    db: Session, job: Job, user_id: str | None
+) -> tuple[HouseSpecSchema, similarity.PromptMatch] | None:
+    # A regeneration asks for a new spec (reuse_spec=false) or reuses its parent's explicitly; its
+    # prompt usually matches the parent's, so the similarity index would just hand the old spec back.
+    if not settings.prompt_dedupe_enabled or not user_id or job.parent_job_id:
+        return None
+    scope = _prompt_scope(job, user_id)
+    _warm_prompt_index(db, scope)
+    match = similarity.index.lookup(scope, job.prompt, threshold=settings.prompt_dedupe_threshold)
+    if match is None or match.job_id == job.id:
+        return None
+    row = db.execute(select(HouseSpecRow).where(HouseSpecRow.job_id == match.job_id)).scalars().first()
+    if not row:
+        similarity.index.discard(match.job_id)
+        return None
+    return HouseSpecSchema.model_validate_json(row.json_text), match
 
 
 def process_job(db: Session, job: Job) -> None:
@@ -218,47 +605,79 @@ def process_job(db: Session, job: Job) -> None:
         user_id = sess.user_id
 
     provider = _provider()
+    job_warnings: list[str] = []
+    degraded_reason: str | None = None
     spec = _reuse_parent_spec_if_requested(db, job)
-    if spec is None:
-        spec_result = provider.generate_house_spec(
-            prompt=job.prompt, bedrooms=job.bedrooms, bathrooms=job.bathrooms, style=job.style
-        )
-        spec = spec_result.spec
-        spec_meta = {
-            "provider": spec_result.meta.provider,
-            "model": spec_result.meta.model,
-            "request_id": spec_result.meta.request_id,
-            "latency_ms": spec_result.meta.latency_ms,
-            "input_tokens": spec_result.meta.input_tokens,
-            "output_tokens": spec_result.meta.output_tokens,
-            "total_tokens": spec_result.meta.total_tokens,
-            "image_tokens": spec_result.meta.image_tokens,
-        }
-        _append_provider_meta(job, spec_meta)
-        _log_usage(db, user_id=user_id, job_id=job.id, event_type="house_spec", meta=spec_meta)
-    else:
+    if spec is not None:
         _append_provider_meta(
             job,
             {"provider": "reuse", "model": "parent_house_spec", "request_id": job.parent_job_id},
         )
+    else:
+        similar = _reuse_similar_spec(db, job, user_id)
+        if similar is not None:
+            spec, match = similar
+            _append_provider_meta(
+                job,
+                {
+                    "provider": "reuse",
+                    "model": "similar_prompt",
+                    "request_id": match.job_id,
+                    "similarity": round(match.similarity, 4),
+                },
+            )
+
+    if spec is None:
+        routed_model = _route_spec_model(db, job, provider, user_id)
+        spec_result = _generate_spec_tracked(db, job, provider, routed_model)
+        if isinstance(spec_result, str):
+            degraded_reason = spec_result
+            spec = _degraded_spec(job, degraded_reason)
+            job_warnings.append(
+                f"degraded_mode: spec served from local template ({degraded_reason}); regenerate to upgrade."
+            )
+        else:
+            spec = spec_result.spec
+            spec_meta = {
+                "provider": spec_result.meta.provider,
+                "model": spec_result.meta.model,
+                "request_id": spec_result.meta.request_id,
+                "latency_ms": spec_result.meta.latency_ms,
+                "input_tokens": spec_result.meta.input_tokens,
+                "output_tokens": spec_result.meta.output_tokens,
+                "total_tokens": spec_result.meta.total_tokens,
+                "image_tokens": spec_result.meta.image_tokens,
+            }
+            _append_provider_meta(job, spec_meta)
+            _log_usage(db, user_id=user_id, job_id=job.id, event_type="house_spec", meta=spec_meta)
 
     _validate_spec(job, spec)
+    if settings.prompt_dedupe_enabled and user_id and degraded_reason is None:
+        similarity.index.add(_prompt_scope(job, user_id), job.id, job.prompt)
 
     db.merge(HouseSpecRow(job_id=job.id, json_text=spec.model_dump_json(indent=2)))
     _set_stage(job, "plan")
     db.commit()
 
-    plan = generate_plan_graph(spec)
-    canonical_hash = hashlib.sha256(plan.model_dump_json().encode("utf-8")).hexdigest()
+    build = _incremental_plan(db, job, spec)
+    if build is None:
+        build, cached = memo.build_plan(spec)
+        _set_provider_meta_field(job, "plan_memo", {"spec_hash": build.spec_hash, "hit": cached})
+    plan, check = build.plan, build.validation
+    if build.candidate_report is not None:
+        _set_provider_meta_field(job, "plan_candidates", build.candidate_report)
+    _set_provider_meta_field(job, "plan_validation", check.summary())
+    if check.result == "fail":
+        job_warnings.extend(f"plan_validation: {issue}" for issue in check.issues)
     db.merge(
         PlanGraphRow(
             job_id=job.id,
-            json_text=plan.model_dump_json(indent=2),
-            canonical_hash=canonical_hash,
-            validation_result="ok" if not plan.warnings else "warn",
+            json_text=build.plan_json,
+            canonical_hash=build.canonical_hash,
+            validation_result=check.result,
         )
     )
-    _set_warnings(job, plan.warnings)
+    _set_warnings(job, job_warnings + plan.warnings)
 
     _set_stage(job, "render")
     db.commit()
@@ -266,47 +685,69 @@ def process_job(db: Session, job: Job) -> None:
     art_dir = _job_art_dir(job.id)
 
     # spec.json artifact
-    spec_path = art_dir / "spec.json"
-    spec_path.write_text(spec.model_dump_json(indent=2), encoding="utf-8")
     _add_artifact(
         db,
         job_id=job.id,
         typ="spec_json",
-        path=spec_path,
+        data=spec.model_dump_json(indent=2).encode("utf-8"),
+        filename="spec.json",
         mime="application/json",
         meta={"provider": type(provider).__name__},
     )
 
-    # plan.svg artifact (deterministic, not AI-generated)
-    svg = render_plan_svg(plan)
-    svg_path = art_dir / "plan.svg"
-    svg_path.write_text(svg, encoding="utf-8")
-    _add_artifact(
-        db,
-        job_id=job.id,
-        typ="plan_svg",
-        path=svg_path,
-        mime="image/svg+xml",
-        meta={"px_per_ft": 12},
-    )
-
-    # Optional exterior image (API-based). If disabled/unavailable, skip.
-    if bool(job.want_exterior_image):
+    # plan.svg artifact (deterministic, not AI-generated; memoized with the plan unless streamed)
+    svg_meta = {"px_per_ft": memo.PX_PER_FT, "renderer": memo.svg_renderer()}
+    if build.svg is not None:
+        svg_data = build.svg.encode("utf-8")
+        _add_artifact(
+            db, job_id=job.id, typ="plan_svg", data=svg_data, filename="plan.svg", mime="image/svg+xml", meta=svg_meta
+        )
+    else:
+        svg_path = art_dir / "plan.svg"
+        svg_checksum, svg_size = render.write_plan_svg(
+            build.arrays, svg_path, px_per_ft=memo.PX_PER_FT, renderer=memo.svg_renderer()
+        )
+        _add_artifact(
+            db,
+            job_id=job.id,
+            typ="plan_svg",
+            path=svg_path,
+            mime="image/svg+xml",
+            meta=svg_meta,
+            checksum=svg_checksum,
+            size=svg_size,
+        )
+    _add_plan_thumbnails(db, job.id, build.arrays)
+
+    # Optional exterior images (API-based), one per requested view. If disabled/unavailable, skip.
+    views = _exterior_views(job)
+    if views and degraded_reason is not None:
+        job_warnings.append("degraded_mode: exterior image skipped while the provider is unhealthy.")
+        _set_warnings(job, job_warnings + plan.warnings)
+    elif views:
         _set_stage(job, "image")
         db.commit()
 
-        img_result = provider.maybe_generate_exterior_image(prompt=job.prompt, style=job.style)
-        if img_result:
-            ext = "png" if img_result.mime_type.endswith("png") else "jpg"
-            img_path = art_dir / f"exterior.{ext}"
-            img_path.write_bytes(img_result.image_bytes)
+        produced = 0
+        failed: list[tuple[str, Exception]] = []
+        transcoding: list[tuple[str, Future]] = []
+        for view, img_result in _generate_exterior_images(provider, job, art_dir, views):
+            if isinstance(img_result, Exception):
+                failed.append((view, img_result))
+                continue
+            if img_result is None:
+                continue
+            produced += 1
             _add_artifact(
                 db,
                 job_id=job.id,
                 typ="exterior_image",
-                path=img_path,
+                path=img_result.path,
                 mime=img_result.mime_type,
-                meta={"model": settings.gemini_image_model_preview},
+                meta={"model": settings.gemini_image_model_preview, "view": view},
+                checksum=img_result.checksum_sha256,
+                size=img_result.size_bytes,
+                keep_source=True,  # the transcode pool reads the scratch copy
             )
             img_meta = {
                 "provider": img_result.meta.provider,
@@ -317,19 +758,38 @@ def process_job(db: Session, job: Job) -> None:
                 "output_tokens": img_result.meta.output_tokens,
                 "total_tokens": img_result.meta.total_tokens,
                 "image_tokens": img_result.meta.image_tokens,
+                "view": view,
             }
             _append_provider_meta(job, img_meta)
             _log_usage(db, user_id=user_id, job_id=job.id, event_type="exterior_image", meta=img_meta)
+            # Variants transcode in the shared pool while the remaining views are still generating.
+            fut = transcode.submit(img_result.path)
+            if fut is not None:
+                transcoding.append((view, fut))
+            # Publish each image as soon as it lands rather than after the slowest view.
+            db.commit()
+
+        if failed and produced == 0:
+            raise failed[0][1]
+        for view, exc in failed:
+            code, _ = _classify_failure(exc)
+            job_warnings.append(f"exterior image '{view}' failed ({code}); the other views were kept.")
+        variant_warnings = _add_image_variants(db, job, transcoding)
+        job_warnings.extend(variant_warnings)
+        if failed or variant_warnings:
+            _set_warnings(job, job_warnings + plan.warnings)
 
     db.flush()
     artifacts = db.execute(select(Artifact).where(Artifact.job_id == job.id)).scalars().all()
     for art in artifacts:
-        if not Path(art.path).exists():
+        if not artifact_store.exists(art.path):
             raise RuntimeError(f"artifact_missing:{art.path}")
 
     job.status = "succeeded"
     _set_stage(job, "done")
     db.commit()
+    # Everything in scratch is in the artifact store by now.
+    shutil.rmtree(art_dir, ignore_errors=True)
 
 
 def _claim_next_job(db: Session) -> Job | None:
@@ -347,6 +807,7 @@ def worker_loop(*, poll_interval_s: float = 1.0, stop_event: threading.Event | N
     settings.var_dir.mkdir(parents=True, exist_ok=True)
     (settings.var_dir / "artifacts").mkdir(parents=True, exist_ok=True)
     _write_worker_heartbeat(state="starting")
+    candidates.warm_pool()
 
     while True:
         if stop_event and stop_event.is_set():
@@ -392,10 +853,11 @@ def worker_loop(*, poll_interval_s: float = 1.0, stop_event: threading.Event | N
 
 
 _thread: threading.Thread | None = None
+_stop_event: threading.Event | None = None
 
 
 def start_inprocess_worker() -> None:
-    global _thread
+    global _thread, _stop_event
     if _thread and _thread.is_alive():
         return
     stop_event = threading.Event()
@@ -406,3 +868,15 @@ def start_inprocess_worker() -> None:
     )
     t.start()
     _thread = t
+    _stop_event = stop_event
+
+
+def stop_inprocess_worker(timeout_s: float = 5.0) -> None:
+    global _thread, _stop_event
+    if _stop_event:
+        _stop_event.set()
+    if _thread and _thread.is_alive():
+        _thread.join(timeout=timeout_s)
+    _thread = None
+    _stop_event = None
+    candidates.shutdown_pool()
@@ -9,7 +9,7 @@ from fastapi.responses import JSONResponse
 from .api.router import api_router
 from .config import settings
 from .db import init_db
-from .jobs.worker import start_inprocess_worker
+from .jobs.worker import start_inprocess_worker, stop_inprocess_worker
 
 
 def _split_csv(raw: str) -> list[str]:
@@ -23,6 +23,8 @@ def create_app() -> FastAPI:
         if settings.run_inprocess_worker:
             start_inprocess_worker()
         yield
+        if settings.run_inprocess_worker:
+            stop_inprocess_worker()
 
     app = FastAPI(title=settings.app_name, lifespan=lifespan)
 
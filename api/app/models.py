@@ -51,6 +51,7 @@ class Job(Base):
     bathrooms: Mapped[int] = mapped_column(Integer, default=2)
     style: Mapped[str] = mapped_column(String(64), default="contemporary")
     want_exterior_image: Mapped[int] = mapped_column(Integer, default=1)
+    exterior_views_json: Mapped[str] = mapped_column(Text, default="[]")
     idempotency_key: Mapped[str | None] = mapped_column(String(80), nullable=True, index=True)
     request_hash: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
     priority: Mapped[str] = mapped_column(String(16), default="normal")
@@ -105,7 +106,9 @@ class Artifact(Base):
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=_uuid)
     job_id: Mapped[str] = mapped_column(String(36), ForeignKey("jobs.id"), index=True)
     type: Mapped[str] = mapped_column(String(32))  # plan_svg|spec_json|exterior_png|...
-    path: Mapped[str] = mapped_column(Text)  # local filesystem path under var_dir
+    # Content-addressed blob: a local path under var_dir/blobs or an s3://bucket/key URI
+    # (older rows: a per-job path under var_dir/artifacts); read via artifact_store.resolve()
+    path: Mapped[str] = mapped_column(Text)
     mime_type: Mapped[str] = mapped_column(String(100))
     checksum_sha256: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
     size_bytes: Mapped[int | None] = mapped_column(Integer, nullable=True)
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import heapq
+from dataclasses import dataclass
+
+import numpy as np
+
+MIN_WALL_FT = 2.5  # shorter contacts do not count as a shared wall
+DOOR_WIDTH_FT = 3.0
+DOOR_MIN_WALL_FT = 3.5  # a door needs the opening plus a little wall on each side
+_EPS_FT = 0.05
+
+
+@dataclass(frozen=True)
+class SharedWall:
+    a: int  # room row on the left (vertical wall) or above (horizontal wall)
+    b: int
+    vertical: bool
+    at: float  # x of a vertical wall, y of a horizontal one
+    start: float  # extent along the wall
+    end: float
+
+    @property
+    def length(self) -> float:
+        return self.end - self.start
+
+    def door(self) -> tuple[float, float, float, float] | None:
+        """Door candidate centred on the wall as a zero-thickness x, y, w, h segment, if it fits."""
+        if self.length < DOOR_MIN_WALL_FT:
+            return None
+        lo = round((self.start + self.end - DOOR_WIDTH_FT) / 2, 2)
+        if self.vertical:
+            return (self.at, lo, 0.0, DOOR_WIDTH_FT)
+        return (lo, self.at, DOOR_WIDTH_FT, 0.0)
+
+
+def _sweep_line(
+    coord: float, lows: list[tuple[float, float, int]], highs: list[tuple[float, float, int]], vertical: bool
+) -> list[SharedWall]:
+    """
+    Pairs the far edges (`lows`: rooms ending at `coord`) with the near edges (`highs`: rooms starting
+    there) whose extents overlap. Both sides are swept together in start order with a heap of active
+    intervals per side, so each side only meets intervals it actually overlaps.
+    """
+    events = sorted([(s, e, i, 0) for s, e, i in lows] + [(s, e, i, 1) for s, e, i in highs])
+    active: tuple[list[tuple[float, float, int]], list[tuple[float, float, int]]] = ([], [])
+    out: list[SharedWall] = []
+    for s, e, i, side in events:
+        other = active[1 - side]
+        while other and other[0][0] <= s + _EPS_FT:
+            heapq.heappop(other)
+        for oe, os_, j in other:
+            lo, hi = max(s, os_), min(e, oe)
+            if hi - lo > _EPS_FT:
+                a, b = (i, j) if side == 0 else (j, i)
+                out.append(SharedWall(a=a, b=b, vertical=vertical, at=coord, start=lo, end=hi))
+        heapq.heappush(active[side], (e, s, i))
+    return out
+
+
+def _walls(near: np.ndarray, far: np.ndarray, start: np.ndarray, end: np.ndarray, vertical: bool) -> list[SharedWall]:
+    # Group edges by wall line (coordinates snapped to 0.01 ft), one sort over all 2n edges.
+    n = len(near)
+    coords = np.round(np.concatenate([far, near]), 2)
+    side = np.concatenate([np.zeros(n, dtype=np.int8), np.ones(n, dtype=np.int8)])
+    rows = np.concatenate([np.arange(n), np.arange(n)])
+    starts = np.concatenate([start, start])
+    ends = np.concatenate([end, end])
+    order = np.lexsort((starts, coords))
+    coords, side, rows, starts, ends = coords[order], side[order], rows[order], starts[order], ends[order]
+    breaks = np.flatnonzero(np.diff(coords)) + 1
+    out: list[SharedWall] = []
+    for lo, hi in zip(np.concatenate(([0], breaks)), np.concatenate((breaks, [len(coords)]))):
+        group_side = side[lo:hi]
+        if group_side.min() == group_side.max():
+            continue  # only one kind of edge on this line: nothing can touch
+        items = list(zip(starts[lo:hi].tolist(), ends[lo:hi].tolist(), rows[lo:hi].tolist(), group_side.tolist()))
+        lows = [(s, e, i) for s, e, i, k in items if k == 0]
+        highs = [(s, e, i) for s, e, i, k in items if k == 1]
+        out += _sweep_line(float(coords[lo]), lows, highs, vertical)
+    return out
+
+
+def shared_walls(rects: np.ndarray, *, min_length: float = MIN_WALL_FT) -> list[SharedWall]:
+    """
+    Walls shared by axis-aligned rooms (rows of x, y, w, h): a room's right edge against another's
+    left edge, or its bottom edge against another's top edge. O(n log n) plus the walls found.
+    """
+    if len(rects) == 0:
+        return []
+    x0, y0 = rects[:, 0], rects[:, 1]
+    x1, y1 = x0 + rects[:, 2], y0 + rects[:, 3]
+    walls = _walls(x0, x1, y0, y1, vertical=True) + _walls(y0, y1, x0, x1, vertical=False)
+    return sorted((w for w in walls if w.length >= min_length), key=lambda w: (min(w.a, w.b), max(w.a, w.b)))
+
+
+def touching_pairs(rects: np.ndarray, *, min_length: float = MIN_WALL_FT) -> set[tuple[int, int]]:
+    """Symmetric set of room-row pairs sharing a wall at least `min_length` long."""
+    out: set[tuple[int, int]] = set()
+    for w in shared_walls(rects, min_length=min_length):
+        out.add((w.a, w.b))
+        out.add((w.b, w.a))
+    return out
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Iterable
+
+import numpy as np
+
+from ..schemas import PlanEdge, PlanGraph, PlanRoom, Rect
+from .adjacency import SharedWall, shared_walls
+
+
+def intern(values: Iterable[str]) -> tuple[tuple[str, ...], np.ndarray]:
+    """Interns strings into (table, codes) with table[codes[i]] == values[i], in first-seen order."""
+    table: dict[str, int] = {}
+    codes = [table.setdefault(v, len(table)) for v in values]
+    return tuple(table), np.array(codes, dtype=np.int32)
+
+
+@dataclass
+class PlanArrays:
+    """
+    Struct-of-arrays plan used on the layout/validation/render hot path. Row i of `rects`
+    (x, y, w, h in feet) is room i; types and names are codes into small per-plan tables.
+    Convert to the pydantic PlanGraph only at the API and persistence boundary (`to_graph`).
+    """
+
+    outline: np.ndarray  # (4,) x, y, w, h
+    rects: np.ndarray  # (n, 4) float64
+    ids: tuple[str, ...]
+    type_table: tuple[str, ...]
+    type_codes: np.ndarray  # (n,) int32
+    name_table: tuple[str, ...]
+    name_codes: np.ndarray  # (n,) int32
+    area_ft2: np.ndarray  # (n,) requested areas
+    edge_index: np.ndarray = field(default_factory=lambda: np.empty((0, 2), dtype=np.int32))  # (m, 2) room rows
+    edge_kinds: tuple[str, ...] = ()
+    edge_wall_ft: np.ndarray = field(default_factory=lambda: np.empty(0))  # (m,) NaN where unknown
+    edge_doors: np.ndarray = field(default_factory=lambda: np.empty((0, 4)))  # (m, 4) NaN rows: no door
+    warnings: list[str] = field(default_factory=list)
+    version: str = "1.0"
+
+    @classmethod
+    def build(
+        cls,
+        *,
+        outline: np.ndarray,
+        rects: np.ndarray,
+        ids: Iterable[str],
+        types: Iterable[str],
+        names: Iterable[str],
+        area_ft2: Iterable[float],
+        warnings: list[str] | None = None,
+    ) -> "PlanArrays":
+        type_table, type_codes = intern(types)
+        name_table, name_codes = intern(names)
+        return cls(
+            outline=np.asarray(outline, dtype=float),
+            rects=np.asarray(rects, dtype=float).reshape(-1, 4),
+            ids=tuple(ids),
+            type_table=type_table,
+            type_codes=type_codes,
+            name_table=name_table,
+            name_codes=name_codes,
+            area_ft2=np.asarray(list(area_ft2), dtype=float),
+            warnings=list(warnings or []),
+        )
+
+    @classmethod
+    def from_graph(cls, plan: PlanGraph) -> "PlanArrays":
+        rooms = plan.rooms
+        o = plan.outline_ft
+        arr = cls.build(
+            outline=np.array([o.x, o.y, o.w, o.h]),
+            rects=np.array([[r.rect_ft.x, r.rect_ft.y, r.rect_ft.w, r.rect_ft.h] for r in rooms]),
+            ids=(r.id for r in rooms),
+            types=(r.type for r in rooms),
+            names=(r.name for r in rooms),
+            area_ft2=(r.area_ft2 for r in rooms),
+            warnings=list(plan.warnings),
+        )
+        arr.version = plan.version
+        row = {rid: i for i, rid in enumerate(arr.ids)}
+        # Edges to rooms outside the plan cannot be indexed; they are dropped.
+        kept = [e for e in plan.edges if e.a in row and e.b in row]
+        arr.edge_index = np.array([[row[e.a], row[e.b]] for e in kept], dtype=np.int32).reshape(-1, 2)
+        arr.edge_kinds = tuple(e.kind for e in kept)
+        arr.edge_wall_ft = np.array([np.nan if e.wall_ft is None else e.wall_ft for e in kept], dtype=float)
+        arr.edge_doors = np.array(
+            [[np.nan] * 4 if e.door_ft is None else [e.door_ft.x, e.door_ft.y, e.door_ft.w, e.door_ft.h] for e in kept],
+            dtype=float,
+        ).reshape(-1, 4)
+        return arr
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def x1(self) -> np.ndarray:
+        return self.rects[:, 0] + self.rects[:, 2]
+
+    @property
+    def y1(self) -> np.ndarray:
+        return self.rects[:, 1] + self.rects[:, 3]
+
+    @property
+    def areas(self) -> np.ndarray:
+        return self.rects[:, 2] * self.rects[:, 3]
+
+    @property
+    def types(self) -> np.ndarray:
+        return np.array(self.type_table, dtype=object)[self.type_codes] if len(self) else np.empty(0, dtype=object)
+
+    def name(self, i: int) -> str:
+        return self.name_table[self.name_codes[i]]
+
+    def type_of(self, i: int) -> str:
+        return self.type_table[self.type_codes[i]]
+
+    def mask(self, typ: str) -> np.ndarray:
+        """Rows of the given room type (all False if the plan has none)."""
+        try:
+            return self.type_codes == self.type_table.index(typ)
+        except ValueError:
+            return np.zeros(len(self), dtype=bool)
+
+    def first(self, typ: str) -> int | None:
+        rows = np.flatnonzero(self.mask(typ))
+        return int(rows[0]) if rows.size else None
+
+    def set_walls(self, walls: list[SharedWall]) -> None:
+        """Edges from shared walls: "circulation" where the hall is involved, else "adjacent"."""
+        hall = self.mask("hall")
+        self.edge_index = np.array([(w.a, w.b) for w in walls], dtype=np.int32).reshape(-1, 2)
+        self.edge_kinds = tuple("circulation" if hall[w.a] or hall[w.b] else "adjacent" for w in walls)
+        self.edge_wall_ft = np.array([round(w.length, 2) for w in walls], dtype=float)
+        doors = [w.door() for w in walls]
+        self.edge_doors = np.array([d if d else (np.nan,) * 4 for d in doors], dtype=float).reshape(-1, 4)
+
+    def derive_edges(self) -> None:
+        self.set_walls(shared_walls(self.rects))
+
+    def to_graph(self) -> PlanGraph:
+        o = self.outline
+        rooms = [
+            PlanRoom(
+                id=self.ids[i],
+                name=self.name(i),
+                type=self.type_of(i),
+                area_ft2=float(self.area_ft2[i]),
+                rect_ft=Rect(x=float(r[0]), y=float(r[1]), w=float(r[2]), h=float(r[3])),
+            )
+            for i, r in enumerate(self.rects.tolist())
+        ]
+        edges = [
+            PlanEdge(
+                a=self.ids[a],
+                b=self.ids[b],
+                kind=kind,
+                wall_ft=None if np.isnan(wall) else round(wall, 2),
+                door_ft=None if np.isnan(door[0]) else Rect(x=door[0], y=door[1], w=door[2], h=door[3]),
+            )
+            for (a, b), kind, wall, door in zip(
+                self.edge_index.tolist(), self.edge_kinds, self.edge_wall_ft.tolist(), self.edge_doors.tolist()
+            )
+        ]
+        return PlanGraph(
+            version=self.version,
+            outline_ft=Rect(x=float(o[0]), y=float(o[1]), w=float(o[2]), h=float(o[3])),
+            rooms=rooms,
+            edges=edges,
+            warnings=list(self.warnings),
+        )
+
+
+def as_arrays(plan: PlanGraph | PlanArrays) -> PlanArrays:
+    return plan if isinstance(plan, PlanArrays) else PlanArrays.from_graph(plan)
+
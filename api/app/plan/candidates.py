@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import atexit
+import concurrent.futures as cf
+import multiprocessing as mp
+import time
+from dataclasses import asdict, dataclass
+from threading import Lock
+
+import numpy as np
+
+from ..config import settings
+from ..schemas import HouseSpec, PlanGraph
+from .adjacency import touching_pairs
+from .arrays import PlanArrays, as_arrays
+from .layout import layout_arrays
+from .packing import PackOptions, pack_plan_arrays
+from .validation import validate_plan
+
+# Each room of the first type should share a wall with some room of the second type.
+PREFERRED_ADJACENCY: tuple[tuple[str, str], ...] = (
+    ("kitchen", "living"),
+    ("kitchen", "dining"),
+    ("pantry", "kitchen"),
+    ("bathroom", "bedroom"),
+    ("bedroom", "hall"),
+    ("bathroom", "hall"),
+)
+
+
+@dataclass
+class PlanScore:
+    total: float
+    area_error: float
+    adjacency: float
+    waste: float
+    aspect_penalty: float
+
+
+def score_plan(spec: HouseSpec, plan: PlanGraph | PlanArrays) -> PlanScore:
+    """Lower is better: area drift vs. area_ft2, unmet adjacency preferences, wasted space, odd shapes."""
+    arr = as_arrays(plan)
+    rects = arr.rects
+    index = {rid: i for i, rid in enumerate(arr.ids)}
+    areas = arr.areas
+
+    errors = [
+        abs(areas[index[r.id]] - r.area_ft2) / max(1.0, r.area_ft2) if r.id in index else 1.0 for r in spec.rooms
+    ]
+    area_error = float(np.mean(errors)) if errors else 0.0
+
+    neighbours: dict[int, set[int]] = {}
+    for i, j in touching_pairs(rects):
+        neighbours.setdefault(i, set()).add(j)
+    wanted = met = 0
+    for a, b in PREFERRED_ADJACENCY:
+        rows = np.flatnonzero(arr.mask(a))
+        cols = set(np.flatnonzero(arr.mask(b)).tolist())
+        if rows.size == 0 or not cols:
+            continue
+        wanted += rows.size
+        met += sum(1 for r in rows.tolist() if neighbours.get(r, set()) & cols)
+    adjacency = met / wanted if wanted else 1.0
+
+    outline_area = max(1.0, float(arr.outline[2] * arr.outline[3]))
+    used = float(areas[~arr.mask("hall")].sum())
+    waste = max(0.0, 1.0 - used / outline_area)
+    aspect = np.maximum(rects[:, 2] / rects[:, 3], rects[:, 3] / rects[:, 2])
+    aspect_penalty = float(np.clip(aspect - 2.0, 0.0, None).mean())
+
+    total = area_error + (1.0 - adjacency) + 0.5 * waste + 0.25 * aspect_penalty
+    return PlanScore(
+        total=round(total, 6),
+        area_error=round(area_error, 6),
+        adjacency=round(adjacency, 6),
+        waste=round(waste, 6),
+        aspect_penalty=round(aspect_penalty, 6),
+    )
+
+
+def _candidate(
+    spec_json: str, seed: int, deadline: float | None = None
+) -> tuple[int, dict, str, PlanArrays] | None:
+    # Runs in a pool process: the spec goes in as JSON, the plan comes back as arrays (cheap to pickle).
+    # Calls already handed to a process can't be cancelled; past the (wall-clock) deadline they return
+    # at once, so a timed-out search leaves at most the layouts already running behind it.
+    if deadline is not None and time.time() > deadline:
+        return None
+    spec = HouseSpec.model_validate_json(spec_json)
+    plan = pack_plan_arrays(spec, PackOptions.for_seed(seed))
+    return seed, asdict(score_plan(spec, plan)), validate_plan(plan, spec).result, plan
+
+
+def pool_context() -> mp.context.BaseContext:
+    """
+    Start method for process pools. The API and worker run threads (uvicorn, the in-process
+    worker, image threads), and forking a threaded process can hand children a held lock.
+    """
+    return mp.get_context("forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn")
+
+
+_pool_lock = Lock()
+_pool: cf.ProcessPoolExecutor | None = None
+
+
+def _ready() -> bool:
+    return True
+
+
+def _get_pool() -> cf.ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = max(1, settings.plan_candidate_workers)
+            pool = cf.ProcessPoolExecutor(max_workers=workers, mp_context=pool_context())
+            # Start every process (and import this module in it) before handing the pool out: a cold
+            # forkserver/spawn start takes longer than the search budget, which must not pay for it.
+            cf.wait([pool.submit(_ready) for _ in range(workers)])
+            _pool = pool
+        return _pool
+
+
+def warm_pool() -> None:
+    """Starts the candidate pool ahead of the first job, when candidate search is on."""
+    if settings.plan_candidates > 1 and settings.plan_layout_strategy.strip().lower() == "packed":
+        _get_pool()
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+atexit.register(shutdown_pool)
+
+
+def choose_layout(spec: HouseSpec, *, inline: bool = False) -> tuple[PlanArrays, dict | None]:
+    """
+    With `plan_candidates` > 1 (and the packed strategy), lays out seed 0 inline, fans the other
+    seeds out to a process pool and keeps the best-scoring plan finished within the time budget.
+    Candidates that fail geometric validation are never picked.
+    inline=True lays out every seed in this process with no time budget (for callers that are
+    already pool processes, e.g. the offline recompute), so the pick does not depend on timing.
+    Returns the plan and a report for provider_meta, or (plan, None) in single-layout mode.
+    """
+    n = settings.plan_candidates
+    if n <= 1 or settings.plan_layout_strategy.strip().lower() != "packed":
+        return layout_arrays(spec), None
+
+    pool = None if inline else _get_pool()  # started outside the budget
+    t0 = time.perf_counter()
+    deadline = t0 + settings.plan_candidate_budget_ms / 1000.0
+    best_plan = layout_arrays(spec)
+    best_seed, best_score = 0, score_plan(spec, best_plan)
+    scores = {0: best_score.total}
+
+    results: list[tuple[int, dict, str, PlanArrays]] = []
+    remaining = deadline - time.perf_counter()
+    if pool is None:
+        spec_json = spec.model_dump_json()
+        results = [_candidate(spec_json, seed) for seed in range(1, n)]  # no deadline: never None
+    elif remaining > 0:
+        spec_json = spec.model_dump_json()
+        futures = [pool.submit(_candidate, spec_json, seed, time.time() + remaining) for seed in range(1, n)]
+        done, pending = cf.wait(futures, timeout=remaining)
+        for fut in pending:
+            fut.cancel()
+        results = sorted(
+            (r for r in (f.result() for f in done if f.exception() is None) if r is not None), key=lambda r: r[0]
+        )
+    rejected = 0
+    for seed, score, result, plan in results:
+        if result == "fail":
+            rejected += 1
+            continue
+        scores[seed] = score["total"]
+        if score["total"] < best_score.total:
+            best_seed, best_score = seed, PlanScore(**score)
+            best_plan = plan
+
+    report = {
+        "requested": n,
+        "scored": len(scores),
+        "rejected": rejected,
+        "best_seed": best_seed,
+        "best_score": asdict(best_score),
+        "elapsed_ms": int((time.perf_counter() - t0) * 1000),
+    }
+    return best_plan, report
@@ -1,15 +1,32 @@
 from __future__ import annotations
 
+import hashlib
 import uuid
 
-from ..schemas import HouseSpec, PlanEdge, PlanGraph, PlanRoom, Rect
+from ..schemas import HouseSpec, PlanGraph, PlanRoom, Rect
+from .arrays import PlanArrays
 
+_PLAN_ID_NAMESPACE = uuid.UUID("5b0f6d8e-2f4a-4c43-9a57-3c1d2e7f9b10")
+_LEGACY_PUBLIC_TYPES = frozenset({"living", "kitchen", "dining"})
+# Service and flex rooms from the style templates open off the hall, so the public and private rows
+# keep the sizes they always had.
+_LEGACY_SERVICE_TYPES = frozenset({"mudroom", "pantry", "office"})
+_LEGACY_PRIVATE_TYPES = frozenset({"bedroom", "bathroom", "laundry"})
+_MIN_SERVICE_W_FT = 5.0
+_MIN_SERVICE_DEPTH_FT = 6.0
 
-def _rid() -> str:
-    return str(uuid.uuid4())
 
+def spec_digest(spec: HouseSpec) -> str:
+    """Canonical spec hash: identical specs (e.g. reuse_spec regenerations) get the same digest."""
+    return hashlib.sha256(spec.model_dump_json().encode("utf-8")).hexdigest()
 
-def generate_plan_graph(spec: HouseSpec) -> PlanGraph:
+
+def derived_room_id(spec: HouseSpec, role: str) -> str:
+    """Stable id for a room the layout adds itself (hall, default rooms), derived from the spec."""
+    return str(uuid.uuid5(_PLAN_ID_NAMESPACE, f"{spec_digest(spec)}:{role}"))
+
+
+def generate_plan_arrays(spec: HouseSpec) -> PlanArrays:
     """
     Deterministic MVP layout.
 
@@ -25,16 +42,15 @@ def generate_plan_graph(spec: HouseSpec) -> PlanGraph:
     right_w = outline_w - left_w
 
     rooms: list[PlanRoom] = []
-    edges: list[PlanEdge] = []
     warnings: list[str] = []
 
     # Zone A (left): public rooms stacked
     y = 0.0
-    public = [r for r in spec.rooms if r.type in {"living", "kitchen", "dining"}]
+    public = [r for r in spec.rooms if r.type in _LEGACY_PUBLIC_TYPES]
     if not public:
         warnings.append("No public rooms (living/kitchen/dining) in spec; adding default Great Room.")
         public = []
-        public.append(type(spec.rooms[0]).model_validate({"id": _rid(), "type": "living", "name": "Great Room", "area_ft2": 320}))  # type: ignore[attr-defined]
+        public.append(type(spec.rooms[0]).model_validate({"id": derived_room_id(spec, "default:living"), "type": "living", "name": "Great Room", "area_ft2": 320}))  # type: ignore[attr-defined]
 
     # Assign heights by area / width; clamp to keep readable rectangles.
     for r in public:
@@ -54,21 +70,40 @@ def generate_plan_graph(spec: HouseSpec) -> PlanGraph:
 
     # Add a small entry/hall connector if space permits.
     hall_h = max(4.0, outline_h - y)
-    hall_id = _rid()
+    hall_id = derived_room_id(spec, "hall")
+    # Service rooms open off the hall: side by side in its band, each as deep as the band and as
+    # wide as its area needs (at least _MIN_SERVICE_W_FT), leaving the hall at least 4 ft wide.
+    # Ones that don't fit are left out (and reported missing by validation).
+    x = 0.0
+    if hall_h >= _MIN_SERVICE_DEPTH_FT:
+        for r in (r for r in spec.rooms if r.type in _LEGACY_SERVICE_TYPES):
+            w = max(_MIN_SERVICE_W_FT, r.area_ft2 / hall_h)
+            if x + w > left_w - 4.0:
+                continue
+            rooms.append(
+                PlanRoom(
+                    id=r.id,
+                    name=r.name,
+                    type=r.type,
+                    area_ft2=r.area_ft2,
+                    rect_ft=Rect(x=x, y=y, w=w, h=hall_h),
+                )
+            )
+            x += w
     if hall_h >= 4.0:
         rooms.append(
             PlanRoom(
                 id=hall_id,
                 name="Hall",
                 type="hall",
-                area_ft2=left_w * hall_h,
-                rect_ft=Rect(x=0, y=y, w=left_w, h=hall_h),
+                area_ft2=(left_w - x) * hall_h,
+                rect_ft=Rect(x=x, y=y, w=left_w - x, h=hall_h),
             )
         )
 
     # Zone B (right): bedrooms + baths stacked
     y2 = 0.0
-    priv = [r for r in spec.rooms if r.type in {"bedroom", "bathroom", "laundry"}]
+    priv = [r for r in spec.rooms if r.type in _LEGACY_PRIVATE_TYPES]
     if not priv:
         warnings.append("No private rooms (bedroom/bathroom/laundry) in spec; adding defaults.")
 
@@ -87,20 +122,11 @@ def generate_plan_graph(spec: HouseSpec) -> PlanGraph:
         )
         y2 += h
 
-    # Edges: naive adjacency based on types.
-    living = next((r for r in rooms if r.type == "living"), None)
-    kitchen = next((r for r in rooms if r.type == "kitchen"), None)
-    dining = next((r for r in rooms if r.type == "dining"), None)
-    if living and kitchen:
-        edges.append(PlanEdge(a=living.id, b=kitchen.id))
-    if kitchen and dining:
-        edges.append(PlanEdge(a=kitchen.id, b=dining.id))
-    if living and dining:
-        edges.append(PlanEdge(a=living.id, b=dining.id))
-
-    # Hall connects to first bedroom if present
-    first_bed = next((r for r in rooms if r.type == "bedroom"), None)
-    if first_bed and hall_id:
-        edges.append(PlanEdge(a=hall_id, b=first_bed.id, kind="circulation"))
-
-    return PlanGraph(outline_ft=outline, rooms=rooms, edges=edges, warnings=warnings)
+    arr = PlanArrays.from_graph(PlanGraph(outline_ft=outline, rooms=rooms, edges=[], warnings=warnings))
+    arr.derive_edges()
+    return arr
+
+
+def generate_plan_graph(spec: HouseSpec) -> PlanGraph:
+    return generate_plan_arrays(spec).to_graph()
+
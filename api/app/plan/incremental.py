@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from ..config import settings
+from ..schemas import HouseSpec, HouseSpecRoom
+from .arrays import PlanArrays
+from .geometry import derived_room_id
+from .packing import HALL_WIDTH_FT, MAX_ROOM_ASPECT, PRIVATE_TYPES, _aspect, _snap
+
+_TOL_FT = 0.01
+_RESIZE_REL = 0.005  # smaller area edits are treated as unchanged
+
+# One treemap strip: "col" stacks rooms top to bottom along the left edge of the remaining zone
+# box, "row" lines them up left to right along its top edge.
+Strip = tuple[str, list[str]]
+
+
+@dataclass
+class SpecDiff:
+    added: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    resized: list[str] = field(default_factory=list)
+
+    @property
+    def changed(self) -> int:
+        return len(self.added) + len(self.removed) + len(self.resized)
+
+
+def diff_specs(old: HouseSpec, new: HouseSpec) -> SpecDiff:
+    """Rooms are matched by id; a room whose type changed counts as removed and added."""
+    before = {r.id: r for r in old.rooms}
+    after = {r.id: r for r in new.rooms}
+    diff = SpecDiff()
+    for rid, room in after.items():
+        prev = before.get(rid)
+        if prev is None or prev.type != room.type:
+            diff.added.append(rid)
+        elif abs(room.area_ft2 - prev.area_ft2) > _RESIZE_REL * max(1.0, prev.area_ft2):
+            diff.resized.append(rid)
+    diff.removed = [rid for rid, r in before.items() if rid not in after or after[rid].type != r.type]
+    return diff
+
+
+def _take_strip(rects: np.ndarray, rows: list[int], i: int, box: list[float], orient: str) -> int:
+    """How many rooms from rows[i] on stack into one full strip of the box; 0 if they do not."""
+    a, b = (0, 1) if orient == "col" else (1, 0)  # a: axis the strip hugs, b: axis rooms stack along
+    origin, along, end = box[a], box[b], box[b] + box[b + 2]
+    thick = rects[rows[i], a + 2]
+    k = 0
+    while i + k < len(rows):
+        j = rows[i + k]
+        if (
+            abs(rects[j, a] - origin) > _TOL_FT
+            or abs(rects[j, a + 2] - thick) > _TOL_FT
+            or abs(rects[j, b] - along) > _TOL_FT
+        ):
+            return 0
+        along += rects[j, b + 2]
+        k += 1
+        if abs(along - end) < _TOL_FT:
+            return k
+    return 0
+
+
+def _zone_strips(rects: np.ndarray, ids: tuple[str, ...], rows: list[int], box: list[float]) -> list[Strip] | None:
+    """
+    Recovers the strip structure a packed zone was tiled with by replaying the treemap over the
+    room rows in packing order. Returns None if the rooms do not tile the box that way.
+    """
+    box = list(box)
+    strips: list[Strip] = []
+    i = 0
+    while i < len(rows):
+        orient = "col"
+        k = _take_strip(rects, rows, i, box, orient)
+        if not k:
+            orient = "row"
+            k = _take_strip(rects, rows, i, box, orient)
+        if not k:
+            return None
+        thick = rects[rows[i], 2 if orient == "col" else 3]
+        if orient == "col":
+            box[0], box[2] = box[0] + thick, box[2] - thick
+        else:
+            box[1], box[3] = box[1] + thick, box[3] - thick
+        strips.append((orient, [ids[j] for j in rows[i : i + k]]))
+        i += k
+    if min(box[2], box[3]) > _TOL_FT:
+        return None
+    return strips
+
+
+def slice_strips(strips: list[tuple[str, np.ndarray]], x: float, y: float, w: float, h: float) -> np.ndarray:
+    """Tiles the box with a fixed strip structure; strip thicknesses follow the given areas."""
+    out: list[np.ndarray] = []
+    for orient, areas in strips:
+        total = float(areas.sum())
+        k = len(areas)
+        if orient == "col":
+            thick = total / h
+            lengths = areas / thick
+            offsets = np.concatenate(([0.0], np.cumsum(lengths)[:-1]))
+            out.append(np.column_stack([np.full(k, x), y + offsets, np.full(k, thick), lengths]))
+            x, w = x + thick, w - thick
+        else:
+            thick = total / w
+            lengths = areas / thick
+            offsets = np.concatenate(([0.0], np.cumsum(lengths)[:-1]))
+            out.append(np.column_stack([x + offsets, np.full(k, y), lengths, np.full(k, thick)]))
+            y, h = y + thick, h - thick
+    return np.vstack(out) if out else np.empty((0, 4))
+
+
+def _insert(strips: list[Strip], room: HouseSpecRoom, types: dict[str, str]) -> None:
+    # Next to the last room of the same type in the zone, else into the zone's last strip.
+    for _, ids in reversed(strips):
+        for pos in range(len(ids) - 1, -1, -1):
+            if types.get(ids[pos]) == room.type:
+                ids.insert(pos + 1, room.id)
+                return
+    strips[-1][1].append(room.id)
+
+
+def relayout(parent_spec: HouseSpec, parent: PlanArrays, spec: HouseSpec) -> tuple[PlanArrays | None, dict]:
+    """
+    Incremental layout for an edited spec: keeps the parent plan's outline height and each zone's
+    strip structure, drops removed rooms, slots added rooms in beside rooms of the same type and
+    re-slices only the zone that changed; the other zone keeps its rooms, at most shifted sideways.
+
+    Returns (arrays, report), or (None, report) with the reason when a full layout is needed instead.
+    """
+    diff = diff_specs(parent_spec, spec)
+    report = {
+        "mode": "full",
+        "added": len(diff.added),
+        "removed": len(diff.removed),
+        "resized": len(diff.resized),
+    }
+
+    def _full(reason: str) -> tuple[None, dict]:
+        report["reason"] = reason
+        return None, report
+
+    if diff.changed == 0:
+        return _full("no_room_changes")
+    if diff.changed > settings.plan_incremental_max_change * max(1, len(parent_spec.rooms)):
+        return _full("diff_too_large")
+
+    halls = np.flatnonzero(parent.mask("hall"))
+    if halls.size != 1 or set(parent.ids) - {parent.ids[halls[0]]} != {r.id for r in parent_spec.rooms}:
+        return _full("parent_not_packed")
+    hall = int(halls[0])
+    outline_w, outline_h = float(parent.outline[2]), float(parent.outline[3])
+    if abs(parent.rects[hall, 2] - HALL_WIDTH_FT) > _TOL_FT or abs(parent.rects[hall, 3] - outline_h) > _TOL_FT:
+        return _full("parent_not_packed")
+
+    rects = parent.rects.copy()
+    mirror = bool(hall > 0 and rects[0, 0] > rects[hall, 0])
+    if mirror:
+        rects[:, 0] = outline_w - rects[:, 0] - rects[:, 2]
+    hall_x = float(rects[hall, 0])
+    public_rows, private_rows = list(range(hall)), list(range(hall + 1, len(parent)))
+    zones = {
+        "public": _zone_strips(rects, parent.ids, public_rows, [0.0, 0.0, hall_x, outline_h]),
+        "private": _zone_strips(
+            rects,
+            parent.ids,
+            private_rows,
+            [hall_x + HALL_WIDTH_FT, 0.0, outline_w - hall_x - HALL_WIDTH_FT, outline_h],
+        ),
+    }
+    if zones["public"] is None or zones["private"] is None or not zones["public"] or not zones["private"]:
+        return _full("parent_not_packed")
+
+    rooms = {r.id: r for r in spec.rooms}
+    types = {r.id: r.type for r in spec.rooms}
+    types.update({r.id: r.type for r in parent_spec.rooms if r.id not in rooms})
+    removed = set(diff.removed)
+    changed_zones = set()
+    for name, strips in zones.items():
+        for _, ids in strips:
+            if any(rid in removed or rid in diff.resized for rid in ids):
+                changed_zones.add(name)
+        zones[name] = [(o, [rid for rid in ids if rid not in removed]) for o, ids in strips]
+        zones[name] = [(o, ids) for o, ids in zones[name] if ids]
+    for rid in diff.added:
+        name = "private" if types[rid] in PRIVATE_TYPES else "public"
+        if not zones[name]:
+            return _full("zone_emptied")
+        _insert(zones[name], rooms[rid], types)
+        changed_zones.add(name)
+    if not zones["public"] or not zones["private"]:
+        return _full("zone_emptied")
+
+    def _areas(ids: list[str]) -> np.ndarray:
+        return np.array([max(1.0, rooms[rid].area_ft2) for rid in ids])
+
+    row_of = {rid: i for i, rid in enumerate(parent.ids)}
+
+    def _zone(name: str, x: float) -> tuple[np.ndarray, float]:
+        # An untouched zone keeps its parent rects exactly (shifted to x); a changed one is re-sliced.
+        strips = zones[name]
+        if name not in changed_zones:
+            kept = rects[[row_of[rid] for _, ids in strips for rid in ids]].copy()
+            x0 = float(kept[:, 0].min())
+            kept[:, 0] += x - x0
+            return kept, float((kept[:, 0] + kept[:, 2]).max()) - x
+        areas = [(o, _areas(ids)) for o, ids in strips]
+        width = sum(float(a.sum()) for _, a in areas) / outline_h
+        return slice_strips(areas, x, 0.0, width, outline_h), width
+
+    pub_rects, pub_w = _zone("public", 0.0)
+    priv_rects, priv_w = _zone("private", pub_w + HALL_WIDTH_FT)
+    new_rects = np.vstack([pub_rects, np.array([[pub_w, 0.0, HALL_WIDTH_FT, outline_h]]), priv_rects])
+    if mirror:
+        new_rects[:, 0] = pub_w + HALL_WIDTH_FT + priv_w - new_rects[:, 0] - new_rects[:, 2]
+    new_rects = _snap(new_rects)
+    pub_ids = [rid for _, ids in zones["public"] for rid in ids]
+    priv_ids = [rid for _, ids in zones["private"] for rid in ids]
+    hall_row = len(pub_ids)
+    if np.delete(_aspect(new_rects), hall_row).max() > MAX_ROOM_ASPECT:
+        return _full("aspect_limit")
+
+    hall_area = float(new_rects[hall_row, 2] * new_rects[hall_row, 3])
+    ordered = [*(rooms[rid] for rid in pub_ids), None, *(rooms[rid] for rid in priv_ids)]
+    arr = PlanArrays.build(
+        outline=np.array(
+            [0.0, 0.0, round(float((new_rects[:, 0] + new_rects[:, 2]).max()), 2), round(outline_h, 2)]
+        ),
+        rects=new_rects,
+        ids=(r.id if r else derived_room_id(spec, "hall") for r in ordered),
+        types=(r.type if r else "hall" for r in ordered),
+        names=(r.name if r else "Hall" for r in ordered),
+        area_ft2=(r.area_ft2 if r else hall_area for r in ordered),
+    )
+    arr.derive_edges()
+
+    before = {rid: parent.rects[i] for i, rid in enumerate(parent.ids)}
+    kept = [(i, before[rid]) for i, rid in enumerate(arr.ids) if rid in before]
+    report.update(
+        {
+            "mode": "incremental",
+            "zones": sorted(changed_zones),
+            # Rooms that kept their exact rect, and those that only shifted sideways with their zone.
+            "unchanged": sum(1 for i, old in kept if np.abs(arr.rects[i] - old).max() <= _TOL_FT),
+            "reshaped": sum(1 for i, old in kept if np.abs(arr.rects[i, 2:] - old[2:]).max() > _TOL_FT),
+        }
+    )
+    return arr, report
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from typing import Callable
+
+from ..config import settings
+from ..schemas import HouseSpec, PlanGraph
+from .arrays import PlanArrays
+from .geometry import generate_plan_arrays
+from .packing import pack_plan_arrays
+
+STRATEGIES: dict[str, Callable[[HouseSpec], PlanArrays]] = {
+    "packed": pack_plan_arrays,
+    "legacy": generate_plan_arrays,
+}
+DEFAULT_STRATEGY = "packed"
+
+
+def layout_arrays(spec: HouseSpec, *, strategy: str | None = None) -> PlanArrays:
+    """
+    Lays out the spec with the configured strategy. If a non-legacy strategy fails, the legacy
+    fixed-outline layout is used instead and a warning records why.
+    """
+    name = (strategy or settings.plan_layout_strategy).strip().lower()
+    if name not in STRATEGIES:
+        name = DEFAULT_STRATEGY
+    if name == "legacy":
+        return generate_plan_arrays(spec)
+    try:
+        return STRATEGIES[name](spec)
+    except Exception as exc:
+        arr = generate_plan_arrays(spec)
+        arr.warnings.append(f"layout_fallback: {name} layout failed ({type(exc).__name__}); used legacy layout.")
+        return arr
+
+
+def layout_plan(spec: HouseSpec, *, strategy: str | None = None) -> PlanGraph:
+    return layout_arrays(spec, strategy=strategy).to_graph()
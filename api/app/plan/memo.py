@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+
+from ..config import settings
+from ..schemas import HouseSpec, PlanGraph
+from . import candidates
+from .arrays import PlanArrays
+from .geometry import spec_digest
+from .render import RENDERERS, render_plan_svg
+from .validation import PlanValidation, validate_plan
+
+PX_PER_FT = 12
+# Bump when layout, validation or rendering code changes what a spec builds; stale memo entries then miss.
+LAYOUT_VERSION = 1
+
+
+@dataclass(frozen=True)
+class PlanBuild:
+    """Everything the plan and render stages derive from a spec. Shared between jobs: never mutate."""
+
+    spec_hash: str
+    arrays: PlanArrays
+    plan: PlanGraph  # arrays converted once, at the persistence boundary
+    plan_json: str  # indented, as stored on PlanGraphRow
+    canonical_hash: str
+    svg: str | None  # None with the compact renderer: it is streamed to the artifact (render.write_plan_svg)
+    candidate_report: dict | None
+    validation: PlanValidation
+
+
+def _memo_key(spec_hash: str) -> str:
+    # Layout, search and validation settings change the build for the same spec, so they are part of the key.
+    return ":".join(
+        [
+            spec_hash,
+            str(LAYOUT_VERSION),
+            settings.plan_layout_strategy.strip().lower(),
+            str(settings.plan_candidates),
+            str(settings.plan_candidate_budget_ms),
+            f"{settings.plan_min_coverage:g}",
+            f"{settings.plan_max_area_error:g}",
+            f"{PX_PER_FT:g}",
+            svg_renderer(),
+        ]
+    )
+
+
+def svg_renderer() -> str:
+    name = settings.plan_svg_renderer.strip().lower()
+    return name if name in RENDERERS else "legacy"
+
+
+class PlanMemo:
+    """Bounded LRU of plan builds keyed by canonical spec hash (plus layout settings)."""
+
+    def __init__(self, *, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._lock = Lock()
+        self._entries: OrderedDict[str, PlanBuild] = OrderedDict()
+        self.lookups = 0
+        self.hits = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> PlanBuild | None:
+        with self._lock:
+            self.lookups += 1
+            build = self._entries.get(key)
+            if build is not None:
+                self.hits += 1
+                self._entries.move_to_end(key)
+            return build
+
+    def put(self, key: str, build: PlanBuild) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = build
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "evictions": self.evictions,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.lookups = self.hits = self.evictions = 0
+
+
+memo = PlanMemo(max_entries=settings.plan_memo_max_entries)
+
+
+def build_plan(spec: HouseSpec) -> tuple[PlanBuild, bool]:
+    """
+    Lays out, validates and renders the spec, or returns the memoized build for an identical spec.
+    Returns (build, cached).
+    """
+    spec_hash = spec_digest(spec)
+    key = _memo_key(spec_hash)
+    cached = memo.get(key)
+    if cached is not None:
+        return cached, True
+
+    arrays, candidate_report = candidates.choose_layout(spec)
+    build = finish_build(spec, arrays, candidate_report=candidate_report, spec_hash=spec_hash)
+    memo.put(key, build)
+    return build, False
+
+
+def finish_build(
+    spec: HouseSpec, arrays: PlanArrays, *, candidate_report: dict | None = None, spec_hash: str | None = None
+) -> PlanBuild:
+    """Validates, renders and converts a laid-out plan; not memoized (see build_plan)."""
+    plan = arrays.to_graph()
+    return PlanBuild(
+        spec_hash=spec_hash or spec_digest(spec),
+        arrays=arrays,
+        plan=plan,
+        plan_json=plan.model_dump_json(indent=2),
+        canonical_hash=hashlib.sha256(plan.model_dump_json().encode("utf-8")).hexdigest(),
+        svg=render_plan_svg(arrays, px_per_ft=PX_PER_FT) if svg_renderer() == "legacy" else None,
+        candidate_report=candidate_report,
+        validation=validate_plan(arrays, spec),
+    )
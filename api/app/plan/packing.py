@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import math
+import random
+from dataclasses import dataclass
+
+import numpy as np
+
+from ..schemas import HouseSpec, HouseSpecRoom, PlanGraph
+from .arrays import PlanArrays
+from .geometry import derived_room_id
+
+HALL_WIDTH_FT = 4.0
+OUTLINE_ASPECT = 1.55  # width / height, close to the legacy 52x34 outline
+MAX_ROOM_ASPECT = 3.0
+# A plan with a room over MAX_ROOM_ASPECT is laid out again at other outline aspects from this range.
+ASPECT_RETRY_RANGE = (1.2, 2.2)
+ASPECT_RETRY_STEP = 0.05
+GRID_FT = 0.1
+
+PRIVATE_TYPES = frozenset({"bedroom", "bathroom", "laundry", "closet"})
+# Public rooms are laid out in this order so the kitchen sits between living and dining.
+_PUBLIC_ORDER = ("living", "kitchen", "dining", "pantry", "mudroom", "office")
+
+
+@dataclass(frozen=True)
+class PackOptions:
+    """Knobs for alternative layouts of the same spec; the defaults give the canonical layout."""
+
+    aspect: float = OUTLINE_ASPECT
+    mirror: bool = False  # private zone on the left instead of the right
+    seed: int | None = None  # swaps neighbouring rooms within each zone's preference order
+
+    @classmethod
+    def for_seed(cls, seed: int) -> "PackOptions":
+        if seed == 0:
+            return cls()
+        rng = random.Random(seed)
+        return cls(aspect=round(rng.uniform(1.2, 2.0), 3), mirror=rng.random() < 0.5, seed=seed)
+
+
+def _perturb(rooms: list[HouseSpecRoom], rng: random.Random) -> list[HouseSpecRoom]:
+    out = list(rooms)
+    for _ in range(len(out) // 2):
+        i = rng.randrange(len(out) - 1)
+        out[i], out[i + 1] = out[i + 1], out[i]
+    return out
+
+
+def _public_sequence(rooms: list[HouseSpecRoom]) -> list[HouseSpecRoom]:
+    rank = {t: i for i, t in enumerate(_PUBLIC_ORDER)}
+    return sorted(rooms, key=lambda r: rank.get(r.type, len(rank)))
+
+
+def _private_sequence(rooms: list[HouseSpecRoom]) -> list[HouseSpecRoom]:
+    # Interleave bedrooms and bathrooms so each bath lands next to a bedroom.
+    beds = [r for r in rooms if r.type == "bedroom"]
+    baths = [r for r in rooms if r.type == "bathroom"]
+    rest = [r for r in rooms if r.type not in {"bedroom", "bathroom"}]
+    out: list[HouseSpecRoom] = []
+    for i in range(max(len(beds), len(baths))):
+        out += beds[i : i + 1] + baths[i : i + 1]
+    return out + rest
+
+
+def squarify(areas: np.ndarray, x: float, y: float, w: float, h: float) -> np.ndarray:
+    """
+    Ordered squarified treemap: tiles the w x h box exactly with rectangles of the given areas,
+    keeping input order. Returns an (n, 4) array of x, y, w, h.
+
+    Each row grows while its worst aspect ratio improves; the worst ratio for every candidate
+    row length is computed at once from prefix sums and running min/max.
+    """
+    n = len(areas)
+    out = np.empty((n, 4))
+    i = 0
+    while i < n:
+        rest = areas[i:]
+        short = min(w, h)
+        sums = np.cumsum(rest)
+        thick2 = (sums / short) ** 2
+        worst = np.maximum(thick2 / np.minimum.accumulate(rest), np.maximum.accumulate(rest) / thick2)
+        worse = np.flatnonzero(np.diff(worst) > 0)
+        k = int(worse[0]) + 1 if worse.size else len(rest)
+        thick = sums[k - 1] / short
+        lengths = rest[:k] / thick
+        offsets = np.concatenate(([0.0], np.cumsum(lengths)[:-1]))
+        if w >= h:
+            # Column along the left edge of the remaining box.
+            out[i : i + k] = np.column_stack([np.full(k, x), y + offsets, np.full(k, thick), lengths])
+            x, w = x + thick, w - thick
+        else:
+            out[i : i + k] = np.column_stack([x + offsets, np.full(k, y), lengths, np.full(k, thick)])
+            y, h = y + thick, h - thick
+        i += k
+    return out
+
+
+def _aspect(rects: np.ndarray) -> np.ndarray:
+    w, h = rects[:, 2], rects[:, 3]
+    return np.maximum(w / h, h / w)
+
+
+def _pack_zone(rooms: list[HouseSpecRoom], x: float, w: float, h: float) -> tuple[list[HouseSpecRoom], np.ndarray]:
+    """Packs one zone in preference order, or by descending area if that breaks the aspect limit."""
+    if not rooms:
+        return [], np.empty((0, 4))
+    areas = np.array([max(1.0, r.area_ft2) for r in rooms])
+    rects = squarify(areas, x, 0.0, w, h)
+    if _aspect(rects).max() > MAX_ROOM_ASPECT:
+        order = np.argsort(-areas, kind="stable")
+        by_area = squarify(areas[order], x, 0.0, w, h)
+        if _aspect(by_area).max() < _aspect(rects).max():
+            rooms, rects = [rooms[i] for i in order], by_area
+    return rooms, rects
+
+
+@dataclass
+class _ZoneLayout:
+    outline_h: float
+    pub_w: float
+    priv_w: float
+    public: list[HouseSpecRoom]
+    pub_rects: np.ndarray
+    private: list[HouseSpecRoom]
+    priv_rects: np.ndarray
+
+    def worst_aspect(self) -> float:
+        rects = np.vstack([self.pub_rects, self.priv_rects])
+        return float(_aspect(rects).max()) if len(rects) else 1.0
+
+
+def _layout_zones(public: list[HouseSpecRoom], private: list[HouseSpecRoom], aspect: float) -> _ZoneLayout:
+    a_pub = float(sum(max(1.0, r.area_ft2) for r in public))
+    a_priv = float(sum(max(1.0, r.area_ft2) for r in private))
+    # Height solves aspect * H^2 - hall * H - area = 0, so W = area / H + hall keeps the aspect.
+    area = a_pub + a_priv
+    outline_h = (HALL_WIDTH_FT + math.sqrt(HALL_WIDTH_FT**2 + 4 * aspect * area)) / (2 * aspect)
+    pub_w = a_pub / outline_h
+    priv_w = a_priv / outline_h
+    public, pub_rects = _pack_zone(public, 0.0, pub_w, outline_h)
+    private, priv_rects = _pack_zone(private, pub_w + HALL_WIDTH_FT, priv_w, outline_h)
+    return _ZoneLayout(outline_h, pub_w, priv_w, public, pub_rects, private, priv_rects)
+
+
+def _retry_aspects(aspect: float) -> list[float]:
+    """The requested outline aspect first, then the others in ASPECT_RETRY_RANGE, nearest first."""
+    lo, hi = ASPECT_RETRY_RANGE
+    grid = np.round(np.arange(lo, hi + 1e-9, ASPECT_RETRY_STEP), 3).tolist()
+    return [aspect] + sorted((a for a in grid if a != aspect), key=lambda a: abs(a - aspect))
+
+
+def _snap(rects: np.ndarray) -> np.ndarray:
+    # Snap edges rather than sizes so rooms that share a wall keep sharing it exactly.
+    x0 = np.round(rects[:, 0] / GRID_FT) * GRID_FT
+    y0 = np.round(rects[:, 1] / GRID_FT) * GRID_FT
+    x1 = np.round((rects[:, 0] + rects[:, 2]) / GRID_FT) * GRID_FT
+    y1 = np.round((rects[:, 1] + rects[:, 3]) / GRID_FT) * GRID_FT
+    return np.round(np.column_stack([x0, y0, x1 - x0, y1 - y0]), 2)
+
+
+def pack_plan_arrays(spec: HouseSpec, options: PackOptions | None = None) -> PlanArrays:
+    """
+    Area-driven layout: the outline is sized from the total room area, then split into a public
+    zone, a full-height hall and a private zone, each tiled with every room at its requested area.
+
+    Coordinate system in feet:
+    - origin at top-left
+    - x to the right, y down
+    """
+    options = options or PackOptions()
+    warnings: list[str] = []
+    public = [r for r in spec.rooms if r.type not in PRIVATE_TYPES]
+    private = [r for r in spec.rooms if r.type in PRIVATE_TYPES]
+    if not any(r.type in {"living", "kitchen", "dining"} for r in public):
+        warnings.append("No public rooms (living/kitchen/dining) in spec; adding default Great Room.")
+        public.append(HouseSpecRoom(id=derived_room_id(spec, "default:living"), type="living", name="Great Room", area_ft2=320))
+    if not private:
+        warnings.append("No private rooms (bedroom/bathroom/laundry) in spec; adding defaults.")
+
+    public = _public_sequence(public)
+    private = _private_sequence(private)
+    if options.seed is not None:
+        rng = random.Random(options.seed)
+        public, private = _perturb(public, rng), _perturb(private, rng)
+
+    # Squarified zones can leave a sliver (typically the last, smallest room of a zone); another
+    # outline aspect reshapes the zones. Only if none works is the least bad layout kept, with a warning.
+    zones = None
+    for aspect in _retry_aspects(options.aspect):
+        attempt = _layout_zones(public, private, aspect)
+        if zones is None or attempt.worst_aspect() < zones.worst_aspect():
+            zones = attempt
+        if zones.worst_aspect() <= MAX_ROOM_ASPECT:
+            break
+    assert zones is not None
+    room_aspects = _aspect(np.vstack([zones.pub_rects, zones.priv_rects]))
+    for r, room_aspect in zip([*zones.public, *zones.private], room_aspects):
+        if room_aspect > MAX_ROOM_ASPECT:
+            warnings.append(f"Room '{r.name}' has aspect ratio {room_aspect:.1f} (limit {MAX_ROOM_ASPECT:.1f}).")
+    outline_h, pub_w, priv_w = zones.outline_h, zones.pub_w, zones.priv_w
+    public, pub_rects, private, priv_rects = zones.public, zones.pub_rects, zones.private, zones.priv_rects
+    hall_rect = np.array([[pub_w, 0.0, HALL_WIDTH_FT, outline_h]])
+
+    rects = np.vstack([pub_rects, hall_rect, priv_rects])
+    if options.mirror:
+        rects[:, 0] = pub_w + HALL_WIDTH_FT + priv_w - rects[:, 0] - rects[:, 2]
+    rects = _snap(rects)
+    hall = len(public)
+    hall_id = derived_room_id(spec, "hall")
+    hall_area = float(rects[hall, 2] * rects[hall, 3])
+    ordered = [*public, None, *private]
+
+    outline = np.array(
+        [0.0, 0.0, round(float((rects[:, 0] + rects[:, 2]).max()), 2), round(float((rects[:, 1] + rects[:, 3]).max()), 2)]
+    )
+    arr = PlanArrays.build(
+        outline=outline,
+        rects=rects,
+        ids=(r.id if r else hall_id for r in ordered),
+        types=(r.type if r else "hall" for r in ordered),
+        names=(r.name if r else "Hall" for r in ordered),
+        area_ft2=(r.area_ft2 if r else hall_area for r in ordered),
+        warnings=warnings,
+    )
+    arr.derive_edges()
+    return arr
+
+
+def pack_plan_graph(spec: HouseSpec, options: PackOptions | None = None) -> PlanGraph:
+    """pack_plan_arrays converted to the PlanGraph schema."""
+    return pack_plan_arrays(spec, options).to_graph()
@@ -1,25 +1,69 @@
 from __future__ import annotations
 
+import hashlib
 import html
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
 
 from ..schemas import PlanGraph
+from .adjacency import DOOR_WIDTH_FT
+from .arrays import PlanArrays, as_arrays
+
+RENDERERS = ("legacy", "compact")
+_CHUNK_ELEMENTS = 512  # elements per write in the streaming renderer
+
+
+@dataclass(frozen=True)
+class Theme:
+    background: str
+    room: str
+    ink: str  # walls, frame and labels
+
+
+THEMES = {
+    "light": Theme(background="#f8fafc", room="white", ink="#0f172a"),
+    "dark": Theme(background="#020617", room="#1e293b", ink="#e2e8f0"),
+    "print": Theme(background="white", room="white", ink="black"),
+}
+
 
+def _font_px(px_per_ft: float) -> str:
+    # 14 px at the stored 12 px/ft; labels grow with zoomed and print renders.
+    return f"{round(14 * px_per_ft / 12, 1):g}"
 
-def render_plan_svg(plan: PlanGraph, *, px_per_ft: float = 12.0) -> str:
-    w = int(plan.outline_ft.w * px_per_ft)
-    h = int(plan.outline_ft.h * px_per_ft)
+
+def _style(theme: Theme, px_per_ft: float) -> str:
+    return (
+        "<style>"
+        f".r{{fill:{theme.room};stroke:{theme.ink};stroke-width:2}}"
+        f".l{{font:{_font_px(px_per_ft)}px ui-sans-serif,system-ui;fill:{theme.ink};"
+        "text-anchor:middle;dominant-baseline:middle}"
+        f".d{{stroke:{theme.room};stroke-width:3}}"
+        "</style>"
+    )
+
+
+def render_plan_svg(plan: PlanGraph | PlanArrays, *, px_per_ft: float = 12.0, theme: str = "light") -> str:
+    arr = as_arrays(plan)
+    colors = THEMES[theme]
+    font = _font_px(px_per_ft)
+    w = int(arr.outline[2] * px_per_ft)
+    h = int(arr.outline[3] * px_per_ft)
 
     def _rect(x: float, y: float, rw: float, rh: float) -> str:
         return (
             f'<rect x="{x:.1f}" y="{y:.1f}" width="{rw:.1f}" height="{rh:.1f}" '
-            'fill="white" stroke="#0f172a" stroke-width="2"/>'
+            f'fill="{colors.room}" stroke="{colors.ink}" stroke-width="2"/>'
         )
 
     def _label(cx: float, cy: float, text: str) -> str:
         safe = html.escape(text)
         return (
             f'<text x="{cx:.1f}" y="{cy:.1f}" text-anchor="middle" dominant-baseline="middle" '
-            'font-family="ui-sans-serif, system-ui" font-size="14" fill="#0f172a">'
+            f'font-family="ui-sans-serif, system-ui" font-size="{font}" fill="{colors.ink}">'
             f"{safe}</text>"
         )
 
@@ -27,18 +71,109 @@ def render_plan_svg(plan: PlanGraph, *, px_per_ft: float = 12.0) -> str:
     parts.append(
         f'<svg xmlns="http://www.w3.org/2000/svg" width="{w}" height="{h}" viewBox="0 0 {w} {h}">'
     )
-    parts.append('<rect width="100%" height="100%" fill="#f8fafc"/>')
+    parts.append(f'<rect width="100%" height="100%" fill="{colors.background}"/>')
     parts.append(
-        f'<rect x="8" y="8" width="{w-16}" height="{h-16}" fill="none" stroke="#0f172a" stroke-width="3"/>'
+        f'<rect x="8" y="8" width="{w-16}" height="{h-16}" fill="none" stroke="{colors.ink}" stroke-width="3"/>'
     )
 
-    for r in plan.rooms:
-        x = 8 + r.rect_ft.x * px_per_ft
-        y = 8 + r.rect_ft.y * px_per_ft
-        rw = r.rect_ft.w * px_per_ft
-        rh = r.rect_ft.h * px_per_ft
+    px = arr.rects * px_per_ft
+    px[:, :2] += 8
+    for i, (x, y, rw, rh) in enumerate(px.tolist()):
         parts.append(_rect(x, y, rw, rh))
-        parts.append(_label(x + rw / 2, y + rh / 2, r.name))
+        parts.append(_label(x + rw / 2, y + rh / 2, arr.name(i)))
 
     parts.append("</svg>")
     return "\n".join(parts)
+
+
+def _num(v: float) -> str:
+    return _nums(np.array([v]))[0]
+
+
+def _nums(values: np.ndarray) -> list[str]:
+    """
+    Coordinates rounded to 0.1 px (below anything a viewer can show), without a trailing ".0".
+    Formatted from integer tenths, which is ~3x faster than float formatting per value.
+    """
+    tenths = np.rint(np.asarray(values, dtype=float) * 10).astype(np.int64).ravel().tolist()
+    return [f"{t // 10}.{t % 10}" if t % 10 else str(t // 10) for t in tenths]
+
+
+def iter_plan_svg_compact(
+    plan: PlanGraph | PlanArrays, *, px_per_ft: float = 12.0, theme: str = "light"
+) -> Iterator[str]:
+    """
+    Compact rendering of the same drawing, in chunks: shared styling lives in one <style> block
+    (classes instead of per-element attributes), door openings on shared walls are <use> references
+    to two <defs> glyphs, and coordinates are rounded to 0.1 px. Memory is bounded by the chunk size,
+    not the plan size.
+    """
+    arr = as_arrays(plan)
+    colors = THEMES[theme]
+    w = int(arr.outline[2] * px_per_ft)
+    h = int(arr.outline[3] * px_per_ft)
+    doors = arr.edge_doors[~np.isnan(arr.edge_doors[:, 0])] * px_per_ft
+    doors[:, :2] += 8
+    door_px = _num(DOOR_WIDTH_FT * px_per_ft) if len(doors) else None
+
+    head = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{w}" height="{h}" viewBox="0 0 {w} {h}">',
+        _style(colors, px_per_ft),
+    ]
+    if door_px is not None:
+        head.append(f'<defs><path id="dv" class="d" d="M0 0v{door_px}"/><path id="dh" class="d" d="M0 0h{door_px}"/></defs>')
+    head.append(f'<rect width="100%" height="100%" fill="{colors.background}"/>')
+    head.append(f'<rect x="8" y="8" width="{w-16}" height="{h-16}" fill="none" stroke="{colors.ink}" stroke-width="3"/>')
+    yield "\n".join(head) + "\n"
+
+    names = [html.escape(n) for n in arr.name_table]  # escaped once per distinct name
+    px = arr.rects * px_per_ft
+    px[:, :2] += 8
+    for lo in range(0, len(px), _CHUNK_ELEMENTS):
+        block = px[lo : lo + _CHUNK_ELEMENTS]
+        centers = block[:, :2] + block[:, 2:] / 2
+        cols = _nums(np.hstack([block, centers]))
+        codes = arr.name_codes[lo : lo + _CHUNK_ELEMENTS].tolist()
+        out = []
+        for k, code in enumerate(codes):
+            x, y, rw, rh, cx, cy = cols[6 * k : 6 * k + 6]
+            out.append(f'<rect class="r" x="{x}" y="{y}" width="{rw}" height="{rh}"/>')
+            out.append(f'<text class="l" x="{cx}" y="{cy}">{names[code]}</text>')
+        yield "\n".join(out) + "\n"
+
+    for lo in range(0, len(doors), _CHUNK_ELEMENTS):
+        block = doors[lo : lo + _CHUNK_ELEMENTS]
+        cols = _nums(block[:, :2])
+        glyphs = np.where(block[:, 2] == 0, "dv", "dh").tolist()
+        out = [f'<use href="#{g}" x="{cols[2 * k]}" y="{cols[2 * k + 1]}"/>' for k, g in enumerate(glyphs)]
+        yield "\n".join(out) + "\n"
+    yield "</svg>"
+
+
+def render_plan_svg_compact(plan: PlanGraph | PlanArrays, *, px_per_ft: float = 12.0, theme: str = "light") -> str:
+    return "".join(iter_plan_svg_compact(plan, px_per_ft=px_per_ft, theme=theme))
+
+
+def write_plan_svg(
+    plan: PlanGraph | PlanArrays, path: Path, *, px_per_ft: float = 12.0, renderer: str = "compact"
+) -> tuple[str, int]:
+    """
+    Writes the plan SVG to `path` (via a temp file, so readers never see a partial plan) and
+    returns (sha256, size) computed while writing. "compact" streams; "legacy" renders in memory.
+    """
+    chunks = (
+        iter_plan_svg_compact(plan, px_per_ft=px_per_ft)
+        if renderer == "compact"
+        else iter([render_plan_svg(plan, px_per_ft=px_per_ft)])
+    )
+    digest = hashlib.sha256()
+    size = 0
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("wb") as f:
+        for chunk in chunks:
+            data = chunk.encode("utf-8")
+            digest.update(data)
+            size += len(data)
+            f.write(data)
+    tmp.replace(path)
+    return digest.hexdigest(), size
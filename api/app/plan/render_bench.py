@@ -0,0 +1,74 @@
+"""
+Benchmark of the compact streaming SVG renderer against the legacy one on a large synthetic plan.
+
+Wall time and peak allocation depend on the machine and on what else is running, so they are
+measured here rather than asserted in the test suite:
+
+    python -m app.plan.render_bench --rooms 5000 --repeat 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+from .arrays import PlanArrays
+from .packing import squarify
+from .render import RENDERERS, write_plan_svg
+
+
+def synthetic_plan(n: int, *, seed: int = 1) -> PlanArrays:
+    """n squarified rooms of 20-300 ft² in a 700 ft wide outline, with doors derived."""
+    areas = np.random.default_rng(seed).uniform(20, 300, n)
+    width = 700.0
+    rects = np.round(squarify(areas, 0.0, 0.0, width, float(areas.sum() / width)), 2)
+    arr = PlanArrays.build(
+        outline=np.array([0.0, 0.0, width, areas.sum() / width]),
+        rects=rects,
+        ids=[str(i) for i in range(n)],
+        types=["bedroom"] * n,
+        names=[f"Room {i % 40}" for i in range(n)],
+        area_ft2=areas,
+    )
+    arr.derive_edges()
+    return arr
+
+
+def measure(arr: PlanArrays, renderer: str, dest: Path, *, repeat: int = 3) -> dict[str, float]:
+    write_plan_svg(arr, dest, renderer=renderer)  # warm up
+    times = []
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        write_plan_svg(arr, dest, renderer=renderer)
+        times.append((time.perf_counter() - t0) * 1000)
+    tracemalloc.start()
+    try:
+        write_plan_svg(arr, dest, renderer=renderer)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {"ms": round(min(times), 1), "bytes": dest.stat().st_size, "peak_bytes": peak}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Compare plan SVG renderers on a large synthetic plan.")
+    ap.add_argument("--rooms", type=int, default=5000)
+    ap.add_argument("--repeat", type=int, default=3, help="timed runs per renderer; the fastest is reported")
+    args = ap.parse_args()
+
+    arr = synthetic_plan(args.rooms)
+    n_doors = int((~np.isnan(arr.edge_doors[:, 0])).sum())
+    print(f"plan svg, {args.rooms} rooms + {n_doors} doors (compact only)")
+    with tempfile.TemporaryDirectory() as tmp:
+        for renderer in RENDERERS:
+            r = measure(arr, renderer, Path(tmp) / f"{renderer}.svg", repeat=args.repeat)
+            print(f"  {renderer:<8} {r['ms']:>8.1f} ms {r['bytes']:>11,} bytes {r['peak_bytes']:>12,} peak bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable
+
+from ..config import settings
+
+MIN_PX_PER_FT = 2.0
+MAX_PX_PER_FT = 96.0
+
+
+def normalize_scale(px_per_ft: float) -> float:
+    """Clamped and rounded to 0.5 px/ft, so near-identical zoom levels share a cache entry."""
+    return round(min(MAX_PX_PER_FT, max(MIN_PX_PER_FT, px_per_ft)) * 2) / 2
+
+
+def render_key(canonical_hash: str, px_per_ft: float, theme: str, renderer: str) -> str:
+    return f"{canonical_hash}:{px_per_ft:g}:{theme}:{renderer}"
+
+
+class RenderCache:
+    """
+    Bounded LRU of rendered plan SVG bytes keyed by (canonical_hash, scale, theme, renderer).
+    Bounded by entry count and by total bytes; one oversized render is returned but not kept.
+    """
+
+    def __init__(self, *, max_entries: int, max_bytes: int) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = Lock()
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._bytes = 0
+        self.lookups = 0
+        self.hits = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            self.lookups += 1
+            body = self._entries.get(key)
+            if body is not None:
+                self.hits += 1
+                self._entries.move_to_end(key)
+            return body
+
+    def put(self, key: str, body: bytes) -> None:
+        if self.max_entries <= 0 or len(body) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._entries[key] = body
+            self._bytes += len(body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def get_or_render(self, key: str, render: Callable[[], bytes]) -> tuple[bytes, bool]:
+        """Returns (body, cached). Concurrent misses on one key may both render; the output is identical."""
+        body = self.get(key)
+        if body is not None:
+            return body, True
+        body = render()
+        self.put(key, body)
+        return body, False
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "evictions": self.evictions,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.lookups = self.hits = self.evictions = 0
+
+
+cache = RenderCache(max_entries=settings.plan_render_cache_max_entries, max_bytes=settings.plan_render_cache_max_bytes)
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import io
+import struct
+import zlib
+from dataclasses import dataclass
+
+import numpy as np
+
+from ..schemas import PlanGraph
+from .arrays import PlanArrays, as_arrays
+
+try:  # WebP needs Pillow; PNG is encoded here with zlib alone
+    from PIL import Image
+except ImportError:  # pragma: no cover - depends on the environment
+    Image = None
+
+# Same palette as render_plan_svg: background, room fill, walls
+_PALETTE = np.array([(0xF8, 0xFA, 0xFC), (0xFF, 0xFF, 0xFF), (0x0F, 0x17, 0x2A)], dtype=np.float32)
+_ROOM, _INK = 1, 2
+_SUPERSAMPLE = 3
+_MIMES = {"png": "image/png", "webp": "image/webp"}
+
+
+@dataclass(frozen=True)
+class Thumbnail:
+    format: str  # png|webp
+    width: int
+    height: int
+    data: bytes
+
+    @property
+    def mime_type(self) -> str:
+        return _MIMES[self.format]
+
+
+def rasterize_plan(plan: PlanGraph | PlanArrays, *, width: int, px_per_ft: float = 12.0) -> np.ndarray:
+    """
+    Draws the plan as an RGB array `width` pixels wide: the SVG's frame, room fills and walls,
+    without labels (illegible at thumbnail size). Drawn as palette indices at 3x and box-filtered
+    into colours, so the supersampled canvas is one byte per pixel.
+    """
+    arr = as_arrays(plan)
+    svg_w, svg_h = arr.outline[2] * px_per_ft, arr.outline[3] * px_per_ft
+    height = max(1, round(width * svg_h / svg_w))
+    scale = width * _SUPERSAMPLE / svg_w
+    canvas = np.zeros((height * _SUPERSAMPLE, width * _SUPERSAMPLE), dtype=np.uint8)
+    ch, cw = canvas.shape[:2]
+
+    def _px(v: float) -> int:
+        return int(round(v * scale))
+
+    def _stroke(x0: float, y0: float, x1: float, y1: float, stroke: float) -> None:
+        t = max(1, _px(stroke / 2))
+        l, t0, r, b = _px(x0), _px(y0), _px(x1), _px(y1)
+        for ys, xs in (
+            (slice(t0 - t, t0 + t), slice(l - t, r + t)),
+            (slice(b - t, b + t), slice(l - t, r + t)),
+            (slice(t0 - t, b + t), slice(l - t, l + t)),
+            (slice(t0 - t, b + t), slice(r - t, r + t)),
+        ):
+            canvas[max(0, ys.start) : min(ch, ys.stop), max(0, xs.start) : min(cw, xs.stop)] = _INK
+
+    px = arr.rects * px_per_ft
+    px[:, :2] += 8
+    for x, y, rw, rh in px.tolist():
+        canvas[max(0, _px(y)) : _px(y + rh), max(0, _px(x)) : _px(x + rw)] = _ROOM
+        _stroke(x, y, x + rw, y + rh, 2)
+    _stroke(8, 8, svg_w - 8, svg_h - 8, 3)
+
+    ss = _SUPERSAMPLE
+    # Per output pixel, the share of subpixels in each palette colour (rows, then columns).
+    shares = []
+    for code in (_ROOM, _INK):
+        hits = (canvas == code).reshape(height, ss, width * ss).sum(axis=1, dtype=np.uint8)
+        shares.append(hits.reshape(height, width, ss).sum(axis=2, dtype=np.uint8))
+    room, ink = shares
+    counts = np.stack([ss * ss - room - ink, room, ink], axis=-1).astype(np.float32) / (ss * ss)
+    return np.rint(counts @ _PALETTE).astype(np.uint8)
+
+
+def encode_png(rgb: np.ndarray) -> bytes:
+    """Truecolor PNG with the "up" filter on every row, which suits flat rectangular drawings."""
+    h, w, _ = rgb.shape
+    rows = rgb.reshape(h, w * 3)
+    up = np.diff(rows, axis=0, prepend=np.zeros((1, w * 3), dtype=np.uint8))  # uint8 wraps mod 256
+    raw = np.empty((h, w * 3 + 1), dtype=np.uint8)
+    raw[:, 0] = 2
+    raw[:, 1:] = up
+
+    def _chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + _chunk(b"IHDR", struct.pack(">IIBBBBB", w, h, 8, 2, 0, 0, 0))
+        + _chunk(b"IDAT", zlib.compress(raw.tobytes(), 9))
+        + _chunk(b"IEND", b"")
+    )
+
+
+def encode_webp(rgb: np.ndarray, *, quality: int = 80) -> bytes | None:
+    """WebP bytes, or None when Pillow is not installed."""
+    if Image is None:
+        return None
+    buf = io.BytesIO()
+    Image.fromarray(rgb, "RGB").save(buf, "WEBP", quality=quality, method=6)
+    return buf.getvalue()
+
+
+def parse_formats(raw: str) -> list[str]:
+    return [f for f in dict.fromkeys(p.strip().lower() for p in raw.split(",")) if f in _MIMES]
+
+
+def render_thumbnails(
+    plan: PlanGraph | PlanArrays, *, width: int, formats: list[str], px_per_ft: float = 12.0, webp_quality: int = 80
+) -> list[Thumbnail]:
+    """One raster per requested format; formats whose encoder is unavailable are left out."""
+    rgb = rasterize_plan(plan, width=width, px_per_ft=px_per_ft)
+    h, w = rgb.shape[:2]
+    out: list[Thumbnail] = []
+    for fmt in formats:
+        data = encode_png(rgb) if fmt == "png" else encode_webp(rgb, quality=webp_quality)
+        if data is not None:
+            out.append(Thumbnail(format=fmt, width=w, height=h, data=data))
+    return out
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import bisect
+import heapq
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from ..config import settings
+from ..schemas import HouseSpec, PlanGraph
+from .arrays import PlanArrays, as_arrays
+
+_EPS_FT = 0.05
+_MIN_OVERLAP_FT2 = 0.25
+# Rooms this many times taller than the median (halls) are checked outside the sweep's y window.
+_TALL_FACTOR = 4.0
+
+
+@dataclass
+class PlanValidation:
+    result: str  # ok|warn|fail
+    coverage: float  # share of the outline covered by rooms
+    gap_ft2: float
+    area_error_mean: float
+    area_error_max: float
+    overlaps: list[tuple[str, str, float]] = field(default_factory=list)
+    outside: list[str] = field(default_factory=list)
+    missing: list[str] = field(default_factory=list)
+    issues: list[str] = field(default_factory=list)
+
+    def summary(self) -> dict:
+        return {
+            "result": self.result,
+            "coverage": self.coverage,
+            "gap_ft2": self.gap_ft2,
+            "area_error_mean": self.area_error_mean,
+            "area_error_max": self.area_error_max,
+            "overlaps": len(self.overlaps),
+            "outside": len(self.outside),
+            "missing": len(self.missing),
+        }
+
+
+def find_overlaps(rects: np.ndarray) -> list[tuple[int, int, float]]:
+    """
+    Sweep-line over x: rooms enter in x0 order and leave (via a heap on x1) once the sweep passes
+    their right edge. Rooms still in the sweep are kept sorted by y0, so each entering room
+    bisects straight to those whose y0 lies within one room height above it up to its bottom
+    edge, rather than scanning every room in the sweep (a whole column, in a stacked layout).
+
+    That window is only narrow if no room in the sweep is much taller than the rest, and a packed
+    plan always has a hall running the full outline height. Rooms taller than _TALL_FACTOR times
+    the median height are kept in a separate list that every entering room checks in full, and
+    the window for the others is bounded by the tallest of them. O(n log n + n * t) plus the
+    overlapping pairs, for t tall rooms in the sweep at once (a few halls).
+    """
+    x0, y0 = rects[:, 0].tolist(), rects[:, 1].tolist()
+    x1 = (rects[:, 0] + rects[:, 2]).tolist()
+    y1 = (rects[:, 1] + rects[:, 3]).tolist()
+    heights = rects[:, 3]
+    tall_mask = heights > _TALL_FACTOR * float(np.median(heights)) if len(rects) else np.zeros(0, dtype=bool)
+    tall = tall_mask.tolist()
+    max_h = float(heights[~tall_mask].max()) if len(rects) else 0.0  # never all tall: the median isn't
+    active: list[tuple[float, int]] = []  # (y0, index), sorted; rooms within the height bound
+    active_tall: set[int] = set()
+    expiry: list[tuple[float, int]] = []
+    out: list[tuple[int, int, float]] = []
+
+    def _check(i: int, j: int) -> None:
+        dy = min(y1[i], y1[j]) - max(y0[i], y0[j])
+        if dy <= _EPS_FT:
+            return
+        dx = min(x1[i], x1[j]) - max(x0[i], x0[j])
+        if dx * dy >= _MIN_OVERLAP_FT2:
+            out.append((j, i, float(dx * dy)))
+
+    for i in np.argsort(rects[:, 0], kind="stable").tolist():
+        while expiry and expiry[0][0] <= x0[i] + _EPS_FT:
+            j = heapq.heappop(expiry)[1]
+            if tall[j]:
+                active_tall.discard(j)
+            else:
+                del active[bisect.bisect_left(active, (y0[j], j))]
+        # A room can only overlap i in y if it starts above i's bottom edge and ends below its top.
+        lo = bisect.bisect_right(active, (y0[i] + _EPS_FT - max_h, len(x0)))
+        hi = bisect.bisect_left(active, (y1[i] - _EPS_FT, -1))
+        for _, j in active[lo:hi]:
+            _check(i, j)
+        for j in sorted(active_tall):
+            _check(i, j)
+        if tall[i]:
+            active_tall.add(i)
+        else:
+            bisect.insort(active, (y0[i], i))
+        heapq.heappush(expiry, (x1[i], i))
+    return out
+
+
+def validate_plan(plan: PlanGraph | PlanArrays, spec: HouseSpec | None = None) -> PlanValidation:
+    """
+    Geometric checks: overlapping rooms and rooms outside `outline_ft` fail the plan (as do spec
+    rooms missing from it); low coverage, area drift vs. area_ft2 or layout warnings make it "warn".
+    """
+    arr = as_arrays(plan)
+    if not len(arr):
+        return PlanValidation(
+            result="fail", coverage=0.0, gap_ft2=0.0, area_error_mean=0.0, area_error_max=0.0, issues=["no rooms"]
+        )
+    rects = arr.rects
+    ox, oy, ow, oh = arr.outline.tolist()
+    ox1, oy1 = ox + ow, oy + oh
+
+    outside_mask = (
+        (rects[:, 0] < ox - _EPS_FT)
+        | (rects[:, 1] < oy - _EPS_FT)
+        | (arr.x1 > ox1 + _EPS_FT)
+        | (arr.y1 > oy1 + _EPS_FT)
+    )
+    outside = [arr.ids[i] for i in np.flatnonzero(outside_mask)]
+    overlaps = [(arr.ids[a], arr.ids[b], round(area, 2)) for a, b, area in find_overlaps(rects)]
+
+    # Union area inside the outline (pairwise overlaps subtracted; triple overlaps are rare and already a fail).
+    cx0 = np.clip(rects[:, 0], ox, ox1)
+    cy0 = np.clip(rects[:, 1], oy, oy1)
+    cx1 = np.clip(arr.x1, ox, ox1)
+    cy1 = np.clip(arr.y1, oy, oy1)
+    covered = float(((cx1 - cx0) * (cy1 - cy0)).sum()) - sum(a for _, _, a in overlaps)
+    outline_area = max(1e-9, ow * oh)
+    coverage = min(1.0, max(0.0, covered / outline_area))
+
+    sized = ~arr.mask("hall") & (arr.area_ft2 > 0)
+    if sized.any():
+        target = arr.area_ft2[sized]
+        rel = np.abs(arr.areas[sized] - target) / target
+        area_error_mean, area_error_max = float(rel.mean()), float(rel.max())
+    else:
+        area_error_mean = area_error_max = 0.0
+
+    missing = []
+    if spec is not None:
+        placed = set(arr.ids)
+        missing = [r.id for r in spec.rooms if r.id not in placed]
+
+    issues: list[str] = []
+    for a, b, area in overlaps[:5]:
+        issues.append(f"rooms {a} and {b} overlap by {area:.1f} ft2")
+    if outside:
+        issues.append(f"{len(outside)} room(s) extend outside the outline")
+    if missing:
+        issues.append(f"{len(missing)} spec room(s) missing from the plan")
+
+    if overlaps or outside or missing:
+        result = "fail"
+    elif (
+        arr.warnings
+        or coverage < settings.plan_min_coverage
+        or area_error_max > settings.plan_max_area_error
+    ):
+        result = "warn"
+    else:
+        result = "ok"
+    return PlanValidation(
+        result=result,
+        coverage=round(coverage, 4),
+        gap_ft2=round(max(0.0, outline_area - covered), 2),
+        area_error_mean=round(area_error_mean, 4),
+        area_error_max=round(area_error_max, 4),
+        overlaps=overlaps,
+        outside=outside,
+        missing=missing,
+        issues=issues,
+    )
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import zlib
+from pathlib import Path
+from typing import Callable, Iterator
+
+from .config import settings
+
+try:  # brotli is optional; without it only gzip siblings are written
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+# Text artifacts worth compressing; rasters are already compressed.
+COMPRESSIBLE_MIMES = frozenset({"image/svg+xml", "application/json", "text/plain"})
+SUFFIXES = {"br": ".br", "gzip": ".gz"}
+_PREFERENCE = ("br", "gzip")  # br is ~15-25% smaller on SVG/JSON
+_READ_CHUNK = 64 * 1024
+
+
+def _compressor(encoding: str) -> tuple[Callable[[bytes], bytes], Callable[[], bytes]] | None:
+    """(feed, finish) for an incremental compressor, or None if the encoding is unavailable."""
+    if encoding == "gzip":
+        # wbits=31 writes a gzip container; zlib leaves mtime at 0, so equal input gives equal bytes.
+        z = zlib.compressobj(9, zlib.DEFLATED, 31)
+        return z.compress, z.flush
+    if encoding == "br" and brotli is not None:
+        b = brotli.Compressor(quality=11)
+        return b.process, b.finish
+    return None
+
+
+def variant_path(path: Path, encoding: str) -> Path:
+    return path.with_name(path.name + SUFFIXES[encoding])
+
+
+def _chunks(path: Path, data: bytes | None) -> Iterator[bytes]:
+    if data is not None:
+        yield data
+        return
+    with path.open("rb") as f:
+        while chunk := f.read(_READ_CHUNK):
+            yield chunk
+
+
+def write_variants(path: Path, mime: str, data: bytes | None = None) -> dict[str, int]:
+    """
+    Writes precompressed siblings (plan.svg.br, plan.svg.gz) next to an artifact and returns
+    {encoding: size_bytes} for the ones kept. Reads `path` in chunks unless the bytes are given;
+    variants that do not save space are not kept.
+    """
+    if not settings.artifact_precompress_enabled or mime not in COMPRESSIBLE_MIMES:
+        return {}
+    size = len(data) if data is not None else path.stat().st_size
+    if size < settings.artifact_precompress_min_bytes:
+        return {}
+    compressors = {enc: c for enc in _PREFERENCE if (c := _compressor(enc)) is not None}
+    tmps = {enc: path.with_name(variant_path(path, enc).name + ".tmp") for enc in compressors}
+    files = {enc: tmp.open("wb") for enc, tmp in tmps.items()}
+    try:
+        for chunk in _chunks(path, data):
+            for enc, (feed, _) in compressors.items():
+                files[enc].write(feed(chunk))
+        for enc, (_, finish) in compressors.items():
+            files[enc].write(finish())
+    finally:
+        for f in files.values():
+            f.close()
+    out: dict[str, int] = {}
+    for enc, tmp in tmps.items():
+        packed = tmp.stat().st_size
+        if packed < size:
+            tmp.replace(variant_path(path, enc))
+            out[enc] = packed
+        else:
+            tmp.unlink()
+    return out
+
+
+def _accepted(header: str | None) -> dict[str, float]:
+    q: dict[str, float] = {}
+    for part in (header or "").split(","):
+        token, *params = [p.strip() for p in part.split(";")]
+        if not token:
+            continue
+        weight = 1.0
+        for p in params:
+            if p.lower().startswith("q="):
+                try:
+                    weight = float(p[2:])
+                except ValueError:
+                    weight = 0.0
+        q[token.lower()] = weight
+    return q
+
+
+def negotiate(accept_encoding: str | None, available: dict[str, int] | list[str]) -> str | None:
+    """
+    Picks a precompressed encoding from Accept-Encoding (q-values and "*" honoured), preferring
+    br over gzip; None means serve the identity bytes.
+    """
+    q = _accepted(accept_encoding)
+    wildcard = q.get("*", 0.0)
+    best: tuple[float, int] | None = None
+    choice = None
+    for rank, encoding in enumerate(_PREFERENCE):
+        if encoding not in available:
+            continue
+        weight = q.get(encoding, q.get("x-gzip", wildcard) if encoding == "gzip" else wildcard)
+        if weight <= 0:
+            continue
+        key = (weight, -rank)
+        if best is None or key > best:
+            best, choice = key, encoding
+    return choice
@@ -1,10 +1,30 @@
 from __future__ import annotations
 
+import hashlib
 from dataclasses import dataclass, field
 from abc import ABC, abstractmethod
-from typing import Any
+from pathlib import Path
+from typing import Any, Callable
 
-from ..schemas import HouseSpec
+from ..schemas import HouseSpec, HouseSpecRoom
+
+# Exterior renderings a job can ask for, with the framing appended to the image prompt.
+EXTERIOR_VIEWS: dict[str, str] = {
+    "front": "Daylight. 3/4 front view.",
+    "rear": "Daylight. Rear view from the back yard.",
+    "street": "Daylight. Straight-on view from the street.",
+    "aerial": "Daylight. Aerial view from 45 degrees above.",
+    "dusk": "Dusk with warm interior lighting. 3/4 front view.",
+    "night": "Night with interior and landscape lighting. 3/4 front view.",
+}
+DEFAULT_EXTERIOR_VIEW = "front"
+
+
+def exterior_view_prompt(prompt: str, view: str) -> str:
+    """Prompt for providers without native view support: the framing is folded into the brief."""
+    if view == DEFAULT_EXTERIOR_VIEW:
+        return prompt
+    return f"{prompt}. {EXTERIOR_VIEWS[view]}"
 
 
 @dataclass
@@ -33,14 +53,60 @@ class ProviderImageResult:
     meta: ProviderMeta
 
 
+@dataclass
+class ProviderImageFile:
+    path: Path
+    mime_type: str
+    checksum_sha256: str
+    size_bytes: int
+    meta: ProviderMeta
+
+
 class Provider(ABC):
     @abstractmethod
     def generate_house_spec(
         self, *, prompt: str, bedrooms: int, bathrooms: int, style: str
     ) -> ProviderSpecResult: ...
 
+    def stream_house_spec(
+        self,
+        *,
+        prompt: str,
+        bedrooms: int,
+        bathrooms: int,
+        style: str,
+        on_room: Callable[[HouseSpecRoom], None],
+    ) -> ProviderSpecResult:
+        """
+        Like generate_house_spec, but calls on_room for each room as soon as it is known.
+        Providers without a streaming endpoint replay the rooms of the finished spec.
+        """
+        result = self.generate_house_spec(prompt=prompt, bedrooms=bedrooms, bathrooms=bathrooms, style=style)
+        for room in result.spec.rooms:
+            on_room(room)
+        return result
+
     @abstractmethod
     def maybe_generate_exterior_image(self, *, prompt: str, style: str) -> ProviderImageResult | None:
         """
         Returns an image payload or None if not available.
         """
+
+    def write_exterior_image(
+        self, *, prompt: str, style: str, dest: Path, view: str = DEFAULT_EXTERIOR_VIEW
+    ) -> ProviderImageFile | None:
+        """
+        Writes the exterior image to `dest` and returns its checksum/size, or None if not available.
+        Providers that can stream the payload override this to avoid holding the image in memory.
+        """
+        result = self.maybe_generate_exterior_image(prompt=exterior_view_prompt(prompt, view), style=style)
+        if result is None:
+            return None
+        dest.write_bytes(result.image_bytes)
+        return ProviderImageFile(
+            path=dest,
+            mime_type=result.mime_type,
+            checksum_sha256=hashlib.sha256(result.image_bytes).hexdigest(),
+            size_bytes=len(result.image_bytes),
+            meta=result.meta,
+        )
@@ -0,0 +1,283 @@
+"""
+Local Gemini-compatible fake server for offline load and reliability testing.
+
+Implements the `generateContent` / `streamGenerateContent` / `cachedContents` surface used by
+GeminiProvider with configurable latency distributions, error mixes, 429 bursts (with Retry-After)
+and large image payloads. Point GEMINI_BASE_URL at it (and set any GEMINI_API_KEY):
+
+    python -m app.providers.fake_server --port 8089 --spec-latency lognormal:6.5:0.4 --error-rate 0.02
+    GEMINI_BASE_URL=http://127.0.0.1:8089/v1beta GEMINI_API_KEY=fake uvicorn app.main:app
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import json
+import math
+import random
+import re
+import struct
+import threading
+import time
+import uuid
+import zlib
+from dataclasses import dataclass, field
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+from ..faults import LatencyDistribution
+
+_ROUTE = re.compile(r"^(?P<prefix>.*)/models/(?P<model>[^/:]+):(?P<method>generateContent|streamGenerateContent)$")
+_CACHED_CONTENTS = re.compile(r"^(?P<prefix>.*)/cachedContents$")
+_CONSTRAINTS = re.compile(r"bedrooms=(?P<bed>\d+),\s*bathrooms=(?P<bath>\d+),\s*style=(?P<style>[\w-]+)")
+
+
+@dataclass
+class FakeServerConfig:
+    spec_latency: LatencyDistribution = field(default_factory=LatencyDistribution)
+    image_latency: LatencyDistribution = field(default_factory=LatencyDistribution)
+    error_rate: float = 0.0
+    error_codes: tuple[int, ...] = (500, 503)
+    burst_429_every: int = 0  # every N requests start a burst of 429s (0 disables)
+    burst_429_len: int = 0
+    retry_after_s: int = 2
+    image_bytes: int = 256 * 1024
+    stream_chunk_chars: int = 64
+    seed: int = 0
+
+
+def _png_chunk(tag: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+
+@lru_cache(maxsize=4)
+def _image_payload_b64(target_bytes: int, seed: int) -> str:
+    # A valid (decodable) RGB PNG of roughly `target_bytes`; stored deflate keeps the size predictable.
+    side = max(8, int(math.sqrt(max(1, target_bytes) / 3)))
+    rng = random.Random(seed)
+    rows = b"".join(b"\x00" + rng.randbytes(side * 3) for _ in range(side))
+    ihdr = struct.pack(">IIBBBBB", side, side, 8, 2, 0, 0, 0)
+    png = (
+        b"\x89PNG\r\n\x1a\n"
+        + _png_chunk(b"IHDR", ihdr)
+        + _png_chunk(b"IDAT", zlib.compress(rows, 0))
+        + _png_chunk(b"IEND", b"")
+    )
+    return base64.b64encode(png).decode("ascii")
+
+
+def _spec_text(body: dict[str, Any]) -> str:
+    from .mock import MockProvider
+
+    texts = [
+        p.get("text", "")
+        for c in body.get("contents", [])
+        for p in c.get("parts", [])
+        if isinstance(p, dict)
+    ]
+    joined = "\n".join(texts)
+    m = _CONSTRAINTS.search(joined)
+    bedrooms = int(m.group("bed")) if m else 3
+    bathrooms = int(m.group("bath")) if m else 2
+    style = m.group("style") if m else "contemporary"
+    spec = MockProvider().generate_house_spec(prompt=joined, bedrooms=bedrooms, bathrooms=bathrooms, style=style).spec
+    return spec.model_dump_json()
+
+
+class FakeGeminiServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], config: FakeServerConfig) -> None:
+        super().__init__(address, _Handler)
+        self.config = config
+        self._lock = threading.Lock()
+        self._rng = random.Random(config.seed)
+        self.requests_total = 0
+        self.responses_by_status: dict[int, int] = {}
+        self.cached_contents: dict[str, dict[str, Any]] = {}
+        self.last_body: dict[str, Any] = {}
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1beta"
+
+    def next_decision(self, *, is_image: bool) -> tuple[int | None, float]:
+        """Returns (forced error status or None, latency seconds) for the next request."""
+        cfg = self.config
+        with self._lock:
+            n = self.requests_total
+            self.requests_total += 1
+            dist = cfg.image_latency if is_image else cfg.spec_latency
+            latency_s = dist.sample_ms(self._rng) / 1000.0
+            if cfg.burst_429_every > 0 and n % cfg.burst_429_every < cfg.burst_429_len:
+                return 429, latency_s
+            if cfg.error_rate > 0 and self._rng.random() < cfg.error_rate:
+                return self._rng.choice(cfg.error_codes), latency_s
+            return None, latency_s
+
+    def count(self, status: int) -> None:
+        with self._lock:
+            self.responses_by_status[status] = self.responses_by_status.get(status, 0) + 1
+
+    def start_in_thread(self) -> threading.Thread:
+        t = threading.Thread(target=self.serve_forever, daemon=True)
+        t.start()
+        return t
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: FakeGeminiServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        return
+
+    def _send_json(self, status: int, payload: dict[str, Any], headers: dict[str, str] | None = None) -> None:
+        raw = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(raw)))
+        self.send_header("x-request-id", f"fake-{uuid.uuid4()}")
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(raw)
+        self.server.count(status)
+
+    def _read_body(self) -> dict[str, Any]:
+        length = int(self.headers.get("content-length") or 0)
+        raw = self.rfile.read(length) if length else b"{}"
+        try:
+            val = json.loads(raw)
+        except json.JSONDecodeError:
+            return {}
+        return val if isinstance(val, dict) else {}
+
+    def do_POST(self) -> None:  # noqa: N802
+        path = self.path.split("?", 1)[0]
+        m = _ROUTE.match(path)
+        body = self._read_body()
+        if _CACHED_CONTENTS.match(path):
+            self._create_cached_content(body)
+            return
+        if not m:
+            self._send_json(404, {"error": {"code": 404, "message": f"Unknown route {path}"}})
+            return
+        self.server.last_body = body
+        cached = body.get("cachedContent")
+        if cached and cached not in self.server.cached_contents:
+            self._send_json(404, {"error": {"code": 404, "message": f"CachedContent not found: {cached}"}})
+            return
+        modalities = body.get("generationConfig", {}).get("responseModalities") or []
+        is_image = "IMAGE" in modalities
+        status, latency_s = self.server.next_decision(is_image=is_image)
+        if latency_s > 0:
+            time.sleep(latency_s)
+        if status is not None:
+            headers = {"retry-after": str(self.server.config.retry_after_s)} if status == 429 else None
+            self._send_json(status, {"error": {"code": status, "message": "Injected by fake server"}}, headers)
+            return
+        if is_image:
+            self._send_image()
+        elif m.group("method") == "streamGenerateContent":
+            self._send_spec_stream(body)
+        else:
+            usage = {"promptTokenCount": 180, "candidatesTokenCount": 420, "totalTokenCount": 600}
+            if cached:
+                usage["cachedContentTokenCount"] = self.server.cached_contents[cached]["tokens"]
+                usage["promptTokenCount"] += usage["cachedContentTokenCount"]
+                usage["totalTokenCount"] += usage["cachedContentTokenCount"]
+            text = _spec_text(body)
+            self._send_json(200, {"candidates": [{"content": {"parts": [{"text": text}]}}], "usageMetadata": usage})
+
+    def _create_cached_content(self, body: dict[str, Any]) -> None:
+        name = f"cachedContents/fake-{uuid.uuid4().hex[:12]}"
+        entry = {"name": name, "model": body.get("model"), "ttl": body.get("ttl")}
+        instruction = body.get("systemInstruction") or {}
+        text = "".join(p.get("text", "") for p in instruction.get("parts", []))
+        self.server.cached_contents[name] = {**entry, "systemInstruction": instruction, "tokens": len(text) // 4}
+        self._send_json(200, entry)
+
+    def _send_spec_stream(self, body: dict[str, Any]) -> None:
+        text = _spec_text(body)
+        step = max(1, self.server.config.stream_chunk_chars)
+        self.send_response(200)
+        self.send_header("content-type", "text/event-stream")
+        self.send_header("transfer-encoding", "chunked")
+        self.end_headers()
+        for i in range(0, len(text), step):
+            event: dict[str, Any] = {"candidates": [{"content": {"parts": [{"text": text[i : i + step]}]}}]}
+            if i + step >= len(text):
+                event["usageMetadata"] = {"promptTokenCount": 180, "candidatesTokenCount": 420, "totalTokenCount": 600}
+            data = f"data: {json.dumps(event)}\r\n\r\n".encode("utf-8")
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+        self.server.count(200)
+
+    def _send_image(self) -> None:
+        cfg = self.server.config
+        payload = _image_payload_b64(cfg.image_bytes, cfg.seed)
+        head = '{"candidates": [{"content": {"parts": [{"inlineData": {"mimeType": "image/png", "data": "'
+        tail = '"}}]}}], "usageMetadata": {"promptTokenCount": 40, "candidatesTokenCount": 1290, "totalTokenCount": 1330}}'
+        self.send_response(200)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(head) + len(payload) + len(tail)))
+        self.send_header("x-request-id", f"fake-{uuid.uuid4()}")
+        self.end_headers()
+        self.wfile.write(head.encode("ascii"))
+        block = 256 * 1024
+        for i in range(0, len(payload), block):
+            self.wfile.write(payload[i : i + block].encode("ascii"))
+        self.wfile.write(tail.encode("ascii"))
+        self.server.count(200)
+
+
+def serve(config: FakeServerConfig, *, host: str = "127.0.0.1", port: int = 0) -> FakeGeminiServer:
+    """Binds the server (port 0 picks a free port); call serve_forever() or start_in_thread()."""
+    return FakeGeminiServer((host, port), config)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Gemini-compatible fake server for offline load tests.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8089)
+    ap.add_argument("--spec-latency", default="fixed:0", help="e.g. lognormal:6.5:0.4 (ms)")
+    ap.add_argument("--image-latency", default="fixed:0", help="e.g. uniform:4000:12000 (ms)")
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--error-codes", default="500,503")
+    ap.add_argument("--burst-429-every", type=int, default=0)
+    ap.add_argument("--burst-429-len", type=int, default=0)
+    ap.add_argument("--retry-after", type=int, default=2)
+    ap.add_argument("--image-bytes", type=int, default=256 * 1024)
+    ap.add_argument("--stream-chunk-chars", type=int, default=64)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    config = FakeServerConfig(
+        spec_latency=LatencyDistribution.parse(args.spec_latency),
+        image_latency=LatencyDistribution.parse(args.image_latency),
+        error_rate=args.error_rate,
+        error_codes=tuple(int(c) for c in args.error_codes.split(",") if c.strip()),
+        burst_429_every=args.burst_429_every,
+        burst_429_len=args.burst_429_len,
+        retry_after_s=args.retry_after,
+        image_bytes=args.image_bytes,
+        stream_chunk_chars=args.stream_chunk_chars,
+        seed=args.seed,
+    )
+    server = serve(config, host=args.host, port=args.port)
+    print(f"fake gemini listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
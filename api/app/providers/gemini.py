@@ -1,18 +1,38 @@
 from __future__ import annotations
 
+import binascii
+import hashlib
+import itertools
 import json
 import time
-from typing import Any
+import uuid
+from functools import lru_cache
+from pathlib import Path
+from threading import Lock
+from typing import Any, Callable
 
 import httpx
 
+from .. import faults
 from ..config import settings
-from ..schemas import HouseSpec
-from .base import Provider, ProviderImageResult, ProviderMeta, ProviderSpecResult
+from ..schemas import HouseSpec, HouseSpecRoom
+from .base import (
+    DEFAULT_EXTERIOR_VIEW,
+    EXTERIOR_VIEWS,
+    Provider,
+    ProviderImageFile,
+    ProviderImageResult,
+    ProviderMeta,
+    ProviderSpecResult,
+)
+from .jsonstream import JsonStreamScanner
+from .templates import STYLE_TEMPLATES, build_template_spec
 
 
+@lru_cache(maxsize=1)
 def _house_spec_json_schema() -> dict[str, Any]:
     # This is passed to Gemini as responseJsonSchema. Keep it minimal and strict.
+    # Built once; callers must treat it as read-only.
     return {
         "type": "object",
         "required": ["version", "style", "bedrooms", "bathrooms", "rooms"],
@@ -39,75 +59,339 @@ def _house_spec_json_schema() -> dict[str, Any]:
     }
 
 
-class GeminiProvider(Provider):
+_SPEC_SYSTEM_PROMPT = (
+    "You are an architecture drafting assistant. "
+    "Return ONLY valid JSON matching the provided schema. "
+    "Use unique stable room ids (uuid strings) and realistic areas in ft^2."
+)
+
+_EXAMPLE_IDS = uuid.UUID("5f0c8a52-6f3e-4d7a-9a51-2c1d0e7b4a90")
+
+
+def _spec_example(style: str) -> str:
+    # Ids are derived from the style, so the text (and the cached prefix) is identical across processes.
+    ids = (str(uuid.uuid5(_EXAMPLE_IDS, f"{style}/{i}")) for i in itertools.count())
+    spec = build_template_spec(prompt="", bedrooms=3, bathrooms=2, style=style, id_factory=lambda: next(ids))
+    return (
+        f"User prompt: a 3 bedroom {style.replace('_', ' ')} home\n"
+        f"Constraints: bedrooms=3, bathrooms=2, style={style}\n"
+        f"Response: {spec.model_dump_json()}"
+    )
+
+
+@lru_cache(maxsize=1)
+def _spec_system_text() -> str:
+    """
+    The system turn: instructions, the response schema and one worked example per style template.
+    Everything in it is static, which is what makes it worth caching; it is large enough to clear the
+    provider's minimum cacheable size on Flash models.
+    """
+    return "\n\n".join(
+        [
+            _SPEC_SYSTEM_PROMPT,
+            "Response schema:\n" + json.dumps(_house_spec_json_schema(), separators=(",", ":")),
+            "Room areas should stay close to these examples for the same style and room type.",
+            *(f"Example {i + 1}:\n{_spec_example(style)}" for i, style in enumerate(STYLE_TEMPLATES)),
+        ]
+    )
+
+
+# Rough text-to-token ratio; JSON tokenizes denser than this, so the estimate errs low.
+_CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=1)
+def _spec_prefix_tokens() -> int:
+    """Estimated size of the cacheable spec prefix (the system turn), in tokens."""
+    return len(_spec_system_text()) // _CHARS_PER_TOKEN
+
+
+@lru_cache(maxsize=1)
+def _spec_request_template() -> dict[str, Any]:
+    # The static part of every spec request (system turn + generation config), built once and shared.
+    return {
+        "systemInstruction": {"parts": [{"text": _spec_system_text()}]},
+        "generationConfig": {
+            "temperature": 0.2,
+            "responseMimeType": "application/json",
+            "responseJsonSchema": _house_spec_json_schema(),
+        },
+    }
+
+
+class _SpecPrefixCache:
+    """
+    Tracks one `cachedContents` entry per model holding the static spec system turn, so spec calls
+    reference it instead of re-sending it. Creation failures disable caching for that model until
+    the cooldown passes. Prefixes below the provider's minimum are never sent here (see
+    GeminiProvider._spec_cached_content).
+    """
+
     def __init__(self) -> None:
+        self._lock = Lock()
+        self._entries: dict[str, tuple[str, float]] = {}
+        self._disabled_until: dict[str, float] = {}
+
+    def get(self, client: httpx.Client, model: str) -> str | None:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(model)
+            if entry and entry[1] > now:
+                return entry[0]
+            if self._disabled_until.get(model, 0.0) > now:
+                return None
+        ttl = max(60, settings.gemini_spec_cache_ttl_seconds)
+        try:
+            r = client.post(
+                f"{settings.gemini_base_url}/cachedContents",
+                params={"key": settings.gemini_api_key},
+                json={
+                    "model": f"models/{model}",
+                    "systemInstruction": _spec_request_template()["systemInstruction"],
+                    "ttl": f"{ttl}s",
+                },
+            )
+            r.raise_for_status()
+            name = r.json().get("name")
+        except (httpx.HTTPError, ValueError):
+            name = None
+        with self._lock:
+            if not name:
+                self._disabled_until[model] = now + ttl
+                return None
+            # Refresh a little before the provider expires the entry.
+            self._entries[model] = (name, now + ttl * 0.9)
+        return name
+
+    def invalidate(self, model: str) -> None:
+        with self._lock:
+            self._entries.pop(model, None)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._disabled_until.clear()
+
+
+_spec_prefix_cache = _SpecPrefixCache()
+
+
+_INLINE_PATHS = [
+    ("candidates", "*", "content", "parts", "*", "inlineData"),
+    ("candidates", "*", "content", "parts", "*", "inline_data"),
+]
+
+
+class _Base64FileSink:
+    """Decodes base64 text piecewise straight into a file, hashing as it goes."""
+
+    def __init__(self, fp) -> None:
+        self._fp = fp
+        self._rem = ""
+        self._sha = hashlib.sha256()
+        self.size_bytes = 0
+
+    def _write(self, raw: bytes) -> None:
+        self._fp.write(raw)
+        self._sha.update(raw)
+        self.size_bytes += len(raw)
+
+    def feed(self, text: str) -> None:
+        data = self._rem + "".join(text.split())
+        cut = len(data) - len(data) % 4
+        self._rem = data[cut:]
+        if cut:
+            self._write(binascii.a2b_base64(data[:cut]))
+
+    def close(self) -> str:
+        if self._rem:
+            self._write(binascii.a2b_base64(self._rem + "=" * (-len(self._rem) % 4)))
+            self._rem = ""
+        return self._sha.hexdigest()
+
+
+def _candidate_text(data: dict[str, Any], default: str = "") -> str:
+    return (
+        data.get("candidates", [{}])[0]
+        .get("content", {})
+        .get("parts", [{}])[0]
+        .get("text", default)
+    )
+
+
+def _iter_sse_events(r: httpx.Response, *, fault_point: str = "provider.spec"):
+    # Server-sent events: `data:` lines accumulate until a blank line terminates the event.
+    data_lines: list[str] = []
+    for line in faults.injector.drip(fault_point, r.iter_lines()):
+        if not line:
+            if data_lines:
+                yield json.loads("\n".join(data_lines))
+                data_lines = []
+            continue
+        if line.startswith("data:"):
+            data_lines.append(line[5:].strip())
+    if data_lines:
+        yield json.loads("\n".join(data_lines))
+
+
+class GeminiProvider(Provider):
+    def __init__(self, *, transport: httpx.BaseTransport | None = None) -> None:
         if not settings.gemini_api_key:
             raise RuntimeError("GEMINI_API_KEY is not set")
+        self._transport = transport
+
+    def _client(self) -> httpx.Client:
+        return httpx.Client(timeout=60, transport=self._transport)
+
+    def _meta(self, *, model: str, r: httpx.Response, t0: float, usage: dict[str, Any]) -> ProviderMeta:
+        req_id = r.headers.get("x-goog-request-id") or r.headers.get("x-request-id")
+        return ProviderMeta(
+            provider="gemini",
+            model=model,
+            request_id=req_id,
+            latency_ms=int((time.perf_counter() - t0) * 1000),
+            input_tokens=usage.get("promptTokenCount"),
+            output_tokens=usage.get("candidatesTokenCount"),
+            total_tokens=usage.get("totalTokenCount"),
+            image_tokens=usage.get("imageTokenCount"),
+            raw={"usageMetadata": usage},
+        )
 
     def _generate_content(self, *, model: str, body: dict[str, Any]) -> tuple[dict[str, Any], ProviderMeta]:
         url = f"{settings.gemini_base_url}/models/{model}:generateContent"
         params = {"key": settings.gemini_api_key}
         t0 = time.perf_counter()
-        with httpx.Client(timeout=60) as client:
+        with self._client() as client:
             r = client.post(url, params=params, json=body)
             r.raise_for_status()
             data = r.json()
-            usage = data.get("usageMetadata", {})
-            req_id = r.headers.get("x-goog-request-id") or r.headers.get("x-request-id")
-            meta = ProviderMeta(
-                provider="gemini",
-                model=model,
-                request_id=req_id,
-                latency_ms=int((time.perf_counter() - t0) * 1000),
-                input_tokens=usage.get("promptTokenCount"),
-                output_tokens=usage.get("candidatesTokenCount"),
-                total_tokens=usage.get("totalTokenCount"),
-                image_tokens=usage.get("imageTokenCount"),
-                raw={"usageMetadata": usage},
-            )
-            return data, meta
+            return data, self._meta(model=model, r=r, t0=t0, usage=data.get("usageMetadata", {}))
 
-    def generate_house_spec(
-        self, *, prompt: str, bedrooms: int, bathrooms: int, style: str
-    ) -> ProviderSpecResult:
-        system = (
-            "You are an architecture drafting assistant. "
-            "Return ONLY valid JSON matching the provided schema. "
-            "Use unique stable room ids (uuid strings) and realistic areas in ft^2."
-        )
+    def _stream_generate_content(
+        self, *, model: str, body: dict[str, Any], on_text: Callable[[str], None]
+    ) -> ProviderMeta:
+        url = f"{settings.gemini_base_url}/models/{model}:streamGenerateContent"
+        params = {"key": settings.gemini_api_key, "alt": "sse"}
+        t0 = time.perf_counter()
+        usage: dict[str, Any] = {}
+        with self._client() as client:
+            with client.stream("POST", url, params=params, json=body) as r:
+                r.raise_for_status()
+                for event in _iter_sse_events(r):
+                    if event.get("usageMetadata"):
+                        usage = event["usageMetadata"]
+                    text = _candidate_text(event)
+                    if text:
+                        on_text(text)
+                meta = self._meta(model=model, r=r, t0=t0, usage=usage)
+        meta.raw["streamed"] = True
+        return meta
+
+    def _house_spec_body(
+        self, *, prompt: str, bedrooms: int, bathrooms: int, style: str, cached_content: str | None = None
+    ) -> dict[str, Any]:
         user = (
             f"User prompt: {prompt}\n"
             f"Constraints: bedrooms={bedrooms}, bathrooms={bathrooms}, style={style}\n"
             "Include core public rooms (living, kitchen, dining) and the requested bedrooms/bathrooms.\n"
         )
-        body = {
-            "contents": [
-                {"role": "user", "parts": [{"text": system}]},
-                {"role": "user", "parts": [{"text": user}]},
-            ],
-            "generationConfig": {
-                "temperature": 0.2,
-                "responseMimeType": "application/json",
-                "responseJsonSchema": _house_spec_json_schema(),
-            },
+        template = _spec_request_template()
+        body: dict[str, Any] = {
+            "contents": [{"role": "user", "parts": [{"text": user}]}],
+            "generationConfig": template["generationConfig"],
         }
-        data, meta = self._generate_content(model=settings.gemini_text_model, body=body)
-        txt = (
-            data.get("candidates", [{}])[0]
-            .get("content", {})
-            .get("parts", [{}])[0]
-            .get("text", "{}")
-        )
+        if cached_content:
+            body["cachedContent"] = cached_content
+        else:
+            body["systemInstruction"] = template["systemInstruction"]
+        return body
+
+    def _spec_cached_content(self, model: str) -> str | None:
+        if not settings.gemini_spec_cache_enabled:
+            return None
+        # The provider rejects (or bills without benefit) prefixes below its minimum cacheable size.
+        if _spec_prefix_tokens() < settings.gemini_spec_cache_min_tokens:
+            return None
+        with self._client() as client:
+            return _spec_prefix_cache.get(client, model)
+
+    def _with_spec_prefix(self, model: str, call: Callable[[str | None], Any]) -> Any:
+        # Calls `call(cached_content_name)`; if the cache entry expired server-side, retries inline once.
+        cached = self._spec_cached_content(model)
+        try:
+            return call(cached)
+        except httpx.HTTPStatusError as e:
+            if not cached or e.response.status_code not in {400, 403, 404}:
+                raise
+            _spec_prefix_cache.invalidate(model)
+            return call(None)
+
+    def generate_house_spec(
+        self, *, prompt: str, bedrooms: int, bathrooms: int, style: str, model: str | None = None
+    ) -> ProviderSpecResult:
+        model = model or settings.gemini_text_model
+
+        def _call(cached: str | None) -> tuple[dict[str, Any], ProviderMeta]:
+            body = self._house_spec_body(
+                prompt=prompt, bedrooms=bedrooms, bathrooms=bathrooms, style=style, cached_content=cached
+            )
+            data, meta = self._generate_content(model=model, body=body)
+            if cached:
+                meta.raw["cached_content"] = cached
+            return data, meta
+
+        data, meta = self._with_spec_prefix(model, _call)
+        txt = _candidate_text(data, "{}")
         try:
             obj = json.loads(txt)
         except json.JSONDecodeError as e:
             raise RuntimeError(f"Gemini returned non-JSON: {e}: {txt[:200]}") from e
         return ProviderSpecResult(spec=HouseSpec.model_validate(obj), meta=meta)
 
-    def maybe_generate_exterior_image(self, *, prompt: str, style: str) -> ProviderImageResult | None:
-        # Optional. We keep this conservative because many environments won't have API keys.
-        # When enabled, we request IMAGE output and accept common image payload keys.
-        body = {
+    def stream_house_spec(
+        self,
+        *,
+        prompt: str,
+        bedrooms: int,
+        bathrooms: int,
+        style: str,
+        on_room: Callable[[HouseSpecRoom], None],
+        model: str | None = None,
+    ) -> ProviderSpecResult:
+        model = model or settings.gemini_text_model
+        parts: list[str] = []
+
+        def _on_value(_path, value) -> None:
+            # Raising here (bad room) aborts the stream and closes the connection early.
+            on_room(HouseSpecRoom.model_validate(value))
+
+        scanner = JsonStreamScanner(capture=[("rooms", "*")], on_value=_on_value)
+
+        def _on_text(text: str) -> None:
+            parts.append(text)
+            scanner.feed(text)
+
+        def _call(cached: str | None) -> ProviderMeta:
+            body = self._house_spec_body(
+                prompt=prompt, bedrooms=bedrooms, bathrooms=bathrooms, style=style, cached_content=cached
+            )
+            meta = self._stream_generate_content(model=model, body=body, on_text=_on_text)
+            if cached:
+                meta.raw["cached_content"] = cached
+            return meta
+
+        meta = self._with_spec_prefix(model, _call)
+        txt = "".join(parts) or "{}"
+        try:
+            obj = json.loads(txt)
+        except json.JSONDecodeError as e:
+            raise RuntimeError(f"Gemini returned non-JSON: {e}: {txt[:200]}") from e
+        return ProviderSpecResult(spec=HouseSpec.model_validate(obj), meta=meta)
+
+    def _exterior_image_body(
+        self, *, prompt: str, style: str, view: str = DEFAULT_EXTERIOR_VIEW
+    ) -> dict[str, Any]:
+        return {
             "contents": [
                 {
                     "role": "user",
@@ -117,7 +401,7 @@ class GeminiProvider(Provider):
                                 "Generate a photorealistic exterior rendering for a single-family home. "
                                 f"Style: {style}. "
                                 f"Brief: {prompt}. "
-                                "No text or watermark. Daylight. 3/4 front view."
+                                f"No text or watermark. {EXTERIOR_VIEWS[view]}"
                             )
                         }
                     ],
@@ -129,6 +413,13 @@ class GeminiProvider(Provider):
                 "imageConfig": {"aspectRatio": "16:9", "imageSize": "1K"},
             },
         }
+
+    def maybe_generate_exterior_image(
+        self, *, prompt: str, style: str, view: str = DEFAULT_EXTERIOR_VIEW
+    ) -> ProviderImageResult | None:
+        # Optional. We keep this conservative because many environments won't have API keys.
+        # When enabled, we request IMAGE output and accept common image payload keys.
+        body = self._exterior_image_body(prompt=prompt, style=style, view=view)
         data, meta = self._generate_content(model=settings.gemini_image_model_preview, body=body)
         parts = data.get("candidates", [{}])[0].get("content", {}).get("parts", [])
         for part in parts:
@@ -143,3 +434,59 @@ class GeminiProvider(Provider):
                     meta=meta,
                 )
         return None
+
+    def write_exterior_image(
+        self, *, prompt: str, style: str, dest: Path, view: str = DEFAULT_EXTERIOR_VIEW
+    ) -> ProviderImageFile | None:
+        # Parses the response incrementally and decodes the inline payload straight to disk, so
+        # worker memory stays flat regardless of image size.
+        model = settings.gemini_image_model_preview
+        body = self._exterior_image_body(prompt=prompt, style=style, view=view)
+        url = f"{settings.gemini_base_url}/models/{model}:generateContent"
+        params = {"key": settings.gemini_api_key}
+        found: dict[str, Any] = {}
+        t0 = time.perf_counter()
+        try:
+            with dest.open("wb") as fp:
+                sink = _Base64FileSink(fp)
+
+                def _on_value(path, value) -> None:
+                    if path == ("usageMetadata",):
+                        found["usage"] = value
+                    elif "mime" not in found:
+                        found["mime"] = value
+
+                def _on_string_chunk(path, text: str) -> None:
+                    # Only the first inline payload is kept.
+                    if found.setdefault("data_path", path) == path:
+                        sink.feed(text)
+
+                scanner = JsonStreamScanner(
+                    capture=[("usageMetadata",)]
+                    + [p + (k,) for p in _INLINE_PATHS for k in ("mimeType", "mime_type")],
+                    on_value=_on_value,
+                    stream=[p + ("data",) for p in _INLINE_PATHS],
+                    on_string_chunk=_on_string_chunk,
+                )
+                with self._client() as client:
+                    with client.stream("POST", url, params=params, json=body) as r:
+                        r.raise_for_status()
+                        for text in faults.injector.drip("provider.image", r.iter_text()):
+                            scanner.feed(text)
+                        scanner.close()
+                        meta = self._meta(model=model, r=r, t0=t0, usage=found.get("usage", {}))
+                checksum = sink.close()
+        except Exception:
+            dest.unlink(missing_ok=True)
+            raise
+        if "data_path" not in found:
+            dest.unlink(missing_ok=True)
+            return None
+        meta.raw["streamed"] = True
+        return ProviderImageFile(
+            path=dest,
+            mime_type=found.get("mime") or "image/png",
+            checksum_sha256=checksum,
+            size_bytes=sink.size_bytes,
+            meta=meta,
+        )
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import time
+from collections import deque
+from threading import Lock
+
+from ..config import settings
+
+
+class ProviderHealth:
+    """
+    Circuit breaker over recent live-provider spec calls.
+
+    Trips when, over the last `degraded_window_seconds` (and at least `degraded_min_samples` calls),
+    the transient error rate or the p90 latency of successful calls crosses its threshold. While
+    tripped, jobs are served by the local template path; after the cooldown the window restarts
+    empty and live traffic decides whether to trip again.
+    """
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._samples: deque[tuple[float, bool, int | None]] = deque(maxlen=4096)
+        self._open_until = 0.0
+        self._reason: str | None = None
+        self.trips = 0
+
+    def record(self, *, ok: bool, latency_ms: int | None, now: float | None = None) -> None:
+        with self._lock:
+            self._samples.append((now if now is not None else time.monotonic(), ok, latency_ms))
+
+    def check(self, *, now: float | None = None) -> str | None:
+        """Returns the reason the provider is considered unhealthy, or None."""
+        now = now if now is not None else time.monotonic()
+        with self._lock:
+            if now < self._open_until:
+                return self._reason
+            cutoff = now - settings.degraded_window_seconds
+            while self._samples and self._samples[0][0] < cutoff:
+                self._samples.popleft()
+            n = len(self._samples)
+            if n < max(1, settings.degraded_min_samples):
+                return None
+            errors = sum(1 for _, ok, _ in self._samples if not ok)
+            latencies = sorted(lat for _, ok, lat in self._samples if ok and lat is not None)
+            p90 = latencies[min(len(latencies) - 1, int(0.9 * len(latencies)))] if latencies else None
+            reason = None
+            if errors / n >= settings.degraded_error_rate:
+                reason = f"provider_error_rate {errors}/{n}"
+            elif p90 is not None and p90 >= settings.degraded_latency_p90_ms:
+                reason = f"provider_latency_p90 {p90}ms"
+            if reason is None:
+                return None
+            self._open_until = now + settings.degraded_cooldown_seconds
+            self._reason = reason
+            self._samples.clear()
+            self.trips += 1
+            return reason
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            degraded = now < self._open_until
+            return {
+                "degraded": degraded,
+                "reason": self._reason if degraded else None,
+                "retry_in_seconds": round(self._open_until - now, 1) if degraded else None,
+                "samples": len(self._samples),
+                "trips": self.trips,
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._samples.clear()
+            self._open_until = 0.0
+            self._reason = None
+            self.trips = 0
+
+
+tracker = ProviderHealth()
+
+
+def merge_snapshots(a: dict, b: dict) -> dict:
+    """Combines two processes' breaker snapshots: degraded if either is, with the longer wait."""
+    open_ = [s for s in (a, b) if s.get("degraded")]
+    worst = max(open_, key=lambda s: s.get("retry_in_seconds") or 0.0) if open_ else None
+    return {
+        "degraded": worst is not None,
+        "reason": worst["reason"] if worst else None,
+        "retry_in_seconds": worst["retry_in_seconds"] if worst else None,
+        "samples": a.get("samples", 0) + b.get("samples", 0),
+        "trips": a.get("trips", 0) + b.get("trips", 0),
+    }
@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Callable
+
+# Path elements are object keys (str) or array indices (int). Patterns use "*" to match any array index.
+JsonPath = tuple[str | int, ...]
+
+_WS = " \t\r\n"
+_LITERAL_END = ",}] \t\r\n"
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+def _path_matches(pattern: tuple[str, ...], path: JsonPath) -> bool:
+    if len(pattern) != len(path):
+        return False
+    for want, got in zip(pattern, path):
+        if want == "*":
+            if not isinstance(got, int):
+                return False
+        elif want != got:
+            return False
+    return True
+
+
+class _Frame:
+    __slots__ = ("kind", "key", "index", "expect_key")
+
+    def __init__(self, kind: str) -> None:
+        self.kind = kind  # obj|arr
+        self.key: str | None = None
+        self.index = -1
+        self.expect_key = kind == "obj"
+
+
+class JsonStreamScanner:
+    """
+    Incremental (push) JSON scanner.
+
+    Feed text chunks as they arrive; every complete value whose path matches one of the
+    `capture` patterns is parsed and handed to `on_value(path, value)` immediately, without
+    waiting for the rest of the document. Only the captured sub-values are buffered.
+
+    String values matching a `stream` pattern are never buffered: their decoded contents are
+    passed to `on_string_chunk(path, text)` piecewise, which keeps memory flat for huge payloads
+    such as inline base64 images.
+    """
+
+    def __init__(
+        self,
+        *,
+        capture: list[tuple[str, ...]] | None = None,
+        on_value: Callable[[JsonPath, Any], None] | None = None,
+        stream: list[tuple[str, ...]] | None = None,
+        on_string_chunk: Callable[[JsonPath, str], None] | None = None,
+    ) -> None:
+        self._capture = [tuple(p) for p in capture or []]
+        self._on_value = on_value
+        self._stream = [tuple(p) for p in stream or []]
+        self._on_string_chunk = on_string_chunk
+        self._streaming: JsonPath | None = None
+        self._unicode_hex: str | None = None
+        self._stack: list[_Frame] = []
+        self._in_string = False
+        self._string_is_key = False
+        self._escape = False
+        self._key_parts: list[str] = []
+        self._in_literal = False
+        self._capturing: JsonPath | None = None
+        self._capture_depth = 0
+        self._capture_parts: list[str] = []
+        self._done = False
+
+    @property
+    def done(self) -> bool:
+        return self._done
+
+    def _path(self) -> JsonPath:
+        out: list[str | int] = []
+        for f in self._stack:
+            if f.kind == "obj":
+                if f.key is not None:
+                    out.append(f.key)
+            else:
+                out.append(f.index)
+        return tuple(out)
+
+    def _begin_value(self, *, is_string: bool = False) -> None:
+        if self._stack and self._stack[-1].kind == "arr":
+            self._stack[-1].index += 1
+        if self._capturing is None and (self._capture or (is_string and self._stream)):
+            path = self._path()
+            if is_string and any(_path_matches(p, path) for p in self._stream):
+                self._streaming = path
+            elif any(_path_matches(p, path) for p in self._capture):
+                self._capturing = path
+                self._capture_depth = len(self._stack)
+                self._capture_parts = []
+
+    def _end_value(self) -> None:
+        if self._capturing is not None and len(self._stack) == self._capture_depth:
+            raw = "".join(self._capture_parts)
+            path = self._capturing
+            self._capturing = None
+            self._capture_parts = []
+            if self._on_value is not None:
+                self._on_value(path, json.loads(raw))
+        if not self._stack:
+            self._done = True
+
+    def _emit(self, text: str) -> None:
+        if self._capturing is not None:
+            self._capture_parts.append(text)
+
+    def _stream_text(self, text: str) -> None:
+        if text and self._on_string_chunk is not None and self._streaming is not None:
+            self._on_string_chunk(self._streaming, text)
+
+    def _feed_streamed_string(self, chunk: str, i: int) -> int:
+        # Returns the index just past the consumed input.
+        n = len(chunk)
+        while i < n:
+            if self._unicode_hex is not None:
+                take = min(4 - len(self._unicode_hex), n - i)
+                self._unicode_hex += chunk[i : i + take]
+                i += take
+                if len(self._unicode_hex) == 4:
+                    self._stream_text(chr(int(self._unicode_hex, 16)))
+                    self._unicode_hex = None
+                continue
+            if self._escape:
+                self._escape = False
+                c = chunk[i]
+                i += 1
+                if c == "u":
+                    self._unicode_hex = ""
+                else:
+                    self._stream_text(_ESCAPES.get(c, c))
+                continue
+            q = chunk.find('"', i)
+            b = chunk.find("\\", i, q if q >= 0 else n)
+            if b >= 0:
+                self._stream_text(chunk[i:b])
+                self._escape = True
+                i = b + 1
+                continue
+            if q < 0:
+                self._stream_text(chunk[i:])
+                return n
+            self._stream_text(chunk[i:q])
+            self._in_string = False
+            self._streaming = None
+            self._end_value()
+            return q + 1
+        return i
+
+    def feed(self, chunk: str) -> None:
+        i = 0
+        n = len(chunk)
+        while i < n:
+            if self._in_string and self._streaming is not None:
+                i = self._feed_streamed_string(chunk, i)
+                continue
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                    self._emit(chunk[i])
+                    if self._string_is_key:
+                        self._key_parts.append(chunk[i])
+                    i += 1
+                    continue
+                q = chunk.find('"', i)
+                b = chunk.find("\\", i, q if q >= 0 else n)
+                j = b if b >= 0 else q
+                if j < 0:
+                    seg = chunk[i:]
+                    self._emit(seg)
+                    if self._string_is_key:
+                        self._key_parts.append(seg)
+                    return
+                seg = chunk[i : j + 1]
+                self._emit(seg)
+                if chunk[j] == "\\":
+                    self._escape = True
+                    if self._string_is_key:
+                        self._key_parts.append(seg)
+                    i = j + 1
+                    continue
+                self._in_string = False
+                if self._string_is_key:
+                    self._key_parts.append(chunk[i:j])
+                    self._stack[-1].key = json.loads('"' + "".join(self._key_parts) + '"')
+                    self._key_parts = []
+                else:
+                    self._end_value()
+                i = j + 1
+                continue
+
+            if self._in_literal:
+                j = i
+                while j < n and chunk[j] not in _LITERAL_END:
+                    j += 1
+                self._emit(chunk[i:j])
+                if j == n:
+                    return
+                self._in_literal = False
+                self._end_value()
+                i = j
+                continue
+
+            c = chunk[i]
+            i += 1
+            if c in _WS:
+                continue
+            top = self._stack[-1] if self._stack else None
+            if c == '"':
+                if top is not None and top.kind == "obj" and top.expect_key:
+                    self._string_is_key = True
+                    self._key_parts = []
+                else:
+                    self._string_is_key = False
+                    self._begin_value(is_string=True)
+                self._in_string = True
+                if self._streaming is None:
+                    self._emit(c)
+            elif c == ":":
+                self._emit(c)
+                if top is not None:
+                    top.expect_key = False
+            elif c == ",":
+                self._emit(c)
+                if top is not None and top.kind == "obj":
+                    top.expect_key = True
+                    top.key = None
+            elif c in "{[":
+                self._begin_value()
+                self._emit(c)
+                self._stack.append(_Frame("obj" if c == "{" else "arr"))
+            elif c in "}]":
+                self._emit(c)
+                if self._stack:
+                    self._stack.pop()
+                self._end_value()
+            else:
+                self._begin_value()
+                self._emit(c)
+                self._in_literal = True
+
+    def close(self) -> None:
+        if self._in_literal:
+            self._in_literal = False
+            self._end_value()
@@ -1,14 +1,13 @@
 from __future__ import annotations
 
-import re
 import uuid
 from threading import Lock
 
 import httpx
 
 from ..config import settings
-from ..schemas import HouseSpec, HouseSpecRoom
 from .base import Provider, ProviderImageResult, ProviderMeta, ProviderSpecResult
+from .templates import build_template_spec
 
 
 _counter_lock = Lock()
@@ -68,33 +67,12 @@ class MockProvider(Provider):
         if _should_inject("spec", call_index):
             _raise_transient("spec", call_index)
 
-        # Light prompt parsing so users see some "AI-like" behavior without any API keys.
-        p = prompt.lower()
-        if re.search(r"farmhouse|modern farmhouse", p):
-            style = "modern_farmhouse"
-        elif re.search(r"hill country", p):
-            style = "hill_country"
-        elif re.search(r"midcentury|mid-century", p):
-            style = "midcentury_modern"
-
-        rooms: list[HouseSpecRoom] = []
-        rooms.append(HouseSpecRoom(id=str(uuid.uuid4()), type="living", name="Great Room", area_ft2=320))
-        rooms.append(HouseSpecRoom(id=str(uuid.uuid4()), type="kitchen", name="Kitchen", area_ft2=220))
-        rooms.append(HouseSpecRoom(id=str(uuid.uuid4()), type="dining", name="Dining", area_ft2=160))
-        rooms.append(HouseSpecRoom(id=str(uuid.uuid4()), type="laundry", name="Laundry", area_ft2=70))
-
-        rooms.append(HouseSpecRoom(id=str(uuid.uuid4()), type="bedroom", name="Primary Bedroom", area_ft2=240))
-        for i in range(max(0, bedrooms - 1)):
-            rooms.append(HouseSpecRoom(id=str(uuid.uuid4()), type="bedroom", name=f"Bedroom {i+2}", area_ft2=150))
-
-        for i in range(bathrooms):
-            rooms.append(HouseSpecRoom(id=str(uuid.uuid4()), type="bathroom", name=f"Bathroom {i+1}", area_ft2=70))
-
+        # Light prompt parsing + per-style templates so users see some "AI-like" behavior without any API keys.
         notes = [
             "Mock provider: set GEMINI_API_KEY to enable real model-driven specs and exterior images.",
             "This spec is authoritative; images (when enabled) are presentation-only.",
         ]
-        spec = HouseSpec(style=style, bedrooms=bedrooms, bathrooms=bathrooms, rooms=rooms, notes=notes)
+        spec = build_template_spec(prompt=prompt, bedrooms=bedrooms, bathrooms=bathrooms, style=style, notes=notes)
         meta = ProviderMeta(
             provider="mock",
             model="mock-house-spec",
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+from .. import telemetry
+from ..config import settings
+
+SPEC_EVENT = "house_spec"
+DEFAULT_TIER = "free"
+
+
+@dataclass(frozen=True)
+class SpecRoute:
+    model: str
+    # Highest request complexity this model is trusted with; None means no limit.
+    max_complexity: int | None = None
+
+    def covers(self, complexity: int) -> bool:
+        return self.max_complexity is None or complexity <= self.max_complexity
+
+
+@dataclass
+class RoutingDecision:
+    model: str
+    reason: str
+    complexity: int
+    plan_tier: str
+    skipped: list[dict] = field(default_factory=list)
+
+    def as_meta(self) -> dict:
+        return {
+            "model": self.model,
+            "reason": self.reason,
+            "complexity": self.complexity,
+            "plan_tier": self.plan_tier,
+            "skipped": self.skipped,
+        }
+
+
+@lru_cache(maxsize=8)
+def _parse_routes(raw: str) -> tuple[SpecRoute, ...]:
+    try:
+        val = json.loads(raw)
+    except Exception:
+        return ()
+    if not isinstance(val, list):
+        return ()
+    out = []
+    for item in val:
+        if isinstance(item, dict) and isinstance(item.get("model"), str):
+            mc = item.get("max_complexity")
+            out.append(SpecRoute(model=item["model"], max_complexity=int(mc) if mc is not None else None))
+    return tuple(out)
+
+
+@lru_cache(maxsize=8)
+def _parse_tier_policy(raw: str) -> dict[str, frozenset[str]]:
+    try:
+        val = json.loads(raw)
+    except Exception:
+        return {}
+    if not isinstance(val, dict):
+        return {}
+    return {str(k): frozenset(v) for k, v in val.items() if isinstance(v, list)}
+
+
+def routes_for_tier(plan_tier: str | None) -> tuple[SpecRoute, ...]:
+    """Configured routes the tier may use; unknown tiers get the default tier's policy."""
+    routes = _parse_routes(settings.spec_routing_models_json)
+    policy = _parse_tier_policy(settings.spec_routing_tier_policy_json)
+    allowed = policy.get(plan_tier or DEFAULT_TIER, policy.get(DEFAULT_TIER))
+    if allowed is None:
+        return routes
+    return tuple(r for r in routes if r.model in allowed)
+
+
+def request_complexity(*, prompt: str, bedrooms: int, bathrooms: int) -> int:
+    """Rough size of the spec we are asking for: one point per room requested and per 150 prompt chars."""
+    return bedrooms + bathrooms + len(prompt) // 150
+
+
+def _blended_price(model: str) -> float:
+    prices = telemetry.price_table().get(model)
+    if prices is None:
+        return float("inf")
+    return float(prices.get("input_per_mtok", 0)) + float(prices.get("output_per_mtok", 0))
+
+
+def _unhealthy(stats: dict) -> bool:
+    if stats["calls"] + stats["errors"] < max(1, settings.spec_routing_min_samples):
+        return False
+    if stats["error_rate"] > settings.spec_routing_max_error_rate:
+        return True
+    p90 = stats["latency_p90_ms"]
+    return p90 is not None and p90 > settings.spec_routing_max_p90_ms
+
+
+def route_spec_model(*, prompt: str, bedrooms: int, bathrooms: int, plan_tier: str | None) -> RoutingDecision:
+    """
+    Pick the spec model for one request.
+
+    Models able to handle the request's complexity are tried cheapest first (by the telemetry price
+    table); if all of them look unhealthy in the live telemetry window, less capable models are tried
+    from the most capable down. When every allowed model is unhealthy the cheapest capable one is used
+    anyway, since failing over to nothing is worse than a slow call.
+    """
+    tier = plan_tier or DEFAULT_TIER
+    complexity = request_complexity(prompt=prompt, bedrooms=bedrooms, bathrooms=bathrooms)
+    routes = routes_for_tier(tier)
+    if not routes:
+        return RoutingDecision(
+            model=settings.gemini_text_model, reason="no_routes", complexity=complexity, plan_tier=tier
+        )
+
+    capable = sorted((r for r in routes if r.covers(complexity)), key=lambda r: _blended_price(r.model))
+    weaker = [r for r in reversed(routes) if not r.covers(complexity)]
+    skipped: list[dict] = []
+    for route in capable + weaker:
+        stats = telemetry.registry.model_stats(model=route.model, event_type=SPEC_EVENT)
+        if _unhealthy(stats):
+            skipped.append(
+                {"model": route.model, "error_rate": round(stats["error_rate"], 3), "latency_p90_ms": stats["latency_p90_ms"]}
+            )
+            continue
+        if route.covers(complexity):
+            reason = "cheapest_capable"
+        else:
+            reason = "fallback_unhealthy" if skipped else "most_capable_allowed"
+        return RoutingDecision(
+            model=route.model, reason=reason, complexity=complexity, plan_tier=tier, skipped=skipped
+        )
+
+    first = (capable + weaker)[0]
+    return RoutingDecision(
+        model=first.model, reason="all_unhealthy", complexity=complexity, plan_tier=tier, skipped=skipped
+    )
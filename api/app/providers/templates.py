@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import re
+import uuid
+from dataclasses import dataclass, field
+from typing import Callable
+
+from ..schemas import HouseSpec, HouseSpecRoom
+
+
+@dataclass(frozen=True)
+class TemplateRoom:
+    type: str
+    name: str
+    area_ft2: float
+
+
+@dataclass(frozen=True)
+class StyleTemplate:
+    style: str
+    public: tuple[TemplateRoom, ...]
+    service: tuple[TemplateRoom, ...]
+    primary_bedroom_ft2: float
+    bedroom_ft2: float
+    primary_bath_ft2: float
+    bath_ft2: float
+    # Extra rooms unlocked once the house reaches this many bedrooms.
+    extras_by_bedrooms: tuple[tuple[int, TemplateRoom], ...] = ()
+    notes: tuple[str, ...] = field(default_factory=tuple)
+
+
+_CORE_SERVICE = (TemplateRoom("laundry", "Laundry", 70),)
+
+STYLE_TEMPLATES: dict[str, StyleTemplate] = {
+    "contemporary": StyleTemplate(
+        style="contemporary",
+        public=(
+            TemplateRoom("living", "Great Room", 320),
+            TemplateRoom("kitchen", "Kitchen", 220),
+            TemplateRoom("dining", "Dining", 160),
+        ),
+        service=_CORE_SERVICE,
+        primary_bedroom_ft2=240,
+        bedroom_ft2=150,
+        primary_bath_ft2=90,
+        bath_ft2=70,
+        extras_by_bedrooms=((4, TemplateRoom("office", "Office", 120)),),
+        notes=("Open plan with a central great room.",),
+    ),
+    "modern_farmhouse": StyleTemplate(
+        style="modern_farmhouse",
+        public=(
+            TemplateRoom("living", "Great Room", 340),
+            TemplateRoom("kitchen", "Farmhouse Kitchen", 260),
+            TemplateRoom("dining", "Dining", 170),
+        ),
+        service=(TemplateRoom("mudroom", "Mudroom", 60), TemplateRoom("pantry", "Walk-in Pantry", 45)) + _CORE_SERVICE,
+        primary_bedroom_ft2=260,
+        bedroom_ft2=150,
+        primary_bath_ft2=110,
+        bath_ft2=70,
+        extras_by_bedrooms=((4, TemplateRoom("office", "Study", 120)),),
+        notes=("Large kitchen with island and pantry; mudroom at the side entry.",),
+    ),
+    "hill_country": StyleTemplate(
+        style="hill_country",
+        public=(
+            TemplateRoom("living", "Family Room", 330),
+            TemplateRoom("kitchen", "Kitchen", 230),
+            TemplateRoom("dining", "Dining", 170),
+        ),
+        service=(TemplateRoom("mudroom", "Mudroom", 55),) + _CORE_SERVICE,
+        primary_bedroom_ft2=250,
+        bedroom_ft2=155,
+        primary_bath_ft2=100,
+        bath_ft2=70,
+        extras_by_bedrooms=((3, TemplateRoom("office", "Study", 110)),),
+        notes=("Stone and metal roof vernacular; generous covered outdoor living.",),
+    ),
+    "midcentury_modern": StyleTemplate(
+        style="midcentury_modern",
+        public=(
+            TemplateRoom("living", "Living Room", 300),
+            TemplateRoom("kitchen", "Galley Kitchen", 180),
+            TemplateRoom("dining", "Dining", 150),
+        ),
+        service=_CORE_SERVICE,
+        primary_bedroom_ft2=220,
+        bedroom_ft2=140,
+        primary_bath_ft2=80,
+        bath_ft2=60,
+        extras_by_bedrooms=((4, TemplateRoom("office", "Den", 130)),),
+        notes=("Single-story, low-slung massing with a compact galley kitchen.",),
+    ),
+    "craftsman": StyleTemplate(
+        style="craftsman",
+        public=(
+            TemplateRoom("living", "Living Room", 290),
+            TemplateRoom("kitchen", "Kitchen", 200),
+            TemplateRoom("dining", "Dining", 160),
+        ),
+        service=(TemplateRoom("pantry", "Pantry", 35),) + _CORE_SERVICE,
+        primary_bedroom_ft2=230,
+        bedroom_ft2=140,
+        primary_bath_ft2=85,
+        bath_ft2=60,
+        extras_by_bedrooms=((4, TemplateRoom("office", "Den", 110)),),
+        notes=("Formal dining and a front porch; built-ins around the living room.",),
+    ),
+    "ranch": StyleTemplate(
+        style="ranch",
+        public=(
+            TemplateRoom("living", "Family Room", 320),
+            TemplateRoom("kitchen", "Kitchen", 210),
+            TemplateRoom("dining", "Dining", 150),
+        ),
+        service=(TemplateRoom("mudroom", "Mudroom", 50),) + _CORE_SERVICE,
+        primary_bedroom_ft2=240,
+        bedroom_ft2=145,
+        primary_bath_ft2=90,
+        bath_ft2=65,
+        extras_by_bedrooms=((5, TemplateRoom("office", "Flex Room", 140)),),
+        notes=("Single-level living with a split-bedroom layout.",),
+    ),
+}
+
+DEFAULT_STYLE = "contemporary"
+
+_STYLE_PATTERNS: tuple[tuple[str, str], ...] = (
+    (r"farmhouse|modern farmhouse", "modern_farmhouse"),
+    (r"hill country", "hill_country"),
+    (r"midcentury|mid-century", "midcentury_modern"),
+    (r"craftsman|bungalow", "craftsman"),
+    (r"\branch\b", "ranch"),
+)
+
+
+def detect_style(prompt: str, style: str) -> str:
+    """Light prompt parsing: an explicit style in the prompt wins over the requested one."""
+    p = prompt.lower()
+    for pattern, detected in _STYLE_PATTERNS:
+        if re.search(pattern, p):
+            return detected
+    return style
+
+
+def template_for(style: str) -> StyleTemplate:
+    return STYLE_TEMPLATES.get(style, STYLE_TEMPLATES[DEFAULT_STYLE])
+
+
+def build_template_spec(
+    *,
+    prompt: str,
+    bedrooms: int,
+    bathrooms: int,
+    style: str,
+    notes: list[str] | None = None,
+    id_factory: Callable[[], str] = lambda: str(uuid.uuid4()),
+) -> HouseSpec:
+    """A valid HouseSpec from the style template alone; no provider call involved."""
+    style = detect_style(prompt, style)
+    tpl = template_for(style)
+
+    def _room(r: TemplateRoom) -> HouseSpecRoom:
+        return HouseSpecRoom(id=id_factory(), type=r.type, name=r.name, area_ft2=r.area_ft2)
+
+    rooms = [_room(r) for r in tpl.public]
+    rooms += [_room(r) for r in tpl.service]
+    rooms += [_room(r) for min_beds, r in tpl.extras_by_bedrooms if bedrooms >= min_beds]
+
+    rooms.append(_room(TemplateRoom("bedroom", "Primary Bedroom", tpl.primary_bedroom_ft2)))
+    for i in range(max(0, bedrooms - 1)):
+        rooms.append(_room(TemplateRoom("bedroom", f"Bedroom {i + 2}", tpl.bedroom_ft2)))
+
+    for i in range(bathrooms):
+        name = "Primary Bathroom" if i == 0 else f"Bathroom {i + 1}"
+        rooms.append(_room(TemplateRoom("bathroom", name, tpl.primary_bath_ft2 if i == 0 else tpl.bath_ft2)))
+
+    return HouseSpec(
+        style=style,
+        bedrooms=bedrooms,
+        bathrooms=bathrooms,
+        rooms=rooms,
+        notes=list(tpl.notes) + list(notes or []),
+    )
+
+
+def adjust_room_counts(
+    spec: HouseSpec,
+    *,
+    bedrooms_delta: int,
+    bathrooms_delta: int,
+    id_factory: Callable[[], str] = lambda: str(uuid.uuid4()),
+) -> HouseSpec:
+    """
+    Adds or removes bedrooms/bathrooms on an existing spec (reuse_spec regenerations with new
+    counts). Added rooms get the style template's sizes; removal takes the last rooms of that
+    type and never the first (primary) one. Every other room is kept as is.
+    """
+    tpl = template_for(spec.style)
+    rooms = list(spec.rooms)
+    for typ, delta, area, label in (
+        ("bedroom", bedrooms_delta, tpl.bedroom_ft2, "Bedroom"),
+        ("bathroom", bathrooms_delta, tpl.bath_ft2, "Bathroom"),
+    ):
+        count = sum(1 for r in rooms if r.type == typ)
+        for i in range(max(0, delta)):
+            rooms.append(HouseSpecRoom(id=id_factory(), type=typ, name=f"{label} {count + i + 1}", area_ft2=area))
+        drop = min(max(0, -delta), max(0, count - 1))
+        for _ in range(drop):
+            last = max(i for i, r in enumerate(rooms) if r.type == typ)
+            del rooms[last]
+    return spec.model_copy(
+        update={
+            "rooms": rooms,
+            "bedrooms": max(0, spec.bedrooms + bedrooms_delta),
+            "bathrooms": max(0, spec.bathrooms + bathrooms_delta),
+        }
+    )
@@ -46,6 +46,8 @@ class JobCreateIn(BaseModel):
     bathrooms: int = Field(default=2, ge=1, le=10)
     style: str = Field(default="contemporary", max_length=64)
     want_exterior_image: bool = True
+    # Exterior views to render (front|rear|street|aerial|dusk|night); empty means the default front view.
+    exterior_views: list[str] = Field(default_factory=list)
     idempotency_key: str | None = Field(default=None, max_length=80)
     priority: Literal["normal", "high"] = "normal"
 
@@ -56,6 +58,7 @@ class JobRegenerateIn(BaseModel):
     bathrooms: int | None = Field(default=None, ge=1, le=10)
     style: str | None = Field(default=None, max_length=64)
     want_exterior_image: bool | None = None
+    exterior_views: list[str] | None = None
     reuse_spec: bool | None = None
 
 
@@ -71,6 +74,7 @@ class JobOut(BaseModel):
     bedrooms: int
     bathrooms: int
     style: str
+    exterior_views: list[str] = []
     status: str
     stage: str
     error: str | None
@@ -91,11 +95,36 @@ class ArtifactOut(BaseModel):
     size_bytes: int | None
     url: str
     created_at: dt.datetime
+    width: int | None = None  # raster artifacts only
+    height: int | None = None
+    encodings: dict[str, int] = Field(default_factory=dict)  # precompressed variant sizes (br, gzip)
+    view: str | None = None  # exterior_image and exterior_image_variant
 
 
 class ArtifactsOut(BaseModel):
     job_id: str
     items: list[ArtifactOut]
+    # plan_thumbnail items, smallest encoding first, for list views that should not fetch plan.svg
+    thumbnails: list[ArtifactOut] = Field(default_factory=list)
+
+
+class UsageEventOut(BaseModel):
+    id: str
+    event_type: str
+    provider_model: str | None
+    input_tokens: int | None
+    output_tokens: int | None
+    image_tokens: int | None
+    latency_ms: int | None
+    cost_microusd: int | None
+    created_at: dt.datetime
+
+
+class JobUsageOut(BaseModel):
+    job_id: str
+    cost_microusd_total: int
+    latency_ms_total: int
+    items: list[UsageEventOut]
 
 
 class HouseSpecRoom(BaseModel):
@@ -133,6 +162,8 @@ class PlanEdge(BaseModel):
     a: str
     b: str
     kind: str = "adjacent"
+    wall_ft: float | None = None  # length of the shared wall
+    door_ft: Rect | None = None  # door candidate: zero-width (vertical wall) or zero-height segment
 
 
 class PlanGraph(BaseModel):
@@ -148,3 +179,18 @@ class ApiErrorOut(BaseModel):
     message: str
     details: dict[str, Any] | None = None
     retryable: bool = False
+
+
+class FaultRuleIn(BaseModel):
+    point: str = Field(min_length=1, max_length=64)
+    latency: str | None = None  # fixed:<ms> | uniform:<lo>:<hi> | normal:<mean>:<sd> | lognormal:<mu>:<sigma>
+    error: str | None = None  # timeout | io | http:<status>
+    drip_bytes_per_s: int | None = Field(default=None, ge=1)
+    probability: float = Field(default=1.0, ge=0.0, le=1.0)
+    every_n: int | None = Field(default=None, ge=1)
+    max_hits: int | None = Field(default=None, ge=1)
+
+
+class FaultConfigIn(BaseModel):
+    rules: list[FaultRuleIn] = []
+    seed: int | None = None
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Iterator
+
+
+class StorageBackend(ABC):
+    """
+    Where artifact bytes live. Keys are relative ("ab/cd/<sha256>", "ab/cd/<sha256>.gz"); uri()
+    is what Artifact.path records, so a row can be read back without knowing today's settings.
+    """
+
+    name: str
+
+    @abstractmethod
+    def uri(self, key: str) -> str: ...
+
+    @abstractmethod
+    def size(self, key: str) -> int | None:
+        """Stored size in bytes, or None if the key does not exist."""
+
+    @abstractmethod
+    def put_file(
+        self,
+        key: str,
+        src: Path,
+        *,
+        content_type: str,
+        content_encoding: str | None = None,
+        keep_source: bool = False,
+    ) -> None:
+        """Stores `src` under `key`. The source is consumed (moved or deleted) unless keep_source."""
+
+    @abstractmethod
+    def iter_bytes(self, key: str) -> Iterator[bytes]: ...
+
+    def local_path(self, key: str) -> Path | None:
+        """A path the API can serve directly, for backends on a shared disk."""
+        return None
+
+    def presigned_url(
+        self,
+        key: str,
+        *,
+        expires_s: int,
+        filename: str,
+        content_type: str,
+    ) -> str | None:
+        """A short-lived URL clients can fetch without going through the API, if supported."""
+        return None
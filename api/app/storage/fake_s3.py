@@ -0,0 +1,234 @@
+"""
+Local S3-compatible fake server (a MinIO stand-in) for offline tests of the S3 artifact backend.
+
+Implements the object surface S3Backend uses: PUT/HEAD/GET objects, multipart uploads
+(initiate, upload part, complete, abort) and presigned GETs. Every request's SigV4 signature is
+checked, so a signing bug fails here as it would against MinIO or S3.
+
+    python -m app.storage.fake_s3 --port 9009
+    ARTIFACT_STORAGE_BACKEND=s3 ARTIFACT_S3_ENDPOINT_URL=http://127.0.0.1:9009 \\
+        ARTIFACT_S3_ACCESS_KEY_ID=fake ARTIFACT_S3_SECRET_ACCESS_KEY=fake uvicorn app.main:app
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import hashlib
+import hmac
+import re
+import threading
+import uuid
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+from .s3 import UNSIGNED_PAYLOAD, canonical_request, signature
+
+_AUTH = re.compile(r"Credential=(?P<ak>[^/]+)/[^,]+, SignedHeaders=(?P<names>[^,]+), Signature=(?P<sig>[0-9a-f]+)")
+_NS = "http://s3.amazonaws.com/doc/2006-03-01/"
+
+
+@dataclass
+class StoredObject:
+    data: bytes
+    content_type: str
+    content_encoding: str | None = None
+
+    @property
+    def etag(self) -> str:
+        return f'"{hashlib.md5(self.data).hexdigest()}"'
+
+
+@dataclass
+class _Upload:
+    key: tuple[str, str]
+    content_type: str
+    content_encoding: str | None
+    parts: dict[int, bytes] = field(default_factory=dict)
+
+
+class FakeS3Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], *, access_key: str, secret_key: str, region: str) -> None:
+        super().__init__(address, _Handler)
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+        self.lock = threading.Lock()
+        self.objects: dict[tuple[str, str], StoredObject] = {}
+        self.uploads: dict[str, _Upload] = {}
+        self.requests: list[tuple[str, str]] = []  # (method, kind) for assertions
+
+    @property
+    def endpoint_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start_in_thread(self) -> threading.Thread:
+        t = threading.Thread(target=self.serve_forever, daemon=True)
+        t.start()
+        return t
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: FakeS3Server
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        return
+
+    def _send(self, status: int, body: bytes = b"", headers: dict[str, str] | None = None) -> None:
+        self.send_response(status)
+        headers = headers or {}
+        if "content-length" not in headers:
+            self.send_header("content-length", str(len(body)))
+        for k, v in headers.items():
+            self.send_header(k, v)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _error(self, status: int, code: str) -> None:
+        body = f"<Error><Code>{code}</Code></Error>".encode("utf-8")
+        self._send(status, body, {"content-type": "application/xml"})
+
+    def _parse(self) -> tuple[str, tuple[str, str], dict[str, str]]:
+        split = urlsplit(self.path)
+        path = unquote(split.path)
+        bucket, _, key = path.lstrip("/").partition("/")
+        return path, (bucket, key), dict(parse_qsl(split.query, keep_blank_values=True))
+
+    def _authorized(self, path: str, query: dict[str, str], body: bytes) -> bool:
+        srv = self.server
+        if "X-Amz-Signature" in query:
+            signed_query = {k: v for k, v in query.items() if k != "X-Amz-Signature"}
+            amz_date = query.get("X-Amz-Date", "")
+            try:
+                issued = dt.datetime.strptime(amz_date, "%Y%m%dT%H%M%SZ").replace(tzinfo=dt.UTC)
+            except ValueError:
+                return False
+            if dt.datetime.now(dt.UTC) > issued + dt.timedelta(seconds=int(query.get("X-Amz-Expires", "0"))):
+                return False
+            canonical, _ = canonical_request(
+                self.command, path, signed_query, {"host": self.headers.get("host", "")}, UNSIGNED_PAYLOAD
+            )
+            expected = signature(srv.secret_key, srv.region, amz_date, canonical)[1]
+            return hmac.compare_digest(expected, query["X-Amz-Signature"])
+        m = _AUTH.search(self.headers.get("authorization", ""))
+        if m is None or m["ak"] != srv.access_key:
+            return False
+        payload_hash = self.headers.get("x-amz-content-sha256", "")
+        if payload_hash != UNSIGNED_PAYLOAD and payload_hash != hashlib.sha256(body).hexdigest():
+            return False
+        headers = {name: self.headers.get(name, "") for name in m["names"].split(";")}
+        canonical, _ = canonical_request(self.command, path, query, headers, payload_hash)
+        expected = signature(srv.secret_key, srv.region, self.headers.get("x-amz-date", ""), canonical)[1]
+        return hmac.compare_digest(expected, m["sig"])
+
+    def _handle(self) -> None:
+        path, key, query = self._parse()
+        length = int(self.headers.get("content-length") or 0)
+        body = self.rfile.read(length) if length else b""
+        if not self._authorized(path, query, body):
+            self._error(403, "SignatureDoesNotMatch")
+            return
+        srv = self.server
+        kind = "multipart" if ("uploads" in query or "uploadId" in query) else "object"
+        if "X-Amz-Signature" in query:
+            kind = "presigned"
+        with srv.lock:
+            srv.requests.append((self.command, kind))
+
+        if self.command in ("GET", "HEAD"):
+            with srv.lock:
+                obj = srv.objects.get(key)
+            if obj is None:
+                self._error(404, "NoSuchKey")
+                return
+            headers = {
+                "content-type": query.get("response-content-type", obj.content_type),
+                "etag": obj.etag,
+                "content-length": str(len(obj.data)),
+            }
+            if obj.content_encoding:
+                headers["content-encoding"] = obj.content_encoding
+            if "response-content-disposition" in query:
+                headers["content-disposition"] = query["response-content-disposition"]
+            self._send(200, obj.data, headers)
+        elif self.command == "PUT" and "uploadId" in query:
+            with srv.lock:
+                upload = srv.uploads.get(query["uploadId"])
+                if upload is not None:
+                    upload.parts[int(query["partNumber"])] = body
+            if upload is None:
+                self._error(404, "NoSuchUpload")
+                return
+            self._send(200, headers={"etag": f'"{hashlib.md5(body).hexdigest()}"'})
+        elif self.command == "PUT":
+            obj = StoredObject(body, self.headers.get("content-type", ""), self.headers.get("content-encoding"))
+            with srv.lock:
+                srv.objects[key] = obj
+            self._send(200, headers={"etag": obj.etag})
+        elif self.command == "POST" and "uploads" in query:
+            upload_id = uuid.uuid4().hex
+            with srv.lock:
+                srv.uploads[upload_id] = _Upload(
+                    key, self.headers.get("content-type", ""), self.headers.get("content-encoding")
+                )
+            xml = f'<InitiateMultipartUploadResult xmlns="{_NS}"><UploadId>{upload_id}</UploadId></InitiateMultipartUploadResult>'
+            self._send(200, xml.encode("utf-8"), {"content-type": "application/xml"})
+        elif self.command == "POST" and "uploadId" in query:
+            numbers = [int(n.text or 0) for n in ET.fromstring(body).iter("PartNumber")]
+            with srv.lock:
+                upload = srv.uploads.pop(query["uploadId"], None)
+                if upload is not None and numbers == sorted(upload.parts) and numbers:
+                    data = b"".join(upload.parts[n] for n in numbers)
+                    srv.objects[upload.key] = StoredObject(data, upload.content_type, upload.content_encoding)
+            if upload is None or not numbers or numbers != sorted(upload.parts):
+                self._error(400, "InvalidPart")
+                return
+            xml = f'<CompleteMultipartUploadResult xmlns="{_NS}"><Key>{key[1]}</Key></CompleteMultipartUploadResult>'
+            self._send(200, xml.encode("utf-8"), {"content-type": "application/xml"})
+        elif self.command == "DELETE" and "uploadId" in query:
+            with srv.lock:
+                srv.uploads.pop(query["uploadId"], None)
+            self._send(204)
+        else:
+            self._error(405, "MethodNotAllowed")
+
+    do_GET = do_HEAD = do_PUT = do_POST = do_DELETE = _handle  # noqa: N815
+
+
+def serve(
+    *, host: str = "127.0.0.1", port: int = 0, access_key: str = "fake", secret_key: str = "fake", region: str = "us-east-1"
+) -> FakeS3Server:
+    """Binds the server (port 0 picks a free port); call serve_forever() or start_in_thread()."""
+    return FakeS3Server((host, port), access_key=access_key, secret_key=secret_key, region=region)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="S3-compatible fake server for offline artifact storage tests.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=9009)
+    ap.add_argument("--access-key", default="fake")
+    ap.add_argument("--secret-key", default="fake")
+    ap.add_argument("--region", default="us-east-1")
+    args = ap.parse_args()
+    server = serve(
+        host=args.host, port=args.port, access_key=args.access_key, secret_key=args.secret_key, region=args.region
+    )
+    print(f"fake s3 listening on {server.endpoint_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import Iterator
+
+from .base import StorageBackend
+
+_READ_CHUNK = 64 * 1024
+
+
+class LocalBackend(StorageBackend):
+    """Blobs under a directory on a disk the API and worker share."""
+
+    name = "local"
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    def _path(self, key: str) -> Path:
+        # Rows written before the artifact store hold absolute paths; root / "/abs" is "/abs".
+        return self.root / key
+
+    def uri(self, key: str) -> str:
+        return str(self._path(key))
+
+    def size(self, key: str) -> int | None:
+        try:
+            return self._path(key).stat().st_size
+        except FileNotFoundError:
+            return None
+
+    def put_file(
+        self,
+        key: str,
+        src: Path,
+        *,
+        content_type: str,
+        content_encoding: str | None = None,
+        keep_source: bool = False,
+    ) -> None:
+        dest = self._path(key)
+        if dest.exists():
+            if not keep_source:
+                src.unlink(missing_ok=True)
+            return
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        if not keep_source:
+            # Atomic; two writers racing on the same content both leave identical bytes at dest.
+            src.replace(dest)
+            return
+        tmp = dest.with_name(f"{dest.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            os.link(src, tmp)  # no copy on the same filesystem
+        except OSError:
+            shutil.copyfile(src, tmp)
+        tmp.replace(dest)
+
+    def iter_bytes(self, key: str) -> Iterator[bytes]:
+        with self._path(key).open("rb") as f:
+            while chunk := f.read(_READ_CHUNK):
+                yield chunk
+
+    def local_path(self, key: str) -> Path | None:
+        return self._path(key)
@@ -0,0 +1,266 @@
+"""
+S3-compatible artifact storage (AWS S3, MinIO, R2, ...) over plain httpx with SigV4 signing.
+
+Path-style addressing ({endpoint}/{bucket}/{key}) so MinIO and other self-hosted endpoints work
+without wildcard DNS. Files above the multipart threshold are uploaded in parts, several at a
+time; downloads can be handed to clients as presigned GET URLs so the bytes bypass the API.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures as cf
+import datetime as dt
+import hashlib
+import hmac
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Iterator
+from urllib.parse import quote
+
+import httpx
+
+from .base import StorageBackend
+
+UNSIGNED_PAYLOAD = "UNSIGNED-PAYLOAD"
+_ALGORITHM = "AWS4-HMAC-SHA256"
+_MIN_PART_BYTES = 5 * 1024 * 1024  # S3 rejects smaller non-final parts
+
+
+def _quote(value: str, safe: str = "-_.~") -> str:
+    return quote(value, safe=safe)
+
+
+def _amz_date(now: dt.datetime | None = None) -> str:
+    return (now or dt.datetime.now(dt.UTC)).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _url(endpoint: httpx.URL, path: str, query: dict[str, str]) -> str:
+    url = f"{endpoint.scheme}://{endpoint.netloc.decode('ascii')}{_quote(path, safe='/-_.~')}"
+    return f"{url}?{'&'.join(f'{_quote(k)}={_quote(v)}' for k, v in query.items())}" if query else url
+
+
+def canonical_request(
+    method: str, path: str, query: dict[str, str], headers: dict[str, str], payload_hash: str
+) -> tuple[str, str]:
+    """(canonical request, signed header names) for SigV4; `path` is unencoded."""
+    lower = {k.lower(): " ".join(str(v).split()) for k, v in headers.items()}
+    names = sorted(lower)
+    lines = [
+        method,
+        _quote(path, safe="/-_.~"),
+        "&".join(f"{_quote(k)}={_quote(v)}" for k, v in sorted(query.items())),
+        "".join(f"{n}:{lower[n]}\n" for n in names),
+        ";".join(names),
+        payload_hash,
+    ]
+    return "\n".join(lines), ";".join(names)
+
+
+def signature(secret_key: str, region: str, amz_date: str, canonical: str) -> tuple[str, str]:
+    """(credential scope, hex signature)."""
+    date = amz_date[:8]
+    scope = f"{date}/{region}/s3/aws4_request"
+    to_sign = "\n".join([_ALGORITHM, amz_date, scope, hashlib.sha256(canonical.encode("utf-8")).hexdigest()])
+    key = f"AWS4{secret_key}".encode("utf-8")
+    for part in (date, region, "s3", "aws4_request"):
+        key = hmac.new(key, part.encode("utf-8"), hashlib.sha256).digest()
+    return scope, hmac.new(key, to_sign.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def presign_query(
+    method: str,
+    *,
+    host: str,
+    path: str,
+    access_key: str,
+    secret_key: str,
+    region: str,
+    expires_s: int,
+    amz_date: str,
+    params: dict[str, str] | None = None,
+) -> dict[str, str]:
+    """Query parameters (X-Amz-Signature included) that authorize one request until expiry."""
+    query = dict(params or {})
+    query.update(
+        {
+            "X-Amz-Algorithm": _ALGORITHM,
+            "X-Amz-Credential": f"{access_key}/{amz_date[:8]}/{region}/s3/aws4_request",
+            "X-Amz-Date": amz_date,
+            "X-Amz-Expires": str(expires_s),
+            "X-Amz-SignedHeaders": "host",
+        }
+    )
+    canonical, _ = canonical_request(method, path, query, {"host": host}, UNSIGNED_PAYLOAD)
+    query["X-Amz-Signature"] = signature(secret_key, region, amz_date, canonical)[1]
+    return query
+
+
+class S3Backend(StorageBackend):
+    name = "s3"
+
+    def __init__(
+        self,
+        *,
+        endpoint_url: str,
+        bucket: str,
+        region: str,
+        access_key_id: str,
+        secret_access_key: str,
+        prefix: str = "",
+        presign_endpoint_url: str | None = None,
+        multipart_threshold_bytes: int = 8 * 1024 * 1024,
+        part_size_bytes: int = 8 * 1024 * 1024,
+        upload_concurrency: int = 4,
+        transport: httpx.BaseTransport | None = None,
+    ) -> None:
+        self.endpoint = httpx.URL(endpoint_url.rstrip("/"))
+        self.presign_endpoint = httpx.URL((presign_endpoint_url or endpoint_url).rstrip("/"))
+        self.bucket = bucket
+        self.region = region
+        self.access_key_id = access_key_id
+        self.secret_access_key = secret_access_key
+        self.prefix = prefix.strip("/")
+        self.multipart_threshold_bytes = multipart_threshold_bytes
+        self.part_size_bytes = max(_MIN_PART_BYTES, part_size_bytes)
+        self.upload_concurrency = max(1, upload_concurrency)
+        self._transport = transport
+
+    def _client(self) -> httpx.Client:
+        return httpx.Client(timeout=60, transport=self._transport)
+
+    def _object_key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def _object_path(self, key: str) -> str:
+        return f"{self.endpoint.path.rstrip('/')}/{self.bucket}/{self._object_key(key)}"
+
+    def _request(
+        self,
+        client: httpx.Client,
+        method: str,
+        key: str,
+        *,
+        query: dict[str, str] | None = None,
+        headers: dict[str, str] | None = None,
+        content: bytes = b"",
+        stream: bool = False,
+    ) -> httpx.Response:
+        query = query or {}
+        path = self._object_path(key)
+        signed = {
+            "host": self.endpoint.netloc.decode("ascii"),
+            "x-amz-date": _amz_date(),
+            "x-amz-content-sha256": hashlib.sha256(content).hexdigest(),
+            **(headers or {}),
+        }
+        canonical, signed_names = canonical_request(method, path, query, signed, signed["x-amz-content-sha256"])
+        scope, sig = signature(self.secret_access_key, self.region, signed["x-amz-date"], canonical)
+        signed["authorization"] = (
+            f"{_ALGORITHM} Credential={self.access_key_id}/{scope}, SignedHeaders={signed_names}, Signature={sig}"
+        )
+        request = client.build_request(method, _url(self.endpoint, path, query), headers=signed, content=content)
+        return client.send(request, stream=stream)
+
+    def uri(self, key: str) -> str:
+        return f"s3://{self.bucket}/{self._object_key(key)}"
+
+    def size(self, key: str) -> int | None:
+        with self._client() as client:
+            r = self._request(client, "HEAD", key)
+        if r.status_code == 404:
+            return None
+        r.raise_for_status()
+        return int(r.headers["content-length"])
+
+    def put_file(
+        self,
+        key: str,
+        src: Path,
+        *,
+        content_type: str,
+        content_encoding: str | None = None,
+        keep_source: bool = False,
+    ) -> None:
+        headers = {"content-type": content_type}
+        if content_encoding:
+            headers["content-encoding"] = content_encoding
+        with self._client() as client:
+            if src.stat().st_size > self.multipart_threshold_bytes:
+                self._put_multipart(client, key, src, headers)
+            else:
+                self._request(client, "PUT", key, headers=headers, content=src.read_bytes()).raise_for_status()
+        if not keep_source:
+            src.unlink(missing_ok=True)
+
+    def _put_multipart(self, client: httpx.Client, key: str, src: Path, headers: dict[str, str]) -> None:
+        r = self._request(client, "POST", key, query={"uploads": ""}, headers=headers)
+        r.raise_for_status()
+        upload_id = ET.fromstring(r.content).findtext("{*}UploadId")
+        size = src.stat().st_size
+        offsets = range(0, size, self.part_size_bytes)
+
+        def _part(number: int, offset: int) -> tuple[int, str]:
+            with src.open("rb") as f:
+                f.seek(offset)
+                body = f.read(self.part_size_bytes)
+            query = {"partNumber": str(number), "uploadId": upload_id}
+            resp = self._request(client, "PUT", key, query=query, content=body)
+            resp.raise_for_status()
+            return number, resp.headers["etag"]
+
+        try:
+            with cf.ThreadPoolExecutor(max_workers=min(self.upload_concurrency, len(offsets))) as pool:
+                parts = sorted(pool.map(lambda p: _part(*p), enumerate(offsets, start=1)))
+            body = "".join(f"<Part><PartNumber>{n}</PartNumber><ETag>{etag}</ETag></Part>" for n, etag in parts)
+            done = self._request(
+                client,
+                "POST",
+                key,
+                query={"uploadId": upload_id},
+                content=f"<CompleteMultipartUpload>{body}</CompleteMultipartUpload>".encode("utf-8"),
+            )
+            done.raise_for_status()
+            # S3 can report a failed completion in a 200 body.
+            if ET.fromstring(done.content).tag.endswith("Error"):
+                raise RuntimeError(f"s3_multipart_failed:{done.text[:200]}")
+        except BaseException:
+            try:
+                self._request(client, "DELETE", key, query={"uploadId": upload_id})
+            except httpx.HTTPError:
+                pass  # an orphaned upload is reclaimed by the bucket's lifecycle rule
+            raise
+
+    def iter_bytes(self, key: str) -> Iterator[bytes]:
+        with self._client() as client:
+            r = self._request(client, "GET", key, stream=True)
+            try:
+                r.raise_for_status()
+                yield from r.iter_raw()
+            finally:
+                r.close()
+
+    def presigned_url(
+        self,
+        key: str,
+        *,
+        expires_s: int,
+        filename: str,
+        content_type: str,
+    ) -> str | None:
+        path = f"{self.presign_endpoint.path.rstrip('/')}/{self.bucket}/{self._object_key(key)}"
+        query = presign_query(
+            "GET",
+            host=self.presign_endpoint.netloc.decode("ascii"),
+            path=path,
+            access_key=self.access_key_id,
+            secret_key=self.secret_access_key,
+            region=self.region,
+            expires_s=expires_s,
+            amz_date=_amz_date(),
+            params={
+                "response-content-disposition": f'attachment; filename="{filename}"',
+                "response-content-type": content_type,
+            },
+        )
+        return _url(self.presign_endpoint, path, query)
+
@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+import bisect
+import json
+import time
+from collections import deque
+from functools import lru_cache
+from threading import Lock
+
+from .config import settings
+
+
+# Upper bounds (inclusive) of the histogram buckets; the last bucket is open-ended.
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 20000, 40000, 60000)
+TOKEN_BUCKETS = (100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+
+
+@lru_cache(maxsize=8)
+def _parse_price_table(raw: str) -> dict[str, dict[str, float]]:
+    try:
+        val = json.loads(raw)
+    except Exception:
+        return {}
+    if not isinstance(val, dict):
+        return {}
+    return {str(k): v for k, v in val.items() if isinstance(v, dict)}
+
+
+def price_table() -> dict[str, dict[str, float]]:
+    return _parse_price_table(settings.provider_price_table_json)
+
+
+def cost_microusd(
+    model: str | None,
+    *,
+    input_tokens: int | None,
+    output_tokens: int | None,
+    image_tokens: int | None = None,
+) -> int | None:
+    """
+    Cost of one call in micro-USD, or None if the model has no price entry.
+
+    Prices are USD per million tokens, which is numerically micro-USD per token.
+    """
+    if not model:
+        return None
+    prices = price_table().get(model)
+    if prices is None:
+        return None
+    total = (input_tokens or 0) * float(prices.get("input_per_mtok", 0))
+    total += (output_tokens or 0) * float(prices.get("output_per_mtok", 0))
+    total += (image_tokens or 0) * float(prices.get("image_per_mtok", 0))
+    return int(round(total))
+
+
+class RollingHistogram:
+    """Samples from the last `window_s` seconds (at most `max_samples`), bucketed on demand."""
+
+    def __init__(self, bounds: tuple[int, ...], *, window_s: float, max_samples: int) -> None:
+        self.bounds = bounds
+        self.window_s = window_s
+        self._samples: deque[tuple[float, float]] = deque(maxlen=max_samples)
+
+    def add(self, value: float, *, now: float | None = None) -> None:
+        self._samples.append((now if now is not None else time.monotonic(), float(value)))
+
+    def _prune(self, now: float) -> None:
+        cutoff = now - self.window_s
+        while self._samples and self._samples[0][0] < cutoff:
+            self._samples.popleft()
+
+    def count(self, *, now: float | None = None) -> int:
+        self._prune(now if now is not None else time.monotonic())
+        return len(self._samples)
+
+    def percentile(self, p: float, *, now: float | None = None) -> float | None:
+        self._prune(now if now is not None else time.monotonic())
+        if not self._samples:
+            return None
+        values = sorted(v for _, v in self._samples)
+        return values[min(len(values) - 1, int(p * len(values)))]
+
+    def snapshot(self, *, now: float | None = None) -> dict:
+        self._prune(now if now is not None else time.monotonic())
+        values = sorted(v for _, v in self._samples)
+        counts = [0] * (len(self.bounds) + 1)
+        for v in values:
+            counts[bisect.bisect_left(self.bounds, v)] += 1
+        buckets = [{"le": b, "count": c} for b, c in zip(self.bounds, counts)]
+        buckets.append({"le": None, "count": counts[-1]})
+
+        def _pct(p: float) -> float | None:
+            if not values:
+                return None
+            return values[min(len(values) - 1, int(p * len(values)))]
+
+        return {
+            "count": len(values),
+            "min": values[0] if values else None,
+            "max": values[-1] if values else None,
+            "p50": _pct(0.50),
+            "p90": _pct(0.90),
+            "p99": _pct(0.99),
+            "buckets": buckets,
+        }
+
+
+class _Series:
+    def __init__(self) -> None:
+        window_s = float(settings.telemetry_window_seconds)
+        max_samples = settings.telemetry_max_samples
+        self.latency_ms = RollingHistogram(LATENCY_BUCKETS_MS, window_s=window_s, max_samples=max_samples)
+        self.tokens = RollingHistogram(TOKEN_BUCKETS, window_s=window_s, max_samples=max_samples)
+        # Failed calls in the window (value unused; only the count matters).
+        self.errors = RollingHistogram((1,), window_s=window_s, max_samples=max_samples)
+        self.calls = 0
+        self.cost_microusd = 0
+
+
+class TelemetryRegistry:
+    """In-memory per (model, event_type) latency and token histograms for provider calls."""
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._series: dict[tuple[str, str], _Series] = {}
+
+    def _get(self, model: str | None, event_type: str) -> _Series:
+        key = (model or "unknown", event_type)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = _Series()
+        return series
+
+    def record_error(self, *, model: str | None, event_type: str) -> None:
+        with self._lock:
+            self._get(model, event_type).errors.add(1)
+
+    def model_stats(self, *, model: str, event_type: str) -> dict:
+        """Windowed call/error counts and p90 latency for one series (zeros if unseen)."""
+        with self._lock:
+            series = self._series.get((model, event_type))
+            if series is None:
+                return {"calls": 0, "errors": 0, "error_rate": 0.0, "latency_p90_ms": None}
+            calls = series.latency_ms.count()
+            errors = series.errors.count()
+            total = calls + errors
+            return {
+                "calls": calls,
+                "errors": errors,
+                "error_rate": errors / total if total else 0.0,
+                "latency_p90_ms": series.latency_ms.percentile(0.9),
+            }
+
+    def record(
+        self,
+        *,
+        model: str | None,
+        event_type: str,
+        latency_ms: int | None,
+        tokens: int | None,
+        cost_microusd: int | None = None,
+    ) -> None:
+        with self._lock:
+            series = self._get(model, event_type)
+            series.calls += 1
+            series.cost_microusd += cost_microusd or 0
+            if latency_ms is not None:
+                series.latency_ms.add(latency_ms)
+            if tokens is not None:
+                series.tokens.add(tokens)
+
+    def snapshot(self) -> list[dict]:
+        with self._lock:
+            return [
+                {
+                    "model": model,
+                    "event_type": event_type,
+                    "calls_total": s.calls,
+                    "errors_in_window": s.errors.count(),
+                    "cost_microusd_total": s.cost_microusd,
+                    "latency_ms": s.latency_ms.snapshot(),
+                    "tokens": s.tokens.snapshot(),
+                }
+                for (model, event_type), s in sorted(self._series.items())
+            ]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+registry = TelemetryRegistry()
+
+
+def merge_histograms(a: dict, b: dict) -> dict:
+    """
+    Combines two RollingHistogram snapshots (same bounds) taken in different processes. Counts,
+    min, max and buckets are exact; the percentiles are re-estimated at bucket resolution (the
+    bucket's upper bound, capped at max), since the samples themselves stay in their process.
+    """
+    if not b.get("count"):
+        return a
+    if not a.get("count"):
+        return b
+    count = a["count"] + b["count"]
+    hi = max(a["max"], b["max"])
+    buckets = [{"le": x["le"], "count": x["count"] + y["count"]} for x, y in zip(a["buckets"], b["buckets"])]
+
+    def _pct(p: float) -> float:
+        rank, seen = min(count - 1, int(p * count)), 0
+        for bucket in buckets:
+            seen += bucket["count"]
+            if seen > rank:
+                break
+        return hi if bucket["le"] is None else min(bucket["le"], hi)
+
+    return {
+        "count": count,
+        "min": min(a["min"], b["min"]),
+        "max": hi,
+        "p50": _pct(0.50),
+        "p90": _pct(0.90),
+        "p99": _pct(0.99),
+        "buckets": buckets,
+    }
+
+
+def merge_stats(a: dict, b: dict) -> dict:
+    """Merges two stats() dicts of the same cache/index from different processes: counters add up."""
+    out = dict(a)
+    for key, value in b.items():
+        cur = out.get(key)
+        if isinstance(value, dict) and isinstance(cur, dict) and "buckets" in value:
+            out[key] = merge_histograms(cur, value)
+        elif isinstance(value, int) and isinstance(cur, int):
+            out[key] = cur + value
+        elif key not in out:
+            out[key] = value
+    return out
+
+
+def merge_snapshots(a: list[dict], b: list[dict]) -> list[dict]:
+    """Merges two registry snapshots (e.g. API and worker process) series by series."""
+    merged = {(s["model"], s["event_type"]): s for s in a}
+    for s in b:
+        key = (s["model"], s["event_type"])
+        cur = merged.get(key)
+        if cur is None:
+            merged[key] = s
+            continue
+        merged[key] = {
+            "model": s["model"],
+            "event_type": s["event_type"],
+            "calls_total": cur["calls_total"] + s["calls_total"],
+            "errors_in_window": cur["errors_in_window"] + s["errors_in_window"],
+            "cost_microusd_total": cur["cost_microusd_total"] + s["cost_microusd_total"],
+            "latency_ms": merge_histograms(cur["latency_ms"], s["latency_ms"]),
+            "tokens": merge_histograms(cur["tokens"], s["tokens"]),
+        }
+    return [merged[k] for k in sorted(merged)]
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import hashlib
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import artifact_store
+from app.main import create_app
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    from app import config as cfg
+
+    monkeypatch.setattr(cfg.settings, "var_dir", tmp_path)
+    return tmp_path / "blobs"
+
+
+def test_blobs_are_fanned_out_and_deduplicated(store):
+    data = b"<svg/>" * 100
+    sha = hashlib.sha256(data).hexdigest()
+    first = artifact_store.store_bytes(data, mime="image/svg+xml")
+    assert first.uri == str(store / sha[:2] / sha[2:4] / sha)
+    assert (first.checksum_sha256, first.size_bytes, first.deduplicated) == (sha, len(data), False)
+    assert artifact_store.blob_path(sha).read_bytes() == data
+    assert 0 < first.encodings["gzip"] < len(data)
+
+    again = artifact_store.store_bytes(data, mime="image/svg+xml")
+    assert again.uri == first.uri and again.deduplicated and again.encodings == first.encodings
+
+    with artifact_store.BlobWriter(mime="image/svg+xml") as w:
+        w.write(data[:10])
+        w.write(data[10:])
+        streamed = w.commit()
+    assert streamed.uri == first.uri and streamed.deduplicated
+    assert not list((store / "tmp").iterdir())
+
+
+def test_store_file_moves_scratch_files_and_aborted_writes_leave_nothing(store, tmp_path):
+    scratch = tmp_path / "scratch.png"
+    scratch.write_bytes(b"png bytes")
+    sha = hashlib.sha256(b"png bytes").hexdigest()
+    blob = artifact_store.store_file(scratch, mime="image/png", checksum=sha, size=9)
+    assert blob.uri == str(artifact_store.blob_path(sha)) and not blob.encodings
+    assert not scratch.exists() and artifact_store.blob_path(sha).read_bytes() == b"png bytes"
+
+    dup = tmp_path / "dup.png"
+    dup.write_bytes(b"png bytes")
+    assert artifact_store.store_file(dup, mime="image/png").deduplicated and not dup.exists()
+    kept = tmp_path / "kept.png"
+    kept.write_bytes(b"other bytes")
+    linked = artifact_store.store_file(kept, mime="image/png", keep_source=True)
+    assert kept.exists() and artifact_store.exists(linked.uri)
+
+    with pytest.raises(RuntimeError):
+        with artifact_store.BlobWriter(mime="image/png") as w:
+            w.write(b"partial")
+            raise RuntimeError("boom")
+    assert not list((store / "tmp").iterdir())
+
+
+def test_job_artifacts_live_in_the_store_and_download_by_name(tmp_path, monkeypatch):
+    from app import config as cfg
+    from app import db as db_mod
+    from app.db import SessionLocal
+    from app.jobs import worker as worker_mod
+    from app.models import Artifact
+    from app.providers.mock import MockProvider
+
+    monkeypatch.setattr(cfg.settings, "var_dir", tmp_path)
+    monkeypatch.setattr(cfg.settings, "database_url", f"sqlite:///{tmp_path/'store.db'}")
+    monkeypatch.setattr(cfg.settings, "run_inprocess_worker", False)
+    monkeypatch.setattr(db_mod, "_engine", None)
+    monkeypatch.setattr(db_mod, "_sessionmaker", None)
+    monkeypatch.setattr(worker_mod, "_provider", lambda: MockProvider())
+
+    with TestClient(create_app()) as client:
+        client.post("/api/v1/auth/signup", json={"email": "store@example.com", "password": "password123"})
+        session_id = client.post("/api/v1/sessions", json={"title": "Store"}).json()["id"]
+        job_id = client.post(
+            f"/api/v1/jobs/sessions/{session_id}", json={"prompt": "3 bed home", "bedrooms": 3, "bathrooms": 2}
+        ).json()["id"]
+        with SessionLocal() as db:
+            worker_mod.process_job(db, worker_mod._claim_next_job(db))
+            rows = db.query(Artifact).filter(Artifact.job_id == job_id).all()
+
+        assert rows and all(r.path == str(artifact_store.blob_path(r.checksum_sha256)) for r in rows)
+        assert not (tmp_path / "artifacts" / job_id).exists()  # scratch dir cleaned up
+
+        spec = next(i for i in client.get(f"/api/v1/jobs/{job_id}/artifacts").json()["items"] if i["type"] == "spec_json")
+        resp = client.get(spec["url"], headers={"Accept-Encoding": "identity"})
+        assert 'filename="spec.json"' in resp.headers["content-disposition"]
+        assert hashlib.sha256(resp.content).hexdigest() == spec["checksum_sha256"]
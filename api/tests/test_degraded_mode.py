@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import create_app
+from app.providers import health
+from app.providers.templates import STYLE_TEMPLATES, build_template_spec, detect_style
+from tests.test_queue_reliability import _wait_for_terminal
+
+
+@pytest.mark.parametrize("style", sorted(STYLE_TEMPLATES))
+def test_every_style_template_builds_a_valid_spec(style):
+    spec = build_template_spec(prompt="a house", bedrooms=5, bathrooms=3, style=style)
+    assert spec.style == style
+    assert sum(1 for r in spec.rooms if r.type == "bedroom") == 5
+    assert sum(1 for r in spec.rooms if r.type == "bathroom") == 3
+    assert {"living", "kitchen", "dining"} <= {r.type for r in spec.rooms}
+    assert len({r.id for r in spec.rooms}) == len(spec.rooms)
+
+
+def test_detect_style_prefers_prompt():
+    assert detect_style("cozy craftsman bungalow", "contemporary") == "craftsman"
+    assert detect_style("something nice", "ranch") == "ranch"
+
+
+def test_worker_serves_local_template_while_provider_unhealthy(tmp_path, monkeypatch):
+    from app import config as cfg
+    from app import db as db_mod
+    from app.jobs import worker as worker_mod
+
+    monkeypatch.setattr(cfg.settings, "var_dir", tmp_path)
+    monkeypatch.setattr(cfg.settings, "database_url", f"sqlite:///{tmp_path/'test_degraded.db'}")
+    monkeypatch.setattr(cfg.settings, "run_inprocess_worker", False)
+    monkeypatch.setattr(cfg.settings, "job_max_retries", 2)
+    monkeypatch.setattr(cfg.settings, "degraded_mode_enabled", True)
+    monkeypatch.setattr(cfg.settings, "degraded_min_samples", 2)
+    monkeypatch.setattr(cfg.settings, "degraded_error_rate", 0.5)
+    monkeypatch.setattr(db_mod, "_engine", None)
+    monkeypatch.setattr(db_mod, "_sessionmaker", None)
+    health.tracker.reset()
+
+    class DownProvider:
+        spec_calls = 0
+        image_calls = 0
+
+        def generate_house_spec(self, *, prompt: str, bedrooms: int, bathrooms: int, style: str):
+            DownProvider.spec_calls += 1
+            request = httpx.Request("POST", "https://generativelanguage.googleapis.com")
+            raise httpx.HTTPStatusError("unavailable", request=request, response=httpx.Response(503, request=request))
+
+        def maybe_generate_exterior_image(self, *, prompt: str, style: str):
+            DownProvider.image_calls += 1
+            return None
+
+    monkeypatch.setattr(worker_mod, "_provider", lambda: DownProvider())
+
+    app = create_app()
+    with TestClient(app) as client:
+        client.post("/api/v1/auth/signup", json={"email": "degraded@example.com", "password": "password123"})
+        session_id = client.post("/api/v1/sessions", json={"title": "Outage"}).json()["id"]
+
+        def _create(prompt: str) -> str:
+            return client.post(
+                f"/api/v1/jobs/sessions/{session_id}",
+                json={"prompt": prompt, "bedrooms": 3, "bathrooms": 2, "style": "modern_farmhouse"},
+            ).json()["id"]
+
+        first = _wait_for_terminal(client, _create("first during outage"))
+        assert first["status"] == "succeeded"
+        assert first["retry_count"] == 1
+        assert first["provider_meta"]["degraded_mode"]["upgrade_pending"] is True
+        assert any(w.startswith("degraded_mode: spec") for w in first["warnings"])
+        assert any("exterior image skipped" in w for w in first["warnings"])
+
+        # While the breaker is open, jobs skip the provider entirely.
+        second = _wait_for_terminal(client, _create("second during outage"))
+        assert second["status"] == "succeeded"
+        assert second["retry_count"] == 0
+        assert DownProvider.spec_calls == 2
+        assert DownProvider.image_calls == 0
+
+        body = client.get("/api/v1/system/health").json()
+        assert body["provider_health"]["degraded"] is True
+    health.tracker.reset()
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import random
+
+import httpx
+import pytest
+
+from app.providers.fake_server import FakeServerConfig, LatencyDistribution, serve
+from app.providers.gemini import GeminiProvider
+
+
+@pytest.fixture
+def fake_gemini(monkeypatch):
+    from app import config as cfg
+
+    servers = []
+
+    def _start(config: FakeServerConfig):
+        server = serve(config)
+        server.start_in_thread()
+        servers.append(server)
+        monkeypatch.setattr(cfg.settings, "gemini_api_key", "fake-key")
+        monkeypatch.setattr(cfg.settings, "gemini_base_url", server.base_url)
+        return server
+
+    yield _start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_latency_distribution_parse_and_sample():
+    rng = random.Random(1)
+    assert LatencyDistribution.parse("fixed:25").sample_ms(rng) == 25
+    sample = LatencyDistribution.parse("uniform:10:20").sample_ms(rng)
+    assert 10 <= sample <= 20
+    with pytest.raises(ValueError):
+        LatencyDistribution.parse("pareto:1")
+
+
+def test_real_client_path_against_fake_server(fake_gemini, tmp_path):
+    server = fake_gemini(FakeServerConfig(spec_latency=LatencyDistribution.parse("fixed:5"), image_bytes=512 * 1024))
+    provider = GeminiProvider()
+
+    result = provider.generate_house_spec(prompt="4 bed farmhouse", bedrooms=4, bathrooms=3, style="modern_farmhouse")
+    assert sum(1 for r in result.spec.rooms if r.type == "bedroom") == 4
+    assert result.meta.total_tokens == 600
+    assert result.meta.latency_ms >= 5
+
+    rooms: list[str] = []
+    streamed = provider.stream_house_spec(
+        prompt="2 bed", bedrooms=2, bathrooms=1, style="contemporary", on_room=lambda r: rooms.append(r.id)
+    )
+    assert rooms == [r.id for r in streamed.spec.rooms]
+
+    img = provider.write_exterior_image(prompt="farmhouse", style="modern_farmhouse", dest=tmp_path / "ext.png")
+    assert img is not None
+    assert img.size_bytes > 512 * 1024 * 0.9
+    assert (tmp_path / "ext.png").read_bytes()[:8] == b"\x89PNG\r\n\x1a\n"
+    assert server.responses_by_status == {200: 3}
+
+
+def test_fake_server_429_burst_sets_retry_after(fake_gemini):
+    from app.jobs.worker import _classify_failure
+
+    server = fake_gemini(FakeServerConfig(burst_429_every=3, burst_429_len=1, retry_after_s=7))
+    provider = GeminiProvider()
+
+    with pytest.raises(httpx.HTTPStatusError) as excinfo:
+        provider.generate_house_spec(prompt="p", bedrooms=2, bathrooms=1, style="contemporary")
+    assert excinfo.value.response.status_code == 429
+    assert excinfo.value.response.headers["retry-after"] == "7"
+    assert _classify_failure(excinfo.value) == ("provider_transient", True)
+
+    provider.generate_house_spec(prompt="p", bedrooms=2, bathrooms=1, style="contemporary")
+    provider.generate_house_spec(prompt="p", bedrooms=2, bathrooms=1, style="contemporary")
+    with pytest.raises(httpx.HTTPStatusError):
+        provider.generate_house_spec(prompt="p", bedrooms=2, bathrooms=1, style="contemporary")
+    assert server.responses_by_status == {429: 2, 200: 2}
+
+
+def test_spec_calls_reuse_template_and_cached_prefix(fake_gemini, monkeypatch):
+    from app import config as cfg
+    from app.providers import gemini as gemini_mod
+
+    server = fake_gemini(FakeServerConfig())
+    monkeypatch.setattr(cfg.settings, "gemini_spec_cache_enabled", True)
+    gemini_mod._spec_prefix_cache.reset()
+    provider = GeminiProvider()
+
+    # Below the model's minimum cacheable size (4096 tokens on Pro) the prefix is sent inline.
+    monkeypatch.setattr(cfg.settings, "gemini_spec_cache_min_tokens", 4096)
+    assert gemini_mod._spec_prefix_tokens() < 4096
+    skipped = provider.generate_house_spec(prompt="p", bedrooms=2, bathrooms=1, style="contemporary")
+    assert not server.cached_contents and "cached_content" not in skipped.meta.raw
+    assert "systemInstruction" in server.last_body
+
+    # The real prefix (schema + worked examples) clears the default Flash minimum.
+    monkeypatch.setattr(cfg.settings, "gemini_spec_cache_min_tokens", 1024)
+    assert gemini_mod._spec_prefix_tokens() >= 1024
+    first = provider.generate_house_spec(prompt="p", bedrooms=2, bathrooms=1, style="contemporary")
+    second = provider.generate_house_spec(prompt="q", bedrooms=3, bathrooms=2, style="contemporary")
+    assert len(server.cached_contents) == 1
+    (name,) = server.cached_contents
+    assert first.meta.raw["cached_content"] == name == second.meta.raw["cached_content"]
+    assert server.last_body["cachedContent"] == name
+    assert "systemInstruction" not in server.last_body
+    assert second.meta.raw["usageMetadata"]["cachedContentTokenCount"] == gemini_mod._spec_prefix_tokens()
+    text = server.cached_contents[name]["systemInstruction"]["parts"][0]["text"]
+    assert text == gemini_mod._spec_system_text() and "Example 6:" in text
+
+    # Entry expired on the provider side: the call falls back to an inline system turn, then re-caches.
+    server.cached_contents.clear()
+    third = provider.generate_house_spec(prompt="r", bedrooms=2, bathrooms=1, style="contemporary")
+    assert "cached_content" not in third.meta.raw
+    assert server.last_body["systemInstruction"] == gemini_mod._spec_request_template()["systemInstruction"]
+    provider.generate_house_spec(prompt="s", bedrooms=2, bathrooms=1, style="contemporary")
+    assert len(server.cached_contents) == 1
+    gemini_mod._spec_prefix_cache.reset()
+
+
+def test_spec_template_is_built_once():
+    from app.providers import gemini as gemini_mod
+
+    provider = GeminiProvider.__new__(GeminiProvider)
+    a = provider._house_spec_body(prompt="a", bedrooms=1, bathrooms=1, style="x")
+    b = provider._house_spec_body(prompt="b", bedrooms=2, bathrooms=1, style="x")
+    assert a["generationConfig"] is b["generationConfig"]
+    assert a["generationConfig"]["responseJsonSchema"] is gemini_mod._house_spec_json_schema()
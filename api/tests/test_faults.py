@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import time
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app import faults
+from app.main import create_app
+from tests.test_queue_reliability import _wait_for_terminal
+
+
+@pytest.fixture
+def injector(monkeypatch):
+    from app import config as cfg
+
+    monkeypatch.setattr(cfg.settings, "fault_injection_enabled", True)
+    faults.injector.configure([])
+    yield faults.injector
+    faults.injector.reset()
+
+
+def _pattern(injector, seed: int) -> list[bool]:
+    rule = faults.FaultRule.from_dict({"point": "provider.*", "error": "http:503", "probability": 0.5})
+    injector.configure([rule], seed=seed)
+    out = []
+    for _ in range(24):
+        try:
+            injector.inject("provider.spec")
+            out.append(False)
+        except httpx.HTTPStatusError as e:
+            assert e.response.status_code == 503
+            out.append(True)
+    return out
+
+
+def test_same_seed_injects_the_same_faults(injector):
+    first = _pattern(injector, 7)
+    assert first == _pattern(injector, 7)
+    assert any(first) and not all(first)
+
+
+def test_every_n_max_hits_and_point_matching(injector):
+    injector.configure(
+        [faults.FaultRule.from_dict({"point": "db.commit", "error": "io", "every_n": 2, "max_hits": 2})]
+    )
+    raised = []
+    for _ in range(8):
+        try:
+            injector.inject("db.commit")
+            raised.append(False)
+        except OSError:
+            raised.append(True)
+    assert raised == [False, True, False, True, False, False, False, False]
+    injector.inject("artifact.write")  # no rule for this point
+
+
+def test_stall_and_slow_drip(injector):
+    injector.configure(
+        [
+            faults.FaultRule.from_dict({"point": "artifact.write", "latency": "fixed:60"}),
+            faults.FaultRule.from_dict({"point": "provider.image", "drip_bytes_per_s": 1000}),
+        ]
+    )
+    t0 = time.perf_counter()
+    injector.inject("artifact.write")
+    assert time.perf_counter() - t0 >= 0.06
+
+    t0 = time.perf_counter()
+    assert "".join(injector.drip("provider.image", ["x" * 50, "y" * 50])) == "x" * 50 + "y" * 50
+    assert time.perf_counter() - t0 >= 0.1
+    # Drip rules never stall the call itself.
+    t0 = time.perf_counter()
+    injector.inject("provider.image")
+    assert time.perf_counter() - t0 < 0.05
+
+
+def test_published_rules_reach_other_processes(tmp_path, monkeypatch, injector):
+    from app import config as cfg
+
+    monkeypatch.setattr(cfg.settings, "var_dir", tmp_path)
+    worker = faults.FaultInjector()  # stands in for the injector of a separate worker process
+    worker.inject("db.commit")
+
+    rule = faults.FaultRule.from_dict({"point": "db.commit", "error": "io", "every_n": 2})
+    assert injector.publish([rule], seed=5) == 1
+    assert worker.snapshot()["version"] == 1 and worker.seed == 5
+    worker.inject("db.commit")
+    with pytest.raises(OSError):
+        worker.inject("db.commit")
+
+    assert injector.publish([]) == 2
+    worker.inject("db.commit")
+    worker.inject("db.commit")
+    assert worker.snapshot()["rules"] == []
+
+
+def test_runtime_rules_drive_a_job_retry(tmp_path, monkeypatch, injector):
+    from app import config as cfg
+    from app import db as db_mod
+
+    monkeypatch.setattr(cfg.settings, "var_dir", tmp_path)
+    monkeypatch.setattr(cfg.settings, "database_url", f"sqlite:///{tmp_path/'test_faults.db'}")
+    monkeypatch.setattr(cfg.settings, "run_inprocess_worker", False)
+    monkeypatch.setattr(cfg.settings, "fault_injection_operator_emails", "ops@example.com")
+    monkeypatch.setattr(db_mod, "_engine", None)
+    monkeypatch.setattr(db_mod, "_sessionmaker", None)
+
+    app = create_app()
+    with TestClient(app) as client:
+        rules = {"rules": [{"point": "provider.spec", "error": "timeout", "max_hits": 1}], "seed": 3}
+        assert client.put("/api/v1/system/faults", json=rules).status_code == 401
+        assert client.get("/api/v1/system/faults").status_code == 401
+        client.post("/api/v1/auth/signup", json={"email": "faults@example.com", "password": "password123"})
+        denied = client.put("/api/v1/system/faults", json=rules)
+        assert denied.status_code == 403 and denied.json()["code"] == "fault_operator_required"
+        assert client.get("/api/v1/system/faults").status_code == 403
+        assert client.delete("/api/v1/system/faults").status_code == 403
+
+        client.post("/api/v1/auth/signup", json={"email": "ops@example.com", "password": "password123"})
+        r = client.put("/api/v1/system/faults", json=rules)
+        assert r.status_code == 200
+        assert r.json()["rules"][0]["error"] == "timeout"
+        bad = client.put("/api/v1/system/faults", json={"rules": [{"point": "db.commit", "latency": "gamma:1"}]})
+        assert bad.status_code == 422
+        assert bad.json()["code"] == "invalid_fault_rule"
+
+        session_id = client.post("/api/v1/sessions", json={"title": "Faults"}).json()["id"]
+        job_id = client.post(
+            f"/api/v1/jobs/sessions/{session_id}",
+            json={"prompt": "2 bed", "bedrooms": 2, "bathrooms": 1, "want_exterior_image": False},
+        ).json()["id"]
+        data = _wait_for_terminal(client, job_id)
+        assert data["status"] == "succeeded"
+        assert data["retry_count"] == 1
+
+        snap = client.get("/api/v1/system/faults").json()
+        assert snap["rules"][0]["hits"] == 1
+        assert client.delete("/api/v1/system/faults").json()["rules"] == []
+
+
+def test_fault_endpoints_refuse_when_disabled(tmp_path, monkeypatch):
+    from app import config as cfg
+    from app import db as db_mod
+
+    monkeypatch.setattr(cfg.settings, "var_dir", tmp_path)
+    monkeypatch.setattr(cfg.settings, "database_url", f"sqlite:///{tmp_path/'test_faults_off.db'}")
+    monkeypatch.setattr(cfg.settings, "run_inprocess_worker", False)
+    monkeypatch.setattr(cfg.settings, "fault_injection_operator_emails", "faults-off@example.com")
+    monkeypatch.setattr(db_mod, "_engine", None)
+    monkeypatch.setattr(db_mod, "_sessionmaker", None)
+
+    app = create_app()
+    with TestClient(app) as client:
+        client.post("/api/v1/auth/signup", json={"email": "faults-off@example.com", "password": "password123"})
+        r = client.put("/api/v1/system/faults", json={"rules": [{"point": "db.commit", "latency": "fixed:1"}]})
+        assert r.status_code == 409
+        assert r.json()["code"] == "fault_injection_disabled"
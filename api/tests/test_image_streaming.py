@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import random
+import tracemalloc
+
+import httpx
+
+from app.providers.gemini import GeminiProvider
+
+
+class _LargeImageStandIn:
+    """Streams a generateContent image response whose inline payload is never materialized at once."""
+
+    def __init__(self, *, size_bytes: int, block: int = 48 * 1024) -> None:
+        self.size_bytes = size_bytes
+        self.block = block
+        self.sha = hashlib.sha256()
+
+    def _body(self):
+        rng = random.Random(7)
+        head = {"candidates": [{"content": {"parts": [{"inlineData": {"mimeType": "image/png", "data": ""}}]}}]}
+        prefix, suffix = json.dumps(head).split('"data": ""')
+        yield (prefix + '"data": "').encode("ascii")
+        remaining = self.size_bytes
+        while remaining > 0:
+            raw = rng.randbytes(min(self.block, remaining))
+            remaining -= len(raw)
+            self.sha.update(raw)
+            yield base64.b64encode(raw)
+        tail = '"' + suffix[:-1] + ', "usageMetadata": {"imageTokenCount": 1290, "totalTokenCount": 1300}}'
+        yield tail.encode("ascii")
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        assert request.url.path.endswith(":generateContent")
+        return httpx.Response(200, headers={"content-type": "application/json"}, content=self._body())
+
+
+def test_write_exterior_image_streams_payload_to_disk(tmp_path, monkeypatch):
+    from app import config as cfg
+
+    monkeypatch.setattr(cfg.settings, "gemini_api_key", "test-key")
+    size = 4 * 1024 * 1024
+    stand_in = _LargeImageStandIn(size_bytes=size)
+    provider = GeminiProvider(transport=httpx.MockTransport(stand_in.handler))
+
+    dest = tmp_path / "exterior.part"
+    tracemalloc.start()
+    try:
+        img = provider.write_exterior_image(prompt="farmhouse", style="modern_farmhouse", dest=dest)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert img is not None
+    assert img.mime_type == "image/png"
+    assert img.size_bytes == size
+    assert img.checksum_sha256 == stand_in.sha.hexdigest()
+    assert hashlib.sha256(dest.read_bytes()).hexdigest() == img.checksum_sha256
+    assert img.meta.image_tokens == 1290
+    # Far below a single copy of the image, let alone the decoded + encoded + JSON copies.
+    assert peak < size // 4
+
+
+def test_write_exterior_image_without_inline_data_returns_none(tmp_path, monkeypatch):
+    from app import config as cfg
+
+    monkeypatch.setattr(cfg.settings, "gemini_api_key", "test-key")
+
+    def handler(_request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"candidates": [{"content": {"parts": [{"text": "no image"}]}}]})
+
+    provider = GeminiProvider(transport=httpx.MockTransport(handler))
+    dest = tmp_path / "exterior.part"
+    assert provider.write_exterior_image(prompt="p", style="s", dest=dest) is None
+    assert not dest.exists()
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import concurrent.futures as cf
+import hashlib
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.jobs import transcode
+from app.jobs.transcode import ImageVariant
+from app.main import create_app
+from app.providers.base import ProviderImageResult, ProviderMeta
+from app.providers.mock import MockProvider
+
+
+class ImageProvider:
+    def generate_house_spec(self, *, prompt: str, bedrooms: int, bathrooms: int, style: str):
+        return MockProvider().generate_house_spec(prompt=prompt, bedrooms=bedrooms, bathrooms=bathrooms, style=style)
+
+    def maybe_generate_exterior_image(self, *, prompt: str, style: str):
+        return ProviderImageResult(
+            image_bytes=b"\x89PNG\r\n\x1a\n" + b"x" * 4096,
+            mime_type="image/png",
+            meta=ProviderMeta(provider="test", model="image", latency_ms=1),
+        )
+
+
+def _fake_submit(src):
+    """Stands in for the process pool: writes small files where transcode_image would."""
+    variants = []
+    for width in (960, 480):
+        for fmt, mime, ext in (("webp", "image/webp", "webp"), ("jpeg", "image/jpeg", "jpg")):
+            dest = src.with_name(f"{src.stem}-{width}w.{ext}")
+            data = f"{fmt}-{width}".encode()
+            dest.write_bytes(data)
+            variants.append(
+                ImageVariant(dest, mime, fmt, width, width // 2, hashlib.sha256(data).hexdigest(), len(data))
+            )
+    fut: cf.Future = cf.Future()
+    fut.set_result(variants)
+    return fut
+
+
+def _setup(tmp_path, monkeypatch, submit) -> None:
+    from app import config as cfg
+    from app import db as db_mod
+    from app.jobs import worker as worker_mod
+
+    monkeypatch.setattr(cfg.settings, "var_dir", tmp_path)
+    monkeypatch.setattr(cfg.settings, "database_url", f"sqlite:///{tmp_path/'variants.db'}")
+    monkeypatch.setattr(cfg.settings, "run_inprocess_worker", False)
+    monkeypatch.setattr(db_mod, "_engine", None)
+    monkeypatch.setattr(db_mod, "_sessionmaker", None)
+    monkeypatch.setattr(worker_mod, "_provider", lambda: ImageProvider())
+    monkeypatch.setattr(transcode, "submit", submit)
+
+
+def _run_job(client) -> str:
+    from app.db import SessionLocal
+    from app.jobs import worker as worker_mod
+
+    client.post("/api/v1/auth/signup", json={"email": "variants@example.com", "password": "password123"})
+    session_id = client.post("/api/v1/sessions", json={"title": "Variants"}).json()["id"]
+    job_id = client.post(
+        f"/api/v1/jobs/sessions/{session_id}",
+        json={"prompt": "3 bed farmhouse", "bedrooms": 3, "bathrooms": 2, "exterior_views": ["front"]},
+    ).json()["id"]
+    with SessionLocal() as db:
+        worker_mod.process_job(db, worker_mod._claim_next_job(db))
+    return job_id
+
+
+def test_worker_records_variants_and_serves_the_smallest_adequate(tmp_path, monkeypatch):
+    _setup(tmp_path, monkeypatch, _fake_submit)
+    with TestClient(create_app()) as client:
+        job_id = _run_job(client)
+        job = client.get(f"/api/v1/jobs/{job_id}").json()
+        assert job["status"] == "succeeded"
+        items = client.get(f"/api/v1/jobs/{job_id}/artifacts").json()["items"]
+        variants = [i for i in items if i["type"] == "exterior_image_variant"]
+        assert len(variants) == 4 and {v["view"] for v in variants} == {"front"}
+        assert {(v["width"], v["height"]) for v in variants} == {(960, 480), (480, 240)}
+        assert any(i["type"] == "exterior_image" for i in items)  # original kept
+
+        url = f"/api/v1/jobs/{job_id}/exterior/front"
+        r = client.get(url, params={"width": 400}, headers={"Accept": "image/avif,image/webp,*/*"})
+        assert r.content == b"webp-480" and r.headers["content-type"] == "image/webp"
+        assert "Accept" in r.headers["vary"]
+        assert client.get(url, params={"width": 500}, headers={"Accept": "image/*"}).content == b"jpeg-960"
+        # Wider than any variant, or no width: the full-size original.
+        assert client.get(url, params={"width": 2000}).content.startswith(b"\x89PNG")
+        assert client.get(url).content.startswith(b"\x89PNG")
+        assert client.get(f"/api/v1/jobs/{job_id}/exterior/night").status_code == 404
+
+
+def test_failed_transcode_keeps_the_original(tmp_path, monkeypatch):
+    def failing_submit(src):
+        fut: cf.Future = cf.Future()
+        fut.set_exception(OSError("cannot identify image file"))
+        return fut
+
+    _setup(tmp_path, monkeypatch, failing_submit)
+    with TestClient(create_app()) as client:
+        job_id = _run_job(client)
+        job = client.get(f"/api/v1/jobs/{job_id}").json()
+        assert job["status"] == "succeeded"
+        assert any("variants failed (OSError)" in w for w in job["warnings"])
+        types = [i["type"] for i in client.get(f"/api/v1/jobs/{job_id}/artifacts").json()["items"]]
+        assert "exterior_image" in types and "exterior_image_variant" not in types
+
+
+def test_transcode_image_downscales_without_upscaling(tmp_path):
+    Image = pytest.importorskip("PIL.Image")
+    src = tmp_path / "exterior.png"
+    Image.new("RGB", (1200, 800), (120, 160, 200)).save(src)
+
+    variants = transcode.transcode_image(src, widths=[1600, 960, 480], formats=["webp", "jpeg"], quality=70)
+    assert [(v.width, v.height, v.format) for v in variants] == [
+        (960, 640, "webp"),
+        (960, 640, "jpeg"),
+        (480, 320, "webp"),
+        (480, 320, "jpeg"),
+    ]
+    for v in variants:
+        data = v.path.read_bytes()
+        assert hashlib.sha256(data).hexdigest() == v.checksum_sha256 and len(data) == v.size_bytes
+        with Image.open(v.path) as img:
+            assert img.size == (v.width, v.height)
+    assert not list(tmp_path.glob("*.tmp"))
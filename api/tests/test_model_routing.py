@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import json
+
+import httpx
+from fastapi.testclient import TestClient
+
+from app import telemetry
+from app.main import create_app
+from app.providers import routing
+from app.providers.gemini import GeminiProvider
+from tests.test_spec_streaming import _spec_json
+
+
+def _route(prompt: str = "a house", *, bedrooms: int, bathrooms: int, tier: str | None = "pro"):
+    return routing.route_spec_model(prompt=prompt, bedrooms=bedrooms, bathrooms=bathrooms, plan_tier=tier)
+
+
+def test_routes_by_complexity_and_tier():
+    telemetry.registry.reset()
+    assert _route(bedrooms=2, bathrooms=1).model == "gemini-2.5-flash-lite"
+    assert _route(bedrooms=4, bathrooms=3).model == "gemini-2.5-flash"
+    assert _route("x" * 900, bedrooms=4, bathrooms=3).model == "gemini-2.5-pro"
+
+    # Free tier never reaches pro; the most capable allowed model takes the large request.
+    decision = _route("x" * 900, bedrooms=4, bathrooms=3, tier="free")
+    assert decision.model == "gemini-2.5-flash"
+    assert decision.reason == "most_capable_allowed"
+    assert _route(bedrooms=2, bathrooms=1, tier=None).plan_tier == "free"
+
+
+def test_skips_models_unhealthy_in_live_telemetry(monkeypatch):
+    from app import config as cfg
+
+    monkeypatch.setattr(cfg.settings, "spec_routing_min_samples", 3)
+    telemetry.registry.reset()
+    for _ in range(3):
+        telemetry.registry.record_error(model="gemini-2.5-flash-lite", event_type="house_spec")
+    decision = _route(bedrooms=2, bathrooms=1)
+    assert decision.model == "gemini-2.5-flash"
+    assert decision.skipped[0]["model"] == "gemini-2.5-flash-lite"
+
+    for _ in range(3):
+        telemetry.registry.record(model="gemini-2.5-flash", event_type="house_spec", latency_ms=45_000, tokens=600)
+    assert _route(bedrooms=2, bathrooms=1).model == "gemini-2.5-pro"
+
+    # Nothing healthy on the free tier: still route to the cheapest capable model.
+    decision = _route(bedrooms=2, bathrooms=1, tier="free")
+    assert decision.model == "gemini-2.5-flash-lite"
+    assert decision.reason == "all_unhealthy"
+    telemetry.registry.reset()
+
+
+def test_worker_records_routing_decision(tmp_path, monkeypatch):
+    from app import config as cfg
+    from app import db as db_mod
+    from app.db import SessionLocal
+    from app.jobs import worker as worker_mod
+    from app.models import User
+
+    monkeypatch.setattr(cfg.settings, "var_dir", tmp_path)
+    monkeypatch.setattr(cfg.settings, "database_url", f"sqlite:///{tmp_path/'test_routing.db'}")
+    monkeypatch.setattr(cfg.settings, "run_inprocess_worker", False)
+    monkeypatch.setattr(cfg.settings, "spec_routing_enabled", True)
+    monkeypatch.setattr(cfg.settings, "gemini_api_key", "test-key")
+    monkeypatch.setattr(db_mod, "_engine", None)
+    monkeypatch.setattr(db_mod, "_sessionmaker", None)
+    telemetry.registry.reset()
+
+    models_called: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        models_called.append(request.url.path.rsplit("/", 1)[-1].split(":", 1)[0])
+        payload = {
+            "candidates": [{"content": {"parts": [{"text": _spec_json()}]}}],
+            "usageMetadata": {"promptTokenCount": 100, "candidatesTokenCount": 200, "totalTokenCount": 300},
+        }
+        return httpx.Response(200, content=json.dumps(payload))
+
+    monkeypatch.setattr(worker_mod, "_provider", lambda: GeminiProvider(transport=httpx.MockTransport(handler)))
+
+    app = create_app()
+    with TestClient(app) as client:
+        client.post("/api/v1/auth/signup", json={"email": "routing@example.com", "password": "password123"})
+        with SessionLocal() as db:
+            user = db.query(User).filter(User.email == "routing@example.com").one()
+            user.plan_tier = "pro"
+            db.commit()
+        session_id = client.post("/api/v1/sessions", json={"title": "Routing"}).json()["id"]
+        job_id = client.post(
+            f"/api/v1/jobs/sessions/{session_id}",
+            json={"prompt": "1 bed", "bedrooms": 1, "bathrooms": 1, "want_exterior_image": False},
+        ).json()["id"]
+
+        with SessionLocal() as db:
+            worker_mod.process_job(db, worker_mod._claim_next_job(db))
+
+        data = client.get(f"/api/v1/jobs/{job_id}").json()
+        assert data["status"] == "succeeded"
+        assert models_called == ["gemini-2.5-flash-lite"]
+        assert data["provider_meta"]["routing"]["model"] == "gemini-2.5-flash-lite"
+        assert data["provider_meta"]["routing"]["plan_tier"] == "pro"
+        assert data["provider_meta"]["calls"][0]["model"] == "gemini-2.5-flash-lite"
+    telemetry.registry.reset()
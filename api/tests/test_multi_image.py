@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import httpx
+from fastapi.testclient import TestClient
+
+from app.main import create_app
+from app.providers.base import EXTERIOR_VIEWS, ProviderImageResult, ProviderMeta
+from app.providers.mock import MockProvider
+
+
+class SlowImageProvider:
+    """Spec from the mock provider; each image call sleeps, and 'night' fails transiently if asked."""
+
+    def __init__(self, *, delay_s: float, fail_night: bool = False) -> None:
+        self.delay_s = delay_s
+        self.fail_night = fail_night
+        self.prompts: list[str] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def generate_house_spec(self, *, prompt: str, bedrooms: int, bathrooms: int, style: str):
+        return MockProvider().generate_house_spec(prompt=prompt, bedrooms=bedrooms, bathrooms=bathrooms, style=style)
+
+    def maybe_generate_exterior_image(self, *, prompt: str, style: str):
+        with self._lock:
+            self.prompts.append(prompt)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delay_s)
+            if self.fail_night and EXTERIOR_VIEWS["night"] in prompt:
+                request = httpx.Request("POST", "https://generativelanguage.googleapis.com")
+                raise httpx.HTTPStatusError("busy", request=request, response=httpx.Response(503, request=request))
+            return ProviderImageResult(
+                image_bytes=b"\x89PNG\r\n\x1a\n" + prompt.encode("utf-8"),
+                mime_type="image/png",
+                meta=ProviderMeta(provider="test", model="slow-image", latency_ms=int(self.delay_s * 1000)),
+            )
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+def _setup(tmp_path, monkeypatch, provider, name: str):
+    from app import config as cfg
+    from app import db as db_mod
+    from app.jobs import worker as worker_mod
+
+    monkeypatch.setattr(cfg.settings, "var_dir", tmp_path)
+    monkeypatch.setattr(cfg.settings, "database_url", f"sqlite:///{tmp_path/name}")
+    monkeypatch.setattr(cfg.settings, "run_inprocess_worker", False)
+    monkeypatch.setattr(cfg.settings, "max_images_per_job", 3)
+    monkeypatch.setattr(cfg.settings, "image_concurrency_per_job", 3)
+    monkeypatch.setattr(db_mod, "_engine", None)
+    monkeypatch.setattr(db_mod, "_sessionmaker", None)
+    monkeypatch.setattr(worker_mod, "_provider", lambda: provider)
+
+
+def _run_job(client, views: list[str]) -> str:
+    from app.db import SessionLocal
+    from app.jobs import worker as worker_mod
+
+    client.post("/api/v1/auth/signup", json={"email": "views@example.com", "password": "password123"})
+    session_id = client.post("/api/v1/sessions", json={"title": "Views"}).json()["id"]
+    r = client.post(
+        f"/api/v1/jobs/sessions/{session_id}",
+        json={"prompt": "3 bed farmhouse", "bedrooms": 3, "bathrooms": 2, "exterior_views": views},
+    )
+    assert r.status_code == 200
+    assert r.json()["exterior_views"] == views
+    with SessionLocal() as db:
+        worker_mod.process_job(db, worker_mod._claim_next_job(db))
+    return r.json()["id"]
+
+
+def test_exterior_views_render_concurrently_as_separate_artifacts(tmp_path, monkeypatch):
+    provider = SlowImageProvider(delay_s=0.3)
+    _setup(tmp_path, monkeypatch, provider, "test_views.db")
+
+    app = create_app()
+    with TestClient(app) as client:
+        t0 = time.perf_counter()
+        job_id = _run_job(client, ["front", "dusk", "aerial"])
+        elapsed = time.perf_counter() - t0
+
+        data = client.get(f"/api/v1/jobs/{job_id}").json()
+        assert data["status"] == "succeeded"
+        images = [a for a in client.get(f"/api/v1/jobs/{job_id}/artifacts").json()["items"] if a["type"] == "exterior_image"]
+        assert len(images) == 3
+        assert provider.max_in_flight == 3
+        assert elapsed < 3 * provider.delay_s
+        assert any(EXTERIOR_VIEWS["dusk"] in p for p in provider.prompts)
+        assert sorted(c.get("view") for c in data["provider_meta"]["calls"] if c.get("view")) == ["aerial", "dusk", "front"]
+
+
+def test_failed_view_keeps_the_others(tmp_path, monkeypatch):
+    provider = SlowImageProvider(delay_s=0.05, fail_night=True)
+    _setup(tmp_path, monkeypatch, provider, "test_views_fail.db")
+
+    app = create_app()
+    with TestClient(app) as client:
+        job_id = _run_job(client, ["front", "night"])
+        data = client.get(f"/api/v1/jobs/{job_id}").json()
+        assert data["status"] == "succeeded"
+        assert any(w.startswith("exterior image 'night' failed (provider_transient)") for w in data["warnings"])
+        images = [a for a in client.get(f"/api/v1/jobs/{job_id}/artifacts").json()["items"] if a["type"] == "exterior_image"]
+        assert len(images) == 1
+
+
+def test_exterior_views_are_validated(tmp_path, monkeypatch):
+    _setup(tmp_path, monkeypatch, SlowImageProvider(delay_s=0), "test_views_invalid.db")
+
+    app = create_app()
+    with TestClient(app) as client:
+        client.post("/api/v1/auth/signup", json={"email": "views@example.com", "password": "password123"})
+        session_id = client.post("/api/v1/sessions", json={"title": "Views"}).json()["id"]
+        url = f"/api/v1/jobs/sessions/{session_id}"
+        r = client.post(url, json={"prompt": "p", "exterior_views": ["front", "sideways"]})
+        assert r.status_code == 422
+        assert r.json()["code"] == "unknown_exterior_view"
+        r = client.post(url, json={"prompt": "p", "exterior_views": ["front", "rear", "street", "aerial"]})
+        assert r.status_code == 422
+        assert r.json()["code"] == "too_many_exterior_views"
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import time
+
+import numpy as np
+
+from app.plan.adjacency import DOOR_WIDTH_FT, MIN_WALL_FT, shared_walls, touching_pairs
+from app.plan.packing import PackOptions, pack_plan_arrays, pack_plan_graph, squarify
+from app.providers.templates import build_template_spec
+
+
+def _brute_force(rects: np.ndarray, min_length: float) -> set[tuple[int, int]]:
+    x0, y0 = rects[:, 0], rects[:, 1]
+    x1, y1 = x0 + rects[:, 2], y0 + rects[:, 3]
+    y_overlap = np.minimum(y1[:, None], y1[None, :]) - np.maximum(y0[:, None], y0[None, :])
+    x_overlap = np.minimum(x1[:, None], x1[None, :]) - np.maximum(x0[:, None], x0[None, :])
+    vertical = np.abs(x1[:, None] - x0[None, :]) < 0.005
+    horizontal = np.abs(y1[:, None] - y0[None, :]) < 0.005
+    touch = (vertical & (y_overlap >= min_length)) | (horizontal & (x_overlap >= min_length))
+    touch |= touch.T
+    return {(int(i), int(j)) for i, j in zip(*np.nonzero(touch))}
+
+
+def test_grid_walls_and_door_candidates():
+    rects = np.array([[0, 0, 10, 8], [10, 0, 6, 8], [0, 8, 16, 2]], dtype=float)
+    walls = {(w.a, w.b): w for w in shared_walls(rects)}
+    assert set(walls) == {(0, 1), (0, 2), (1, 2)}
+    assert walls[(0, 1)].vertical and walls[(0, 1)].length == 8
+    assert walls[(0, 1)].door() == (10.0, 2.5, 0.0, DOOR_WIDTH_FT)
+    assert walls[(1, 2)].length == 6
+    # A 2 ft contact is below the wall threshold; a corner touch is never a wall.
+    assert shared_walls(np.array([[0, 0, 4, 4], [4, 2, 4, 4]], dtype=float)) == []
+    assert shared_walls(np.array([[0, 0, 4, 4], [4, 4, 4, 4]], dtype=float), min_length=0) == []
+
+
+def test_sweep_matches_pairwise_on_packed_plans():
+    for seed in range(6):
+        areas = np.random.default_rng(seed).uniform(20, 300, 120)
+        rects = np.round(squarify(areas, 0.0, 0.0, 90.0, float(areas.sum() / 90.0)), 2)
+        assert touching_pairs(rects) == _brute_force(rects, MIN_WALL_FT)
+    spec = build_template_spec(prompt="big home", bedrooms=6, bathrooms=5, style="craftsman")
+    arr = pack_plan_arrays(spec, PackOptions.for_seed(3))
+    assert touching_pairs(arr.rects) == _brute_force(arr.rects, MIN_WALL_FT)
+
+
+def test_plan_edges_follow_the_geometry():
+    spec = build_template_spec(prompt="a house", bedrooms=3, bathrooms=2, style="contemporary")
+    plan = pack_plan_graph(spec)
+    by_id = {r.id: r for r in plan.rooms}
+    assert plan.edges
+    for e in plan.edges:
+        assert e.wall_ft is not None and e.wall_ft >= MIN_WALL_FT
+        assert e.kind == ("circulation" if "hall" in (by_id[e.a].type, by_id[e.b].type) else "adjacent")
+    hall = next(r for r in plan.rooms if r.type == "hall")
+    assert any(e.door_ft is not None for e in plan.edges if hall.id in (e.a, e.b))
+
+
+def test_sweep_scales_to_thousands_of_rooms():
+    areas = np.random.default_rng(1).uniform(20, 300, 4000)
+    rects = np.round(squarify(areas, 0.0, 0.0, 600.0, float(areas.sum() / 600.0)), 2)
+    t0 = time.perf_counter()
+    walls = shared_walls(rects)
+    assert walls
+    assert time.perf_counter() - t0 < 0.5
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import numpy as np
+
+from app.plan.arrays import PlanArrays, intern
+from app.plan.geometry import generate_plan_graph
+from app.plan.packing import pack_plan_arrays, pack_plan_graph
+from app.plan.render import render_plan_svg
+from app.plan.validation import validate_plan
+from app.providers.templates import build_template_spec
+
+
+def _spec():
+    return build_template_spec(prompt="family home", bedrooms=4, bathrooms=3, style="modern_farmhouse")
+
+
+def test_intern_keeps_first_seen_order():
+    table, codes = intern(["bedroom", "hall", "bedroom", "bathroom"])
+    assert table == ("bedroom", "hall", "bathroom")
+    assert codes.tolist() == [0, 1, 0, 2]
+
+
+def test_graph_round_trip_is_lossless():
+    spec = _spec()
+    for plan in (pack_plan_graph(spec), generate_plan_graph(spec)):
+        arr = PlanArrays.from_graph(plan)
+        assert arr.rects.shape == (len(plan.rooms), 4)
+        assert arr.to_graph().model_dump_json() == plan.model_dump_json()
+
+
+def test_hot_path_accepts_arrays_directly():
+    spec = _spec()
+    arr = pack_plan_arrays(spec)
+    plan = arr.to_graph()
+    assert render_plan_svg(arr) == render_plan_svg(plan)
+    assert validate_plan(arr, spec) == validate_plan(plan, spec)
+    assert arr.mask("hall").sum() == 1
+    assert not arr.mask("garage").any()
+    assert np.allclose(arr.areas[arr.mask("bedroom")], arr.area_ft2[arr.mask("bedroom")], rtol=0.03)
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import time
+
+from app.plan import candidates
+from app.plan.geometry import generate_plan_graph
+from app.plan.packing import PackOptions, pack_plan_graph
+from app.providers.templates import build_template_spec
+
+
+def _spec():
+    return build_template_spec(prompt="family home", bedrooms=4, bathrooms=3, style="modern_farmhouse")
+
+
+def test_score_prefers_packed_over_legacy_layout():
+    spec = _spec()
+    packed = candidates.score_plan(spec, pack_plan_graph(spec))
+    legacy = candidates.score_plan(spec, generate_plan_graph(spec))
+    assert packed.area_error < 0.03
+    assert packed.total < legacy.total
+    assert 0.0 <= packed.adjacency <= 1.0
+
+
+def test_seeded_options_are_reproducible():
+    assert PackOptions.for_seed(0) == PackOptions()
+    assert PackOptions.for_seed(5) == PackOptions.for_seed(5)
+    spec = _spec()
+    a = pack_plan_graph(spec, PackOptions.for_seed(5))
+    b = pack_plan_graph(spec, PackOptions.for_seed(5))
+    assert [r.rect_ft for r in a.rooms] == [r.rect_ft for r in b.rooms]
+
+
+def test_choose_layout_keeps_best_candidate_within_budget(monkeypatch):
+    from app import config as cfg
+
+    spec = _spec()
+    monkeypatch.setattr(cfg.settings, "plan_candidates", 1)
+    plan, report = candidates.choose_layout(spec)
+    assert report is None
+
+    monkeypatch.setattr(cfg.settings, "plan_candidates", 6)
+    monkeypatch.setattr(cfg.settings, "plan_candidate_budget_ms", 20_000)
+    try:
+        plan, report = candidates.choose_layout(spec)
+        assert report["scored"] == 6
+        baseline = candidates.score_plan(spec, pack_plan_graph(spec)).total
+        assert report["best_score"]["total"] <= baseline
+        assert candidates.score_plan(spec, plan).total == report["best_score"]["total"]
+
+        # With no budget left only the inline seed-0 layout is considered.
+        monkeypatch.setattr(cfg.settings, "plan_candidate_budget_ms", 0)
+        _, report = candidates.choose_layout(spec)
+        assert report["best_seed"] == 0
+    finally:
+        candidates.shutdown_pool()
+
+
+def test_pool_starts_outside_the_budget_and_late_candidates_return_early(monkeypatch):
+    from app import config as cfg
+
+    spec = _spec()
+    assert candidates._candidate(spec.model_dump_json(), 1, deadline=time.time() - 1) is None
+    assert candidates._candidate(spec.model_dump_json(), 1, deadline=time.time() + 60)[0] == 1
+
+    monkeypatch.setattr(cfg.settings, "plan_candidates", 3)
+    monkeypatch.setattr(cfg.settings, "plan_candidate_workers", 2)
+    candidates.shutdown_pool()
+    try:
+        candidates.warm_pool()
+        assert len(candidates._pool._processes) == 2  # every process is up before the first search
+        candidates.shutdown_pool()
+
+        # A cold pool starts before the budget clock does, so the first search still scores every seed.
+        monkeypatch.setattr(cfg.settings, "plan_candidate_budget_ms", 2_000)
+        _, report = candidates.choose_layout(spec)
+        assert report["scored"] == 3
+    finally:
+        candidates.shutdown_pool()
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from app.main import create_app
+from app.plan import incremental
+from app.plan.arrays import PlanArrays
+from app.plan.geometry import generate_plan_graph
+from app.plan.packing import PackOptions, pack_plan_arrays
+from app.plan.validation import validate_plan
+from app.providers.templates import adjust_room_counts, build_template_spec
+
+
+def _spec():
+    return build_template_spec(prompt="family home", bedrooms=4, bathrooms=3, style="modern_farmhouse")
+
+
+def _rects_by_id(arr: PlanArrays) -> dict[str, np.ndarray]:
+    return {rid: arr.rects[i] for i, rid in enumerate(arr.ids)}
+
+
+def test_adjust_room_counts_adds_and_removes_rooms():
+    spec = _spec()
+    more = adjust_room_counts(spec, bedrooms_delta=1, bathrooms_delta=-1)
+    assert sum(r.type == "bedroom" for r in more.rooms) == 5
+    assert sum(r.type == "bathroom" for r in more.rooms) == 2
+    assert (more.bedrooms, more.bathrooms) == (5, 2)
+    assert next(r for r in more.rooms if r.type == "bathroom").name == "Primary Bathroom"
+    assert {r.id for r in spec.rooms if r.type not in {"bedroom", "bathroom"}} <= {r.id for r in more.rooms}
+
+
+def test_added_bathroom_only_reslices_the_private_zone():
+    spec = _spec()
+    for seed in (0, 1, 2):
+        parent = pack_plan_arrays(spec, PackOptions.for_seed(seed))
+        edited = adjust_room_counts(spec, bedrooms_delta=0, bathrooms_delta=1)
+        arr, report = incremental.relayout(spec, parent, edited)
+        assert report["mode"] == "incremental", report
+        assert report["zones"] == ["private"]
+        assert validate_plan(arr, edited).result != "fail"
+
+        before, after = _rects_by_id(parent), _rects_by_id(arr)
+        public = [r.id for r in spec.rooms if r.type in {"living", "kitchen", "dining", "pantry", "mudroom", "office"}]
+        for rid in public:
+            assert np.allclose(before[rid][1:], after[rid][1:])  # same size and row, at most shifted in x
+        assert report["unchanged"] + report["reshaped"] <= len(spec.rooms)
+
+
+def test_large_edits_and_legacy_parents_fall_back_to_full_layout():
+    spec = _spec()
+    rebuilt = build_template_spec(prompt="family home", bedrooms=4, bathrooms=3, style="modern_farmhouse")
+    arr, report = incremental.relayout(spec, pack_plan_arrays(spec), rebuilt)
+    assert arr is None and report["reason"] == "diff_too_large"
+
+    edited = adjust_room_counts(spec, bedrooms_delta=0, bathrooms_delta=1)
+    legacy = PlanArrays.from_graph(generate_plan_graph(spec))
+    arr, report = incremental.relayout(spec, legacy, edited)
+    assert arr is None and report["reason"] == "parent_not_packed"
+
+
+def test_regenerate_with_extra_bathroom_uses_incremental_layout(tmp_path, monkeypatch):
+    from app import config as cfg
+    from app import db as db_mod
+    from app.db import SessionLocal
+    from app.jobs import worker as worker_mod
+    from app.providers.mock import MockProvider
+
+    monkeypatch.setattr(cfg.settings, "var_dir", tmp_path)
+    monkeypatch.setattr(cfg.settings, "database_url", f"sqlite:///{tmp_path/'incremental.db'}")
+    monkeypatch.setattr(cfg.settings, "run_inprocess_worker", False)
+    monkeypatch.setattr(cfg.settings, "plan_incremental_enabled", True)
+    monkeypatch.setattr(db_mod, "_engine", None)
+    monkeypatch.setattr(db_mod, "_sessionmaker", None)
+    monkeypatch.setattr(worker_mod, "_provider", lambda: MockProvider())
+
+    with TestClient(create_app()) as client:
+        client.post("/api/v1/auth/signup", json={"email": "incremental@example.com", "password": "password123"})
+        session_id = client.post("/api/v1/sessions", json={"title": "Incremental"}).json()["id"]
+        parent = client.post(
+            f"/api/v1/jobs/sessions/{session_id}", json={"prompt": "4 bed farmhouse", "bedrooms": 4, "bathrooms": 3}
+        ).json()["id"]
+        with SessionLocal() as db:
+            worker_mod.process_job(db, worker_mod._claim_next_job(db))
+        child = client.post(f"/api/v1/jobs/{parent}/regenerate", json={"reuse_spec": True, "bathrooms": 4}).json()["id"]
+        with SessionLocal() as db:
+            worker_mod.process_job(db, worker_mod._claim_next_job(db))
+
+        out = client.get(f"/api/v1/jobs/{child}").json()
+        assert out["status"] == "succeeded", out
+        assert out["provider_meta"]["plan_incremental"]["mode"] == "incremental"
+        assert out["provider_meta"]["plan_incremental"]["added"] == 1
+        assert "plan_memo" not in out["provider_meta"]
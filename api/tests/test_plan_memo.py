@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import json
+
+from fastapi.testclient import TestClient
+
+from app.main import create_app
+from app.plan import memo as memo_mod
+from app.plan.geometry import generate_plan_graph
+from app.plan.packing import pack_plan_graph
+from app.providers.templates import build_template_spec
+
+
+def _spec():
+    return build_template_spec(prompt="3 bed farmhouse", bedrooms=3, bathrooms=2, style="modern_farmhouse")
+
+
+def test_layouts_are_deterministic_for_identical_specs():
+    spec = _spec()
+    again = spec.model_copy(deep=True)
+    for layout in (pack_plan_graph, generate_plan_graph):
+        assert layout(spec).model_dump_json() == layout(again).model_dump_json()
+    hall = next(r for r in pack_plan_graph(spec).rooms if r.type == "hall")
+    other = build_template_spec(prompt="3 bed farmhouse", bedrooms=3, bathrooms=2, style="modern_farmhouse")
+    assert hall.id != next(r for r in pack_plan_graph(other).rooms if r.type == "hall").id
+
+
+def test_identical_specs_reuse_the_memoized_build(monkeypatch):
+    memo = memo_mod.PlanMemo(max_entries=2)
+    monkeypatch.setattr(memo_mod, "memo", memo)
+    calls = []
+    real = memo_mod.candidates.choose_layout
+    monkeypatch.setattr(memo_mod.candidates, "choose_layout", lambda spec: calls.append(1) or real(spec))
+
+    spec = _spec()
+    first, cached = memo_mod.build_plan(spec)
+    assert not cached
+    second, cached = memo_mod.build_plan(spec.model_copy(deep=True))
+    assert cached and second is first
+    assert len(calls) == 1
+
+    memo_mod.build_plan(_spec())
+    memo_mod.build_plan(_spec())
+    assert memo.stats()["evictions"] == 1
+    assert memo.stats()["hits"] == 1
+
+
+def test_memo_misses_after_validation_or_search_settings_change(monkeypatch):
+    from app import config as cfg
+
+    monkeypatch.setattr(memo_mod, "memo", memo_mod.PlanMemo(max_entries=8))
+    spec = _spec()
+    first, _ = memo_mod.build_plan(spec)
+    for name, value in (("plan_min_coverage", 0.999), ("plan_max_area_error", 0.0), ("plan_candidate_budget_ms", 1)):
+        monkeypatch.setattr(cfg.settings, name, value)
+        build, cached = memo_mod.build_plan(spec)
+        assert not cached, name
+    assert build.validation.result == "warn" and first.validation.result == "ok"
+    monkeypatch.setattr(memo_mod, "LAYOUT_VERSION", memo_mod.LAYOUT_VERSION + 1)
+    assert not memo_mod.build_plan(spec)[1]
+
+
+def test_reuse_spec_regeneration_hits_the_memo(tmp_path, monkeypatch):
+    from app import config as cfg
+    from app import db as db_mod
+    from app.db import SessionLocal
+    from app.jobs import worker as worker_mod
+    from app.models import Artifact, PlanGraph as PlanGraphRow
+    from app.providers.mock import MockProvider
+
+    monkeypatch.setattr(cfg.settings, "var_dir", tmp_path)
+    monkeypatch.setattr(cfg.settings, "database_url", f"sqlite:///{tmp_path/'memo.db'}")
+    monkeypatch.setattr(cfg.settings, "run_inprocess_worker", False)
+    monkeypatch.setattr(db_mod, "_engine", None)
+    monkeypatch.setattr(db_mod, "_sessionmaker", None)
+    monkeypatch.setattr(worker_mod, "_provider", lambda: MockProvider())
+    monkeypatch.setattr(memo_mod, "memo", memo_mod.PlanMemo(max_entries=8))
+
+    with TestClient(create_app()) as client:
+        client.post("/api/v1/auth/signup", json={"email": "memo@example.com", "password": "password123"})
+        session_id = client.post("/api/v1/sessions", json={"title": "Memo"}).json()["id"]
+        parent = client.post(
+            f"/api/v1/jobs/sessions/{session_id}", json={"prompt": "3 bed farmhouse", "bedrooms": 3, "bathrooms": 2}
+        ).json()["id"]
+        with SessionLocal() as db:
+            worker_mod.process_job(db, worker_mod._claim_next_job(db))
+        child = client.post(f"/api/v1/jobs/{parent}/regenerate", json={"reuse_spec": True}).json()["id"]
+        with SessionLocal() as db:
+            worker_mod.process_job(db, worker_mod._claim_next_job(db))
+
+        with SessionLocal() as db:
+            rows = {r.job_id: r for r in db.query(PlanGraphRow).all()}
+        assert rows[parent].canonical_hash == rows[child].canonical_hash
+        meta = client.get(f"/api/v1/jobs/{child}").json()["provider_meta"]
+        assert meta["plan_memo"]["hit"] is True
+        # Identical plan.svg bytes: both jobs point at one stored blob.
+        with SessionLocal() as db:
+            svg_paths = {a.path for a in db.query(Artifact).filter(Artifact.type == "plan_svg").all()}
+        assert len(svg_paths) == 1
+        assert json.loads(rows[child].json_text)["rooms"]
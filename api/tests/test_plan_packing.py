@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import time
+
+import numpy as np
+import pytest
+
+from app.plan.geometry import generate_plan_graph
+from app.plan.layout import layout_plan
+from app.plan.packing import MAX_ROOM_ASPECT, PackOptions, pack_plan_arrays, pack_plan_graph, squarify
+from app.providers.templates import STYLE_TEMPLATES, build_template_spec
+from app.schemas import HouseSpec, HouseSpecRoom
+
+
+def _rects(plan) -> np.ndarray:
+    return np.array([[r.rect_ft.x, r.rect_ft.y, r.rect_ft.w, r.rect_ft.h] for r in plan.rooms])
+
+
+def _assert_tiles_outline(plan) -> None:
+    r = _rects(plan)
+    x0, y0, x1, y1 = r[:, 0], r[:, 1], r[:, 0] + r[:, 2], r[:, 1] + r[:, 3]
+    assert (x0 >= 0).all() and (y0 >= 0).all()
+    assert (x1 <= plan.outline_ft.w + 1e-6).all() and (y1 <= plan.outline_ft.h + 1e-6).all()
+    overlap_w = np.minimum(x1[:, None], x1[None, :]) - np.maximum(x0[:, None], x0[None, :])
+    overlap_h = np.minimum(y1[:, None], y1[None, :]) - np.maximum(y0[:, None], y0[None, :])
+    overlap = np.clip(overlap_w, 0, None) * np.clip(overlap_h, 0, None)
+    np.fill_diagonal(overlap, 0)
+    assert overlap.max() < 1e-6
+    assert (r[:, 2] * r[:, 3]).sum() == pytest.approx(plan.outline_ft.w * plan.outline_ft.h, rel=1e-3)
+
+
+def _big_spec(rooms: int) -> HouseSpec:
+    types = ["bedroom", "bathroom", "living", "office", "laundry", "kitchen", "dining", "closet"]
+    return HouseSpec(
+        style="contemporary",
+        bedrooms=rooms // 3,
+        bathrooms=rooms // 4,
+        rooms=[
+            HouseSpecRoom(id=f"r{i}", type=types[i % len(types)], name=f"Room {i}", area_ft2=60 + (i * 37) % 220)
+            for i in range(rooms)
+        ],
+    )
+
+
+def test_squarify_tiles_box_exactly():
+    areas = np.array([6.0, 6, 4, 3, 2, 2, 1])
+    rects = squarify(areas, 0.0, 0.0, 6.0, 4.0)
+    assert np.allclose(rects[:, 2] * rects[:, 3], areas)
+    assert np.isclose((rects[:, 0] + rects[:, 2]).max(), 6.0)
+    assert np.isclose((rects[:, 1] + rects[:, 3]).max(), 4.0)
+
+
+def test_large_spec_keeps_every_room():
+    spec = build_template_spec(prompt="big farmhouse", bedrooms=6, bathrooms=5, style="modern_farmhouse")
+    legacy = generate_plan_graph(spec)
+    plan = pack_plan_graph(spec)
+    placed = {r.id for r in plan.rooms}
+    assert {r.id for r in spec.rooms} <= placed
+    assert len({r.id for r in legacy.rooms} & {r.id for r in spec.rooms}) < len(spec.rooms)
+    _assert_tiles_outline(plan)
+
+    by_id = {r.id: r for r in plan.rooms}
+    for room in spec.rooms:
+        rect = by_id[room.id].rect_ft
+        assert rect.w * rect.h == pytest.approx(room.area_ft2, rel=0.03)
+        assert max(rect.w / rect.h, rect.h / rect.w) <= MAX_ROOM_ASPECT + 1e-6
+
+
+def test_template_plans_keep_every_room_within_the_aspect_limit():
+    # The canonical outline aspect leaves slivers (offices, pantries) in some of these; retries fix them.
+    for style in STYLE_TEMPLATES:
+        for bedrooms in range(1, 7):
+            for bathrooms in range(1, 5):
+                spec = build_template_spec(prompt="a house", bedrooms=bedrooms, bathrooms=bathrooms, style=style)
+                for mirror in (False, True):
+                    arr = pack_plan_arrays(spec, PackOptions(mirror=mirror))
+                    rooms = ~arr.mask("hall")
+                    w, h = arr.rects[rooms, 2], arr.rects[rooms, 3]
+                    assert np.maximum(w / h, h / w).max() <= MAX_ROOM_ASPECT + 1e-6, (style, bedrooms, bathrooms)
+                    assert not any("aspect ratio" in msg for msg in arr.warnings)
+
+
+def test_kitchen_sits_between_living_and_dining():
+    spec = build_template_spec(prompt="a house", bedrooms=3, bathrooms=2, style="contemporary")
+    plan = pack_plan_graph(spec)
+    order = [r.type for r in plan.rooms if r.type in {"living", "kitchen", "dining"}]
+    assert order == ["living", "kitchen", "dining"]
+
+
+def test_fifty_plus_rooms_pack_in_milliseconds():
+    spec = _big_spec(60)
+    pack_plan_graph(spec)
+    t0 = time.perf_counter()
+    plan = pack_plan_graph(spec)
+    elapsed_ms = (time.perf_counter() - t0) * 1000
+    assert len(plan.rooms) == 61
+    _assert_tiles_outline(plan)
+    assert elapsed_ms < 50
+
+
+def test_layout_strategy_selection_and_fallback(monkeypatch):
+    from app import config as cfg
+    from app.plan import layout
+
+    spec = build_template_spec(prompt="a house", bedrooms=2, bathrooms=1, style="ranch")
+    monkeypatch.setattr(cfg.settings, "plan_layout_strategy", "legacy")
+    assert layout_plan(spec).outline_ft.w == 52.0
+
+    def _broken(_spec):
+        raise ValueError("boom")
+
+    monkeypatch.setitem(layout.STRATEGIES, "packed", _broken)
+    plan = layout_plan(spec, strategy="packed")
+    assert plan.outline_ft.w == 52.0
+    assert any(w.startswith("layout_fallback: packed") for w in plan.warnings)
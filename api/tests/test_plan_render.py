@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import hashlib
+import xml.etree.ElementTree as ET
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from app.main import create_app
+from app.plan.packing import pack_plan_arrays
+from app.plan.render import render_plan_svg, render_plan_svg_compact, write_plan_svg
+from app.plan.render_bench import synthetic_plan
+from app.providers.templates import build_template_spec
+
+_NS = "{http://www.w3.org/2000/svg}"
+
+
+def _rooms(svg: str) -> list[tuple[list[float], str]]:
+    root = ET.fromstring(svg)
+    rects = [r for r in root.iter(f"{_NS}rect") if r.get("class") == "r" or r.get("stroke-width") == "2"]
+    texts = list(root.iter(f"{_NS}text"))
+    return [
+        ([float(r.get(k)) for k in ("x", "y", "width", "height")], t.text)
+        for r, t in zip(rects, texts, strict=True)
+    ]
+
+
+def test_compact_svg_draws_the_same_rooms_plus_doors():
+    spec = build_template_spec(prompt="a <cosy> & bright home", bedrooms=4, bathrooms=3, style="modern_farmhouse")
+    arr = pack_plan_arrays(spec)
+    legacy, compact = render_plan_svg(arr), render_plan_svg_compact(arr)
+    assert len(compact) < len(legacy)
+
+    old, new = _rooms(legacy), _rooms(compact)
+    assert [name for _, name in old] == [name for _, name in new]
+    assert np.allclose([box for box, _ in old], [box for box, _ in new], atol=0.051)
+
+    uses = list(ET.fromstring(compact).iter(f"{_NS}use"))
+    assert len(uses) == int((~np.isnan(arr.edge_doors[:, 0])).sum()) > 0
+    assert {u.get("href") for u in uses} <= {"#dv", "#dh"}
+    assert 'x="8"' in compact and 'x="8.0"' not in compact
+
+
+def test_streamed_write_matches_render_and_reports_checksum(tmp_path):
+    arr = synthetic_plan(1200)
+    for renderer, render in (("compact", render_plan_svg_compact), ("legacy", render_plan_svg)):
+        path = tmp_path / f"{renderer}.svg"
+        checksum, size = write_plan_svg(arr, path, renderer=renderer)
+        data = path.read_bytes()
+        assert data == render(arr).encode("utf-8")
+        assert (checksum, size) == (hashlib.sha256(data).hexdigest(), len(data))
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_compact_svg_is_smaller_than_legacy_on_a_large_plan(tmp_path):
+    # Timing and peak memory are machine-dependent: python -m app.plan.render_bench reports them.
+    arr = synthetic_plan(5000)
+    sizes = {r: write_plan_svg(arr, tmp_path / f"{r}.svg", renderer=r)[1] for r in ("legacy", "compact")}
+    assert sizes["compact"] < 0.8 * sizes["legacy"]  # despite the extra door elements
+
+
+def test_worker_streams_compact_plan_svg(tmp_path, monkeypatch):
+    from app import config as cfg
+    from app import db as db_mod
+    from app.db import SessionLocal
+    from app.jobs import worker as worker_mod
+    from app.providers.mock import MockProvider
+
+    monkeypatch.setattr(cfg.settings, "var_dir", tmp_path)
+    monkeypatch.setattr(cfg.settings, "database_url", f"sqlite:///{tmp_path/'render.db'}")
+    monkeypatch.setattr(cfg.settings, "run_inprocess_worker", False)
+    monkeypatch.setattr(cfg.settings, "plan_svg_renderer", "compact")
+    monkeypatch.setattr(db_mod, "_engine", None)
+    monkeypatch.setattr(db_mod, "_sessionmaker", None)
+    monkeypatch.setattr(worker_mod, "_provider", lambda: MockProvider())
+
+    with TestClient(create_app()) as client:
+        client.post("/api/v1/auth/signup", json={"email": "render@example.com", "password": "password123"})
+        session_id = client.post("/api/v1/sessions", json={"title": "Render"}).json()["id"]
+        job_id = client.post(
+            f"/api/v1/jobs/sessions/{session_id}", json={"prompt": "3 bed home", "bedrooms": 3, "bathrooms": 2}
+        ).json()["id"]
+        with SessionLocal() as db:
+            worker_mod.process_job(db, worker_mod._claim_next_job(db))
+
+        svg = next(i for i in client.get(f"/api/v1/jobs/{job_id}/artifacts").json()["items"] if i["type"] == "plan_svg")
+        body = client.get(svg["url"]).content
+        assert b'class="r"' in body
+        assert hashlib.sha256(body).hexdigest() == svg["checksum_sha256"]
+        assert svg["encodings"]["gzip"] < svg["size_bytes"]
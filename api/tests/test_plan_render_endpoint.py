@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+
+from app.main import create_app
+from app.plan.render_cache import RenderCache, normalize_scale
+
+
+def test_render_cache_bounds_entries_and_bytes():
+    cache = RenderCache(max_entries=3, max_bytes=10)
+    for key in "abc":
+        cache.put(key, b"xxx")
+    assert cache.get("a") == b"xxx"  # a becomes most recent
+    cache.put("d", b"xxx")  # 12 bytes > 10: evicts the least recent (b)
+    assert cache.get("b") is None and cache.get("a") == b"xxx"
+    cache.put("big", b"x" * 11)  # larger than the whole cache: not kept
+    assert cache.get("big") is None
+    assert cache.stats()["bytes"] <= 10 and cache.stats()["evictions"] == 1
+    assert normalize_scale(24.2) == 24.0 and normalize_scale(1000) == 96.0 and normalize_scale(0) == 2.0
+
+
+def test_plan_renders_on_demand_with_cache_headers(tmp_path, monkeypatch):
+    from app import config as cfg
+    from app import db as db_mod
+    from app.db import SessionLocal
+    from app.jobs import worker as worker_mod
+    from app.plan import render_cache
+    from app.providers.mock import MockProvider
+
+    monkeypatch.setattr(cfg.settings, "var_dir", tmp_path)
+    monkeypatch.setattr(cfg.settings, "database_url", f"sqlite:///{tmp_path/'render_endpoint.db'}")
+    monkeypatch.setattr(cfg.settings, "run_inprocess_worker", False)
+    monkeypatch.setattr(db_mod, "_engine", None)
+    monkeypatch.setattr(db_mod, "_sessionmaker", None)
+    monkeypatch.setattr(worker_mod, "_provider", lambda: MockProvider())
+    render_cache.cache.clear()
+
+    with TestClient(create_app()) as client:
+        client.post("/api/v1/auth/signup", json={"email": "zoom@example.com", "password": "password123"})
+        session_id = client.post("/api/v1/sessions", json={"title": "Zoom"}).json()["id"]
+        job_id = client.post(
+            f"/api/v1/jobs/sessions/{session_id}", json={"prompt": "3 bed home", "bedrooms": 3, "bathrooms": 2}
+        ).json()["id"]
+        url = f"/api/v1/jobs/{job_id}/plan.svg"
+        assert client.get(url).json()["code"] == "plan_not_ready"
+        with SessionLocal() as db:
+            worker_mod.process_job(db, worker_mod._claim_next_job(db))
+
+        # The default scale and theme reproduce the stored artifact.
+        stored = next(i for i in client.get(f"/api/v1/jobs/{job_id}/artifacts").json()["items"] if i["type"] == "plan_svg")
+        assert client.get(url).content == client.get(stored["url"], headers={"Accept-Encoding": "identity"}).content
+
+        first = client.get(url, params={"px_per_ft": 24, "theme": "dark"})
+        assert first.status_code == 200 and first.headers["x-render-cache"] == "miss"
+        assert first.headers["content-type"].startswith("image/svg+xml")
+        assert first.headers["cache-control"].startswith("private, max-age=")
+        assert 'font-size="28"' in first.text and "#020617" in first.text
+
+        again = client.get(url, params={"px_per_ft": 24.1, "theme": "dark"})  # same 0.5 px/ft bucket
+        assert again.headers["x-render-cache"] == "hit" and again.content == first.content
+        assert again.headers["etag"] == first.headers["etag"]
+
+        not_modified = client.get(
+            url, params={"px_per_ft": 24, "theme": "dark"}, headers={"If-None-Match": first.headers["etag"]}
+        )
+        assert not_modified.status_code == 304 and not not_modified.content
+
+        bad = client.get(url, params={"theme": "neon"})
+        assert bad.status_code == 422 and bad.json()["code"] == "invalid_theme"
+
+        stats = client.get("/api/v1/system/telemetry").json()["plan_render_cache"]
+        assert stats["hits"] >= 1 and stats["entries"] == 2
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import struct
+import zlib
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from app.main import create_app
+from app.plan.packing import pack_plan_arrays
+from app.plan.thumbnail import _PALETTE, encode_png, parse_formats, rasterize_plan, render_thumbnails
+from app.providers.templates import build_template_spec
+
+
+def _decode_png(data: bytes) -> np.ndarray:
+    assert data[:8] == b"\x89PNG\r\n\x1a\n"
+    pos, idat, size = 8, b"", None
+    while pos < len(data):
+        (length,) = struct.unpack(">I", data[pos : pos + 4])
+        tag, body = data[pos + 4 : pos + 8], data[pos + 8 : pos + 8 + length]
+        assert struct.unpack(">I", data[pos + 8 + length : pos + 12 + length])[0] == zlib.crc32(tag + body)
+        if tag == b"IHDR":
+            size = struct.unpack(">II", body[:8])
+        elif tag == b"IDAT":
+            idat += body
+        pos += 12 + length
+    w, h = size
+    raw = np.frombuffer(zlib.decompress(idat), dtype=np.uint8).reshape(h, w * 3 + 1)
+    assert (raw[:, 0] == 2).all()
+    return np.cumsum(raw[:, 1:], axis=0, dtype=np.uint8).reshape(h, w, 3)  # undo the "up" filter
+
+
+def test_thumbnail_raster_and_png_roundtrip():
+    spec = build_template_spec(prompt="family home", bedrooms=4, bathrooms=3, style="modern_farmhouse")
+    arr = pack_plan_arrays(spec)
+    rgb = rasterize_plan(arr, width=240)
+    assert rgb.shape[1] == 240
+    assert abs(rgb.shape[0] / 240 - arr.outline[3] / arr.outline[2]) < 0.01
+    assert (rgb == _PALETTE[1]).all(axis=-1).mean() > 0.5  # mostly room fill
+    assert (rgb.sum(axis=-1) < 200).any()  # walls are drawn
+    assert np.array_equal(_decode_png(encode_png(rgb)), rgb)
+
+    (png,) = render_thumbnails(arr, width=240, formats=["png"])
+    assert (png.width, png.height, png.mime_type) == (240, rgb.shape[0], "image/png")
+    assert len(png.data) < 4096
+    assert parse_formats(" WebP, png,png,gif") == ["webp", "png"]
+
+
+def test_render_stage_adds_thumbnail_artifacts(tmp_path, monkeypatch):
+    from app import config as cfg
+    from app import db as db_mod
+    from app.db import SessionLocal
+    from app.jobs import worker as worker_mod
+    from app.providers.mock import MockProvider
+
+    monkeypatch.setattr(cfg.settings, "var_dir", tmp_path)
+    monkeypatch.setattr(cfg.settings, "database_url", f"sqlite:///{tmp_path/'thumbs.db'}")
+    monkeypatch.setattr(cfg.settings, "run_inprocess_worker", False)
+    monkeypatch.setattr(cfg.settings, "plan_thumbnail_formats", "png")
+    monkeypatch.setattr(db_mod, "_engine", None)
+    monkeypatch.setattr(db_mod, "_sessionmaker", None)
+    monkeypatch.setattr(worker_mod, "_provider", lambda: MockProvider())
+
+    with TestClient(create_app()) as client:
+        client.post("/api/v1/auth/signup", json={"email": "thumbs@example.com", "password": "password123"})
+        session_id = client.post("/api/v1/sessions", json={"title": "Thumbs"}).json()["id"]
+        job_id = client.post(
+            f"/api/v1/jobs/sessions/{session_id}", json={"prompt": "3 bed home", "bedrooms": 3, "bathrooms": 2}
+        ).json()["id"]
+        with SessionLocal() as db:
+            worker_mod.process_job(db, worker_mod._claim_next_job(db))
+
+        out = client.get(f"/api/v1/jobs/{job_id}/artifacts").json()
+        (thumb,) = out["thumbnails"]
+        assert thumb["type"] == "plan_thumbnail" and thumb["width"] == 320 and thumb["height"] > 0
+        svg = next(i for i in out["items"] if i["type"] == "plan_svg")
+        assert thumb["size_bytes"] < svg["size_bytes"]
+
+        resp = client.get(thumb["url"])
+        assert resp.status_code == 200
+        assert resp.headers["content-type"] == "image/png"
+        assert _decode_png(resp.content).shape == (thumb["height"], 320, 3)
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import time
+
+import numpy as np
+
+from app.plan.geometry import generate_plan_graph
+from app.plan.packing import pack_plan_graph
+from app.plan.validation import find_overlaps, validate_plan
+from app.providers.templates import STYLE_TEMPLATES, build_template_spec
+from app.schemas import HouseSpec, HouseSpecRoom, PlanGraph, PlanRoom, Rect
+
+
+def _room(rid: str, x: float, y: float, w: float, h: float, area: float | None = None) -> PlanRoom:
+    return PlanRoom(id=rid, name=rid, type="bedroom", area_ft2=area or w * h, rect_ft=Rect(x=x, y=y, w=w, h=h))
+
+
+def _plan(*rooms: PlanRoom, w: float = 20, h: float = 10) -> PlanGraph:
+    return PlanGraph(outline_ft=Rect(x=0, y=0, w=w, h=h), rooms=list(rooms), edges=[], warnings=[])
+
+
+def test_tiled_plan_is_ok():
+    check = validate_plan(_plan(_room("a", 0, 0, 10, 10), _room("b", 10, 0, 10, 10)))
+    assert check.result == "ok"
+    assert check.coverage == 1.0
+    assert check.overlaps == [] and check.outside == []
+
+
+def test_overlap_and_outside_fail():
+    check = validate_plan(_plan(_room("a", 0, 0, 12, 10), _room("b", 10, 0, 12, 10)))
+    assert check.result == "fail"
+    assert check.overlaps == [("a", "b", 20.0)]
+    assert check.outside == ["b"]
+
+
+def test_touching_rooms_do_not_overlap():
+    rects = np.array([[0, 0, 5, 5], [5, 0, 5, 5], [0, 5, 5, 5], [5, 5, 5, 5]], dtype=float)
+    assert find_overlaps(rects) == []
+
+
+def test_gaps_and_area_drift_warn():
+    check = validate_plan(_plan(_room("a", 0, 0, 10, 10, area=150)))
+    assert check.result == "warn"
+    assert check.coverage == 0.5
+    assert check.gap_ft2 == 100.0
+    assert check.area_error_max == round(50 / 150, 4)
+
+
+def test_legacy_layout_dropping_rooms_fails():
+    spec = build_template_spec(prompt="big farmhouse", bedrooms=6, bathrooms=5, style="modern_farmhouse")
+    assert validate_plan(generate_plan_graph(spec), spec).missing
+    assert validate_plan(generate_plan_graph(spec), spec).result == "fail"
+    assert validate_plan(pack_plan_graph(spec), spec).result != "fail"
+
+
+def _legacy_rects(spec: HouseSpec) -> dict[str, tuple[float, float, float, float]]:
+    return {r.name: (r.rect_ft.x, r.rect_ft.y, r.rect_ft.w, r.rect_ft.h) for r in generate_plan_graph(spec).rooms}
+
+
+def test_legacy_layout_output_is_unchanged():
+    # The MockProvider spec the fallback layout was written for; rows that overflow 34 ft are dropped.
+    rooms = [("living", "Great Room", 320), ("kitchen", "Kitchen", 220), ("dining", "Dining", 160)]
+    rooms += [("laundry", "Laundry", 70), ("bedroom", "Primary Bedroom", 240)]
+    rooms += [("bedroom", "Bedroom 2", 150), ("bedroom", "Bedroom 3", 150)]
+    rooms += [("bathroom", "Bathroom 1", 70), ("bathroom", "Bathroom 2", 70)]
+    spec = HouseSpec(
+        style="contemporary",
+        bedrooms=3,
+        bathrooms=2,
+        rooms=[HouseSpecRoom(id=f"r{i}", type=t, name=n, area_ft2=a) for i, (t, n, a) in enumerate(rooms)],
+    )
+    assert _legacy_rects(spec) == {
+        "Great Room": (0, 0, 32, 10),
+        "Kitchen": (0, 10, 32, 8),
+        "Dining": (0, 18, 32, 8),
+        "Hall": (0, 26, 32, 8),
+        "Laundry": (32, 0, 20, 6),
+        "Primary Bedroom": (32, 6, 20, 12),
+        "Bedroom 2": (32, 18, 20, 7.5),
+        "Bedroom 3": (32, 25.5, 20, 7.5),
+    }
+
+
+def test_legacy_layout_puts_service_rooms_off_the_hall():
+    spec = build_template_spec(prompt="a house", bedrooms=2, bathrooms=1, style="modern_farmhouse")
+    rects = _legacy_rects(spec)
+    without = _legacy_rects(spec.model_copy(update={"rooms": [r for r in spec.rooms if r.type not in {"mudroom", "pantry"}]}))
+    # Public and private rows keep their sizes; the service rooms share the hall's band.
+    kept = {k: v for k, v in rects.items() if k not in {"Hall", "Mudroom", "Walk-in Pantry"}}
+    assert kept == {k: v for k, v in without.items() if k != "Hall"}
+    hall = without["Hall"]
+    assert rects["Mudroom"][1] == rects["Walk-in Pantry"][1] == rects["Hall"][1] == hall[1]
+    assert rects["Mudroom"][3] == rects["Hall"][3] == hall[3] >= 6
+    assert round(rects["Mudroom"][2] * rects["Mudroom"][3]) == 60 and rects["Hall"][2] >= 4
+    assert validate_plan(generate_plan_graph(spec), spec).result != "fail"
+
+
+def test_sweep_matches_brute_force_on_random_rects():
+    rng = np.random.default_rng(7)
+    rects = np.column_stack([rng.uniform(0, 100, (300, 2)), rng.uniform(1, 8, (300, 2))])
+    rects[::50, 3] = 90.0  # a few hall-height rooms, checked outside the y window
+    x0, y0, x1, y1 = rects[:, 0], rects[:, 1], rects[:, 0] + rects[:, 2], rects[:, 1] + rects[:, 3]
+    ow = np.minimum(x1[:, None], x1[None, :]) - np.maximum(x0[:, None], x0[None, :])
+    oh = np.minimum(y1[:, None], y1[None, :]) - np.maximum(y0[:, None], y0[None, :])
+    area = np.clip(ow, 0, None) * np.clip(oh, 0, None)
+    expected = {(i, j) for i, j in zip(*np.nonzero(np.triu(area >= 0.25, k=1))) if oh[i, j] > 0.05}
+    assert {tuple(sorted(p[:2])) for p in find_overlaps(rects)} == expected
+
+
+def test_sweep_on_stacked_columns_is_near_linear():
+    # Two columns of 10k stacked rooms: every room in a column shares its x-extent.
+    rects = np.array([[c * 20.0, k * 8.0, 20.0, 8.0] for c in range(2) for k in range(10_000)])
+    rects[[5, 12_345], 1] += 3.0  # two rooms slide down into their neighbours
+    # A room as tall as both columns, past them in y but spanning both in x, must not widen the window.
+    rects = np.vstack([[[0.0, 80_000.0, 40.0, 80_000.0]], rects])
+    t0 = time.perf_counter()
+    pairs = {tuple(sorted(p[:2])) for p in find_overlaps(rects)}
+    assert time.perf_counter() - t0 < 1.0
+    assert pairs == {(6, 7), (12_346, 12_347)}
+
+
+def test_bulk_validation_is_fast():
+    spec = HouseSpec(
+        style="contemporary",
+        bedrooms=20,
+        bathrooms=15,
+        rooms=[HouseSpecRoom(id=f"r{i}", type="bedroom", name=f"R{i}", area_ft2=80 + i % 90) for i in range(200)],
+    )
+    plan = pack_plan_graph(spec)
+    t0 = time.perf_counter()
+    for _ in range(20):
+        check = validate_plan(plan, spec)
+    assert check.result != "fail"
+    assert (time.perf_counter() - t0) / 20 < 0.05
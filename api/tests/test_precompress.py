@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import gzip
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from app.main import create_app
+from app.precompress import negotiate
+
+
+def test_negotiate_honours_q_values_and_prefers_br():
+    both = {"br": 900, "gzip": 1000}
+    assert negotiate("gzip, deflate, br", both) == "br"
+    assert negotiate("gzip, deflate, br", {"gzip": 1000}) == "gzip"
+    assert negotiate("br;q=0.5, gzip", both) == "gzip"
+    assert negotiate("br;q=0, *", both) == "gzip"
+    assert negotiate("identity", both) is None
+    assert negotiate(None, both) is None
+    assert negotiate("*;q=0", both) is None
+    assert negotiate("x-gzip", {"gzip": 1}) == "gzip"
+
+
+def test_text_artifacts_are_served_precompressed(tmp_path, monkeypatch):
+    from app import config as cfg
+    from app import db as db_mod
+    from app.db import SessionLocal
+    from app.jobs import worker as worker_mod
+    from app.models import Artifact
+    from app.providers.mock import MockProvider
+
+    monkeypatch.setattr(cfg.settings, "var_dir", tmp_path)
+    monkeypatch.setattr(cfg.settings, "database_url", f"sqlite:///{tmp_path/'precompress.db'}")
+    monkeypatch.setattr(cfg.settings, "run_inprocess_worker", False)
+    monkeypatch.setattr(db_mod, "_engine", None)
+    monkeypatch.setattr(db_mod, "_sessionmaker", None)
+    monkeypatch.setattr(worker_mod, "_provider", lambda: MockProvider())
+
+    with TestClient(create_app()) as client:
+        client.post("/api/v1/auth/signup", json={"email": "gzip@example.com", "password": "password123"})
+        session_id = client.post("/api/v1/sessions", json={"title": "Gzip"}).json()["id"]
+        job_id = client.post(
+            f"/api/v1/jobs/sessions/{session_id}", json={"prompt": "3 bed home", "bedrooms": 3, "bathrooms": 2}
+        ).json()["id"]
+        with SessionLocal() as db:
+            worker_mod.process_job(db, worker_mod._claim_next_job(db))
+
+        items = {i["type"]: i for i in client.get(f"/api/v1/jobs/{job_id}/artifacts").json()["items"]}
+        svg, spec = items["plan_svg"], items["spec_json"]
+        for item in (svg, spec):
+            assert 0 < item["encodings"]["gzip"] < item["size_bytes"] / 2
+        assert items["plan_thumbnail"]["encodings"] == {}
+
+        with SessionLocal() as db:
+            svg_path = Path(db.get(Artifact, svg["id"]).path)
+        raw = svg_path.read_bytes()
+        assert gzip.decompress(svg_path.with_name(svg_path.name + ".gz").read_bytes()) == raw
+
+        resp = client.get(svg["url"], headers={"Accept-Encoding": "gzip"})
+        assert resp.status_code == 200
+        assert resp.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in resp.headers["vary"]
+        assert int(resp.headers["content-length"]) == svg["encodings"]["gzip"]
+        assert resp.headers["content-type"].startswith("image/svg+xml")
+        assert resp.content == raw  # the client decodes it transparently
+
+        plain = client.get(svg["url"], headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in plain.headers
+        assert int(plain.headers["content-length"]) == len(raw)
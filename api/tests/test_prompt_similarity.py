@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+
+from app.db import SessionLocal
+from app.jobs.similarity import PromptIndex, jaccard, prompt_tokens
+from app.main import create_app
+from app.providers.base import ProviderMeta, ProviderSpecResult
+from app.schemas import HouseSpec, HouseSpecRoom
+
+
+def test_rewordings_normalize_to_same_tokens():
+    a = prompt_tokens("3 bed modern farmhouse with big kitchen")
+    b = prompt_tokens("modern farmhouse, 3BR, large kitchen")
+    assert a == b
+    assert jaccard(a, prompt_tokens("2 bath craftsman bungalow")) == 0.0
+
+
+def test_index_is_scoped_and_bounded():
+    index = PromptIndex(max_entries=3)
+    scope = ("user-1", 3, 2, "modern_farmhouse")
+    index.add(scope, "job-1", "3 bed modern farmhouse with big kitchen")
+
+    match = index.lookup(scope, "modern farmhouse, 3BR, large kitchen", threshold=0.85)
+    assert match is not None and match.job_id == "job-1" and match.similarity == 1.0
+    assert index.lookup(("user-2", 3, 2, "modern_farmhouse"), "3 bed modern farmhouse with big kitchen", threshold=0.85) is None
+    assert index.lookup(scope, "tiny studio cabin near the lake", threshold=0.85) is None
+
+    for i in range(2, 6):
+        index.add(scope, f"job-{i}", f"prompt number {i} with unique words w{i}")
+    stats = index.stats()
+    assert stats["entries"] == 3
+    assert stats["evictions"] == 2
+    assert stats["lookups"] == 3 and stats["hits"] == 1
+    assert stats["lookup_us"]["count"] == 3
+
+
+def test_worker_reuses_spec_for_near_duplicate_prompt(tmp_path, monkeypatch):
+    from app import config as cfg
+    from app import db as db_mod
+    from app.jobs import similarity
+    from app.jobs import worker as worker_mod
+
+    monkeypatch.setattr(cfg.settings, "var_dir", tmp_path)
+    monkeypatch.setattr(cfg.settings, "database_url", f"sqlite:///{tmp_path/'test_similar.db'}")
+    monkeypatch.setattr(cfg.settings, "run_inprocess_worker", False)
+    monkeypatch.setattr(cfg.settings, "prompt_dedupe_enabled", True)
+    monkeypatch.setattr(db_mod, "_engine", None)
+    monkeypatch.setattr(db_mod, "_sessionmaker", None)
+    similarity.index.clear()
+
+    class CountingProvider:
+        calls = 0
+
+        def generate_house_spec(self, *, prompt: str, bedrooms: int, bathrooms: int, style: str):
+            CountingProvider.calls += 1
+            rooms = [HouseSpecRoom(id="kitchen", type="kitchen", name="Kitchen", area_ft2=260)]
+            rooms += [HouseSpecRoom(id=f"bed-{i}", type="bedroom", name=f"Bed {i}", area_ft2=140) for i in range(bedrooms)]
+            rooms += [HouseSpecRoom(id=f"bath-{i}", type="bathroom", name=f"Bath {i}", area_ft2=60) for i in range(bathrooms)]
+            return ProviderSpecResult(
+                spec=HouseSpec(style=style, bedrooms=bedrooms, bathrooms=bathrooms, rooms=rooms),
+                meta=ProviderMeta(provider="test", model="counting"),
+            )
+
+        def maybe_generate_exterior_image(self, *, prompt: str, style: str):
+            return None
+
+    monkeypatch.setattr(worker_mod, "_provider", lambda: CountingProvider())
+
+    def _run(client: TestClient, session_id: str, prompt: str) -> dict:
+        job_id = client.post(
+            f"/api/v1/jobs/sessions/{session_id}",
+            json={
+                "prompt": prompt,
+                "bedrooms": 3,
+                "bathrooms": 2,
+                "style": "modern_farmhouse",
+                "want_exterior_image": False,
+            },
+        ).json()["id"]
+        with SessionLocal() as db:
+            worker_mod.process_job(db, worker_mod._claim_next_job(db))
+        return client.get(f"/api/v1/jobs/{job_id}").json()
+
+    app = create_app()
+    with TestClient(app) as client:
+        client.post("/api/v1/auth/signup", json={"email": "dupe@example.com", "password": "password123"})
+        session_id = client.post("/api/v1/sessions", json={"title": "Dupes"}).json()["id"]
+
+        first = _run(client, session_id, "3 bed modern farmhouse with big kitchen")
+        # Drop the in-memory index to exercise warming from the database.
+        similarity.index.clear()
+        second = _run(client, session_id, "modern farmhouse, 3BR, large kitchen")
+
+        assert first["status"] == second["status"] == "succeeded"
+        assert CountingProvider.calls == 1
+        reuse = second["provider_meta"]["calls"][0]
+        assert reuse["model"] == "similar_prompt"
+        assert reuse["request_id"] == first["id"]
+        assert reuse["similarity"] == 1.0
+
+        body = client.get("/api/v1/system/telemetry").json()
+        assert body["prompt_index"]["hits"] == 1
+
+        # A regeneration without reuse_spec asks for a fresh spec, even though its prompt matches.
+        regen_id = client.post(f"/api/v1/jobs/{first['id']}/regenerate", json={"reuse_spec": False}).json()["id"]
+        with SessionLocal() as db:
+            worker_mod.process_job(db, worker_mod._claim_next_job(db))
+        regen = client.get(f"/api/v1/jobs/{regen_id}").json()
+        assert regen["status"] == "succeeded"
+        assert CountingProvider.calls == 2
+        assert regen["provider_meta"]["calls"][0]["model"] == "counting"
+    similarity.index.clear()
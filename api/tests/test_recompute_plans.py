@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select, update
+
+from app import artifact_store
+from app.main import create_app
+
+
+def test_recompute_rewrites_stale_plans_and_resumes(tmp_path, monkeypatch):
+    from app import config as cfg
+    from app import db as db_mod
+    from app.db import SessionLocal
+    from app.jobs import recompute_plans as rc
+    from app.jobs import worker as worker_mod
+    from app.models import Artifact, Job, PlanGraph as PlanGraphRow
+    from app.providers.mock import MockProvider
+
+    monkeypatch.setattr(cfg.settings, "var_dir", tmp_path)
+    monkeypatch.setattr(cfg.settings, "database_url", f"sqlite:///{tmp_path/'recompute.db'}")
+    monkeypatch.setattr(cfg.settings, "run_inprocess_worker", False)
+    monkeypatch.setattr(db_mod, "_engine", None)
+    monkeypatch.setattr(db_mod, "_sessionmaker", None)
+    monkeypatch.setattr(worker_mod, "_provider", lambda: MockProvider())
+
+    with TestClient(create_app()) as client:
+        client.post("/api/v1/auth/signup", json={"email": "recompute@example.com", "password": "password123"})
+        session_id = client.post("/api/v1/sessions", json={"title": "Recompute"}).json()["id"]
+        job_ids = []
+        for beds in (2, 3, 4):
+            job_ids.append(
+                client.post(
+                    f"/api/v1/jobs/sessions/{session_id}", json={"prompt": f"{beds} bed home", "bedrooms": beds, "bathrooms": 2}
+                ).json()["id"]
+            )
+            with SessionLocal() as db:
+                worker_mod.process_job(db, worker_mod._claim_next_job(db))
+
+    stale = sorted(job_ids)[1]
+    with SessionLocal() as db:
+        good_hash = db.execute(select(PlanGraphRow.canonical_hash).where(PlanGraphRow.job_id == stale)).scalar_one()
+        stale_plan = json.dumps({"warnings": ["old layout warning"]})
+        db.execute(
+            update(PlanGraphRow).where(PlanGraphRow.job_id == stale).values(json_text=stale_plan, canonical_hash="old")
+        )
+        stale_warnings = ["degraded_mode: kept", "plan_validation: rooms a and b overlap", "old layout warning"]
+        meta = json.loads(db.get(Job, stale).provider_meta_json)
+        db.execute(
+            update(Job)
+            .where(Job.id == stale)
+            .values(
+                warnings_json=json.dumps(stale_warnings),
+                provider_meta_json=json.dumps({**meta, "plan_validation": {"result": "fail", "overlaps": 1}}),
+            )
+        )
+        db.commit()
+
+    checkpoint = tmp_path / "ckpt.json"
+    first = rc.recompute_plans(rc.RecomputeOptions(chunk_size=1, workers=2, limit=1, checkpoint=checkpoint))
+    assert (first.scanned, first.updated, first.unchanged) == (1, 0, 1)
+
+    rest = rc.recompute_plans(rc.RecomputeOptions(chunk_size=1, workers=0, checkpoint=checkpoint))
+    assert (rest.scanned, rest.updated, rest.unchanged, rest.failed) == (2, 1, 1, 0)
+    assert rest.last_job_id == max(job_ids)
+
+    with SessionLocal() as db:
+        row = db.execute(select(PlanGraphRow).where(PlanGraphRow.job_id == stale)).scalar_one()
+        assert row.canonical_hash == good_hash and row.json_text != stale_plan
+        # The job's warnings and validation report follow the new plan; unrelated warnings stay.
+        job = db.get(Job, stale)
+        plan_warnings = json.loads(row.json_text)["warnings"]
+        assert json.loads(job.warnings_json) == ["degraded_mode: kept", *plan_warnings]
+        assert json.loads(job.provider_meta_json)["plan_validation"]["result"] == row.validation_result != "fail"
+        arts = db.execute(select(Artifact).where(Artifact.job_id == stale, Artifact.type == "plan_svg")).scalars().all()
+        thumbs = db.execute(select(Artifact).where(Artifact.job_id == stale, Artifact.type == "plan_thumbnail")).scalars().all()
+    assert len(arts) == 1
+    assert thumbs and all(json.loads(t.meta_json)["filename"].startswith("plan-thumb.") for t in thumbs)
+    path = Path(arts[0].path)
+    assert path == artifact_store.blob_path(arts[0].checksum_sha256)
+    assert hashlib.sha256(path.read_bytes()).hexdigest() == arts[0].checksum_sha256
+
+    # Nothing left after the checkpoint; a restart sees every job again and finds them current.
+    assert rc.recompute_plans(rc.RecomputeOptions(workers=0, checkpoint=checkpoint)).scanned == 0
+    again = rc.recompute_plans(rc.RecomputeOptions(workers=0, restart=True, checkpoint=checkpoint))
+    assert (again.scanned, again.updated) == (3, 0)
+
+
+def test_recompute_reruns_candidate_search_and_skips_incremental_plans(tmp_path, monkeypatch):
+    from app import config as cfg
+    from app import db as db_mod
+    from app.db import SessionLocal
+    from app.jobs import recompute_plans as rc
+    from app.jobs import worker as worker_mod
+    from app.models import PlanGraph as PlanGraphRow
+    from app.providers.mock import MockProvider
+
+    monkeypatch.setattr(cfg.settings, "var_dir", tmp_path)
+    monkeypatch.setattr(cfg.settings, "database_url", f"sqlite:///{tmp_path/'recompute.db'}")
+    monkeypatch.setattr(cfg.settings, "run_inprocess_worker", False)
+    monkeypatch.setattr(cfg.settings, "plan_incremental_enabled", True)
+    monkeypatch.setattr(cfg.settings, "plan_layout_strategy", "packed")
+    monkeypatch.setattr(cfg.settings, "plan_candidates", 4)
+    monkeypatch.setattr(cfg.settings, "plan_candidate_budget_ms", 60_000)  # every candidate finishes
+    monkeypatch.setattr(db_mod, "_engine", None)
+    monkeypatch.setattr(db_mod, "_sessionmaker", None)
+    monkeypatch.setattr(worker_mod, "_provider", lambda: MockProvider())
+
+    with TestClient(create_app()) as client:
+        client.post("/api/v1/auth/signup", json={"email": "recompute@example.com", "password": "password123"})
+        session_id = client.post("/api/v1/sessions", json={"title": "Recompute"}).json()["id"]
+        parent = client.post(
+            f"/api/v1/jobs/sessions/{session_id}", json={"prompt": "2 bed farmhouse", "bedrooms": 2, "bathrooms": 2}
+        ).json()["id"]
+        with SessionLocal() as db:
+            worker_mod.process_job(db, worker_mod._claim_next_job(db))
+        child = client.post(f"/api/v1/jobs/{parent}/regenerate", json={"reuse_spec": True, "bathrooms": 3}).json()["id"]
+        with SessionLocal() as db:
+            worker_mod.process_job(db, worker_mod._claim_next_job(db))
+        assert client.get(f"/api/v1/jobs/{child}").json()["provider_meta"]["plan_incremental"]["mode"] == "incremental"
+        assert client.get(f"/api/v1/jobs/{parent}").json()["provider_meta"]["plan_candidates"]["best_seed"] != 0
+
+    with SessionLocal() as db:
+        child_plan = db.execute(select(PlanGraphRow.json_text).where(PlanGraphRow.job_id == child)).scalar_one()
+    stats = rc.recompute_plans(rc.RecomputeOptions(workers=1, checkpoint=tmp_path / "ckpt.json"))
+    # The parent's candidate pick is reproduced, not replaced by the single canonical layout.
+    assert (stats.scanned, stats.skipped, stats.updated, stats.unchanged, stats.failed) == (2, 1, 0, 1, 0)
+    with SessionLocal() as db:
+        assert db.execute(select(PlanGraphRow.json_text).where(PlanGraphRow.job_id == child)).scalar_one() == child_plan
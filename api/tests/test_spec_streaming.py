@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import json
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import create_app
+from app.providers.gemini import GeminiProvider
+from app.schemas import HouseSpec, HouseSpecRoom
+
+
+def _spec_json(*, bad_area: bool = False) -> str:
+    rooms = [
+        HouseSpecRoom(id="living", type="living", name="Living Room", area_ft2=260),
+        HouseSpecRoom(id="kitchen", type="kitchen", name="Kitchen", area_ft2=-5 if bad_area else 180),
+        HouseSpecRoom(id="dining", type="dining", name="Dining", area_ft2=140),
+        HouseSpecRoom(id="bedroom-1", type="bedroom", name="Bedroom 1", area_ft2=150),
+        HouseSpecRoom(id="bathroom-1", type="bathroom", name="Bathroom 1", area_ft2=60),
+    ]
+    spec = HouseSpec(style="contemporary", bedrooms=1, bathrooms=1, rooms=rooms)
+    return spec.model_dump_json()
+
+
+class _ChunkedStandIn:
+    """Local stand-in for streamGenerateContent: SSE events carrying small slices of the JSON text."""
+
+    def __init__(self, text: str, *, chunk_size: int = 17) -> None:
+        self.text = text
+        self.chunk_size = chunk_size
+        self.events_sent = 0
+        self.events_total = (len(text) + chunk_size - 1) // chunk_size
+
+    def _events(self):
+        for i in range(0, len(self.text), self.chunk_size):
+            event = {"candidates": [{"content": {"parts": [{"text": self.text[i : i + self.chunk_size]}]}}]}
+            if i + self.chunk_size >= len(self.text):
+                event["usageMetadata"] = {"promptTokenCount": 11, "candidatesTokenCount": 22, "totalTokenCount": 33}
+            self.events_sent += 1
+            yield f"data: {json.dumps(event)}\r\n\r\n".encode("utf-8")
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        assert request.url.path.endswith(":streamGenerateContent")
+        assert request.url.params.get("alt") == "sse"
+        return httpx.Response(200, headers={"content-type": "text/event-stream"}, content=self._events())
+
+
+def test_stream_house_spec_reports_rooms_incrementally(monkeypatch):
+    from app import config as cfg
+
+    monkeypatch.setattr(cfg.settings, "gemini_api_key", "test-key")
+    stand_in = _ChunkedStandIn(_spec_json())
+    provider = GeminiProvider(transport=httpx.MockTransport(stand_in.handler))
+
+    seen: list[tuple[str, int]] = []
+    result = provider.stream_house_spec(
+        prompt="1 bed",
+        bedrooms=1,
+        bathrooms=1,
+        style="contemporary",
+        on_room=lambda room: seen.append((room.id, stand_in.events_sent)),
+    )
+
+    assert [room_id for room_id, _ in seen] == [r.id for r in result.spec.rooms]
+    # The first room is reported well before the last chunk arrives.
+    assert seen[0][1] < stand_in.events_total
+    assert result.meta.total_tokens == 33
+    assert result.meta.raw["streamed"] is True
+
+
+def test_stream_house_spec_aborts_on_bad_partial_room(monkeypatch):
+    from app import config as cfg
+    from app.jobs import worker as worker_mod
+
+    monkeypatch.setattr(cfg.settings, "gemini_api_key", "test-key")
+    stand_in = _ChunkedStandIn(_spec_json(bad_area=True))
+    provider = GeminiProvider(transport=httpx.MockTransport(stand_in.handler))
+
+    seen_ids: set[str] = set()
+
+    def _on_room(room: HouseSpecRoom) -> None:
+        worker_mod._validate_partial_room(room, seen_ids)
+        seen_ids.add(room.id)
+
+    with pytest.raises(ValueError, match="non-positive area"):
+        provider.stream_house_spec(
+            prompt="1 bed", bedrooms=1, bathrooms=1, style="contemporary", on_room=_on_room
+        )
+    assert seen_ids == {"living"}
+    assert stand_in.events_sent < stand_in.events_total
+
+
+def test_worker_records_spec_progress_when_streaming(tmp_path, monkeypatch):
+    from app import config as cfg
+    from app import db as db_mod
+    from app.db import SessionLocal
+    from app.jobs import worker as worker_mod
+
+    monkeypatch.setattr(cfg.settings, "var_dir", tmp_path)
+    monkeypatch.setattr(cfg.settings, "database_url", f"sqlite:///{tmp_path/'test_stream.db'}")
+    monkeypatch.setattr(cfg.settings, "run_inprocess_worker", False)
+    monkeypatch.setattr(cfg.settings, "spec_streaming_enabled", True)
+    monkeypatch.setattr(cfg.settings, "gemini_api_key", "test-key")
+    monkeypatch.setattr(db_mod, "_engine", None)
+    monkeypatch.setattr(db_mod, "_sessionmaker", None)
+
+    stand_in = _ChunkedStandIn(_spec_json())
+    monkeypatch.setattr(
+        worker_mod, "_provider", lambda: GeminiProvider(transport=httpx.MockTransport(stand_in.handler))
+    )
+
+    app = create_app()
+    with TestClient(app) as client:
+        r = client.post("/api/v1/auth/signup", json={"email": "stream@example.com", "password": "password123"})
+        assert r.status_code == 200
+        session_id = client.post("/api/v1/sessions", json={"title": "Stream"}).json()["id"]
+        r = client.post(
+            f"/api/v1/jobs/sessions/{session_id}",
+            json={"prompt": "1 bed", "bedrooms": 1, "bathrooms": 1, "want_exterior_image": False},
+        )
+        job_id = r.json()["id"]
+
+        with SessionLocal() as db:
+            job = worker_mod._claim_next_job(db)
+            worker_mod.process_job(db, job)
+
+        data = client.get(f"/api/v1/jobs/{job_id}").json()
+        assert data["status"] == "succeeded"
+        assert data["provider_meta"]["spec_progress"]["rooms_received"] == 5
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+
+from app import telemetry
+from app.main import create_app
+from app.providers.base import ProviderMeta, ProviderSpecResult
+from app.schemas import HouseSpec, HouseSpecRoom
+
+
+def test_cost_uses_price_table(monkeypatch):
+    from app import config as cfg
+
+    monkeypatch.setattr(
+        cfg.settings,
+        "provider_price_table_json",
+        '{"m1": {"input_per_mtok": 0.5, "output_per_mtok": 4.0, "image_per_mtok": 30}}',
+    )
+    assert telemetry.cost_microusd("m1", input_tokens=1000, output_tokens=200, image_tokens=10) == 1600
+    assert telemetry.cost_microusd("unpriced", input_tokens=1000, output_tokens=200) is None
+
+
+def test_rolling_histogram_buckets_and_window():
+    h = telemetry.RollingHistogram((100, 1000), window_s=60, max_samples=100)
+    for t, v in [(0.0, 50), (1.0, 80), (2.0, 400), (10.0, 5000)]:
+        h.add(v, now=t)
+    snap = h.snapshot(now=10.0)
+    assert snap["count"] == 4
+    assert [b["count"] for b in snap["buckets"]] == [2, 1, 1]
+    assert snap["max"] == 5000
+
+    # Samples older than the window drop out.
+    h.add(70, now=65.0)
+    snap = h.snapshot(now=65.0)
+    assert snap["count"] == 2
+    assert snap["min"] == 70
+
+
+def test_usage_cost_and_telemetry_endpoints(tmp_path, monkeypatch):
+    from app import config as cfg
+    from app import db as db_mod
+    from app.db import SessionLocal
+    from app.jobs import worker as worker_mod
+
+    monkeypatch.setattr(cfg.settings, "var_dir", tmp_path)
+    monkeypatch.setattr(cfg.settings, "database_url", f"sqlite:///{tmp_path/'test_telemetry.db'}")
+    monkeypatch.setattr(cfg.settings, "run_inprocess_worker", False)
+    monkeypatch.setattr(
+        cfg.settings, "provider_price_table_json", '{"priced-model": {"input_per_mtok": 1, "output_per_mtok": 10}}'
+    )
+    monkeypatch.setattr(db_mod, "_engine", None)
+    monkeypatch.setattr(db_mod, "_sessionmaker", None)
+    telemetry.registry.reset()
+
+    class PricedProvider:
+        def generate_house_spec(self, *, prompt: str, bedrooms: int, bathrooms: int, style: str):
+            rooms = [HouseSpecRoom(id="living", type="living", name="Living", area_ft2=260)]
+            rooms += [HouseSpecRoom(id=f"bed-{i}", type="bedroom", name=f"Bed {i}", area_ft2=140) for i in range(bedrooms)]
+            rooms += [HouseSpecRoom(id=f"bath-{i}", type="bathroom", name=f"Bath {i}", area_ft2=60) for i in range(bathrooms)]
+            return ProviderSpecResult(
+                spec=HouseSpec(style=style, bedrooms=bedrooms, bathrooms=bathrooms, rooms=rooms),
+                meta=ProviderMeta(
+                    provider="test", model="priced-model", latency_ms=420, input_tokens=300, output_tokens=700
+                ),
+            )
+
+        def maybe_generate_exterior_image(self, *, prompt: str, style: str):
+            return None
+
+    monkeypatch.setattr(worker_mod, "_provider", lambda: PricedProvider())
+
+    app = create_app()
+    with TestClient(app) as client:
+        client.post("/api/v1/auth/signup", json={"email": "cost@example.com", "password": "password123"})
+        session_id = client.post("/api/v1/sessions", json={"title": "Cost"}).json()["id"]
+        job_id = client.post(
+            f"/api/v1/jobs/sessions/{session_id}",
+            json={"prompt": "2 bed", "bedrooms": 2, "bathrooms": 1, "want_exterior_image": False},
+        ).json()["id"]
+
+        with SessionLocal() as db:
+            worker_mod.process_job(db, worker_mod._claim_next_job(db))
+
+        usage = client.get(f"/api/v1/jobs/{job_id}/usage").json()
+        assert usage["cost_microusd_total"] == 300 * 1 + 700 * 10
+        assert usage["items"][0]["event_type"] == "house_spec"
+
+        body = client.get("/api/v1/system/telemetry").json()
+        series = next(s for s in body["providers"] if s["model"] == "priced-model")
+        assert series["event_type"] == "house_spec"
+        assert series["latency_ms"]["p50"] == 420
+        assert series["tokens"]["count"] == 1
+        assert series["cost_microusd_total"] == 7300
+
+
+def test_merged_histograms_keep_exact_counts():
+    a = telemetry.RollingHistogram((100, 1000), window_s=60, max_samples=100)
+    b = telemetry.RollingHistogram((100, 1000), window_s=60, max_samples=100)
+    for v in (50, 80, 90):
+        a.add(v, now=0.0)
+    for v in (400, 5000):
+        b.add(v, now=0.0)
+    merged = telemetry.merge_histograms(a.snapshot(now=0.0), b.snapshot(now=0.0))
+    assert (merged["count"], merged["min"], merged["max"]) == (5, 50, 5000)
+    assert [x["count"] for x in merged["buckets"]] == [3, 1, 1]
+    assert (merged["p50"], merged["p90"]) == (100, 5000)  # bucket resolution
+    assert telemetry.merge_histograms(a.snapshot(now=0.0), {"count": 0}) == a.snapshot(now=0.0)
+
+
+def test_system_endpoints_merge_the_worker_processes_stats(tmp_path, monkeypatch):
+    import json
+
+    from app import config as cfg
+    from app import db as db_mod
+    from app.jobs import similarity
+    from app.jobs import worker as worker_mod
+    from app.plan import memo
+    from app.providers import health
+
+    monkeypatch.setattr(cfg.settings, "var_dir", tmp_path)
+    monkeypatch.setattr(cfg.settings, "database_url", f"sqlite:///{tmp_path/'merge.db'}")
+    monkeypatch.setattr(cfg.settings, "run_inprocess_worker", False)
+    monkeypatch.setattr(db_mod, "_engine", None)
+    monkeypatch.setattr(db_mod, "_sessionmaker", None)
+    for reset in (telemetry.registry.reset, similarity.index.clear, memo.memo.clear, health.tracker.reset):
+        reset()
+
+    # What a separate worker process would publish: its series, memo counters and an open breaker.
+    telemetry.registry.record(model="m", event_type="house_spec", latency_ms=400, tokens=900, cost_microusd=7)
+    memo.memo.get("missing")
+    worker_mod._write_worker_heartbeat(state="idle")
+    heartbeat = json.loads((tmp_path / "worker_heartbeat.json").read_text())
+    heartbeat["stats"]["pid"] = -1
+    heartbeat["stats"]["provider_health"].update(degraded=True, reason="provider_error_rate 5/5", retry_in_seconds=30.0)
+    (tmp_path / "worker_heartbeat.json").write_text(json.dumps(heartbeat))
+    telemetry.registry.reset()
+    memo.memo.clear()
+    telemetry.registry.record(model="m", event_type="house_spec", latency_ms=80, tokens=100, cost_microusd=1)
+
+    with TestClient(create_app()) as client:
+        body = client.get("/api/v1/system/telemetry").json()
+        assert body["worker_stats"] == "merged"
+        (series,) = body["providers"]
+        assert (series["calls_total"], series["cost_microusd_total"], series["latency_ms"]["count"]) == (2, 8, 2)
+        assert (series["latency_ms"]["min"], series["latency_ms"]["max"]) == (80, 400)
+        assert body["plan_memo"]["lookups"] == 1
+
+        health_body = client.get("/api/v1/system/health").json()
+        assert health_body["provider_health"]["degraded"] is True
+        assert "stats" not in health_body["worker"]["heartbeat"]
+
+        # A stale heartbeat (worker gone) is not merged.
+        heartbeat["timestamp"] = "2000-01-01T00:00:00+00:00"
+        (tmp_path / "worker_heartbeat.json").write_text(json.dumps(heartbeat))
+        assert client.get("/api/v1/system/telemetry").json()["worker_stats"] == "local"
+    telemetry.registry.reset()
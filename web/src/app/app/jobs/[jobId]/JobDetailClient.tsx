@@ -111,6 +111,18 @@ export default function JobDetailClient({ jobId }: { jobId: string }) {
     () => artifacts.find((artifact) => artifact.type === "exterior_image") ?? null,
     [artifacts],
   );
+  const exteriorSrcSet = useMemo(() => {
+    if (!exterior) return undefined;
+    const variants = artifacts.filter(
+      (artifact) =>
+        artifact.type === "exterior_image_variant" &&
+        artifact.view === exterior.view &&
+        artifact.mime_type === "image/webp" &&
+        artifact.width,
+    );
+    if (!variants.length) return undefined;
+    return variants.map((artifact) => `${artifact.url} ${artifact.width}w`).join(", ");
+  }, [artifacts, exterior]);
   const timelineItems = useMemo(() => {
     if (!job) return [];
     return Object.entries(job.stage_timestamps)
@@ -614,7 +626,12 @@ export default function JobDetailClient({ jobId }: { jobId: string }) {
                     {exterior ? (
                       <>
                         <div className="overflow-hidden rounded-xl border border-[var(--color-border)] bg-[var(--color-surface-muted)]">
-                          <img alt="Exterior render" src={exterior.url} className="h-auto w-full" />
+                          <picture>
+                            {exteriorSrcSet ? (
+                              <source type="image/webp" srcSet={exteriorSrcSet} sizes="(min-width: 1024px) 33vw, 100vw" />
+                            ) : null}
+                            <img alt="Exterior render" src={exterior.url} className="h-auto w-full" />
+                          </picture>
                         </div>
                         <div className="mt-2 text-[11px] text-[var(--color-ink-muted)]">
                           {sizeLabel(exterior.size_bytes)}
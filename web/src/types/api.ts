@@ -50,9 +50,14 @@ export type ArtifactOut = {
   size_bytes: number | null;
   url: string;
   created_at: string;
+  width?: number | null;
+  height?: number | null;
+  encodings?: Record<string, number>;
+  view?: string | null;
 };
 
 export type ArtifactsOut = {
   job_id: string;
   items: ArtifactOut[];
+  thumbnails?: ArtifactOut[];
 };